@@ -0,0 +1,234 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Stand-in for the parts of api.modrinth.com the manager talks to, with a configurable
+# per-request latency so search and download numbers are repeatable offline.
+
+GAME_VERSIONS = ["1.21.5", "1.21.4", "1.21.1", "1.20.6", "1.20.4", "1.20.1", "1.19.4", "1.18.2"]
+LOADERS = ["fabric", "forge", "neoforge", "quilt"]
+
+
+class MockCatalog:
+    def __init__(self, project_count=500, file_size=256 * 1024, seed=1):
+        rng = random.Random(seed)
+        self.file_size = file_size
+        self.projects = []
+        self.versions = {}
+        self.files = {}
+        for i in range(project_count):
+            project_id = f"proj{i:05d}"
+            if i == 0:
+                # A library everything may depend on, like Fabric API
+                loaders, game_versions = list(LOADERS), list(GAME_VERSIONS)
+            else:
+                loaders = rng.sample(LOADERS, rng.randint(1, 2))
+                game_versions = rng.sample(GAME_VERSIONS, rng.randint(1, 4))
+            # Required dependencies on earlier projects, some pinned to a version, so chains form
+            dependencies = []
+            if i:
+                dependencies.append({"project_id": "proj00000", "version_id": None, "dependency_type": "required"})
+            compatible = [j for j in range(max(1, i - 200), i)
+                          if set(self.projects[j]["categories"]) >= set(loaders)
+                          and set(self.projects[j]["versions"]) >= set(game_versions)]
+            for dep in rng.sample(compatible, min(len(compatible), rng.choice((0, 0, 1, 2)))):
+                pinned = rng.random() < 0.3
+                dependencies.append({"project_id": None if pinned else f"proj{dep:05d}",
+                                     "version_id": f"ver{dep:05d}" if pinned else None,
+                                     "dependency_type": "required"})
+            self.projects.append({
+                "project_id": project_id,
+                "slug": f"mock-mod-{i}",
+                "title": f"Mock Mod {i}",
+                "description": f"Synthetic project number {i} for benchmarks",
+                "categories": loaders,
+                "versions": game_versions,
+                "downloads": rng.randint(0, 10_000_000),
+                "project_type": "mod",
+                "date_modified": f"2025-01-{1 + i % 28:02d}T00:00:00Z",
+            })
+            file_name = f"mock-mod-{i}-1.0.0.jar"
+            data = self._file_bytes(file_name)
+            self.files[file_name] = data
+            self.versions[project_id] = [{
+                "id": f"ver{i:05d}",
+                "project_id": project_id,
+                "version_number": "1.0.0",
+                "loaders": loaders,
+                "game_versions": game_versions,
+                "dependencies": dependencies,
+                "files": [{
+                    "filename": file_name,
+                    "primary": True,
+                    "size": len(data),
+                    "url": None,  # filled in once the server knows its address
+                    "hashes": {"sha1": hashlib.sha1(data).hexdigest(), "sha512": hashlib.sha512(data).hexdigest()},
+                }],
+            }]
+
+    def _file_bytes(self, name):
+        seed = hashlib.sha256(name.encode()).digest()
+        return (seed * (self.file_size // len(seed) + 1))[:self.file_size]
+
+    def versions_from_hashes(self, hashes, algorithm, server):
+        wanted = set(hashes)
+        found = {}
+        for versions in self.versions.values():
+            for version in versions:
+                for f in version["files"]:
+                    if f["hashes"].get(algorithm) in wanted:
+                        found[f["hashes"][algorithm]] = server.with_urls(version)
+        return found
+
+    def search(self, query, facets, offset, limit, index="relevance"):
+        hits = [p for p in self.projects if query.lower() in p["title"].lower() or query.lower() in p["description"].lower()]
+        for group in facets:
+            def matches(project):
+                for facet in group:
+                    key, _, value = facet.partition(":")
+                    if key == "categories" and value in project["categories"]:
+                        return True
+                    if key == "versions" and value in project["versions"]:
+                        return True
+                    if key == "project_type" and value == project["project_type"]:
+                        return True
+                return False
+            hits = [p for p in hits if matches(p)]
+        if index == "updated":
+            hits.sort(key=lambda p: p["date_modified"], reverse=True)
+        elif index == "downloads":
+            hits.sort(key=lambda p: p["downloads"], reverse=True)
+        return {"hits": hits[offset:offset + limit], "offset": offset, "limit": limit, "total_hits": len(hits)}
+
+
+class MockModrinthServer:
+    """Runs a MockCatalog on a background thread. Use as a context manager; `api_url` is
+    what modrinth.API_URL should be set to."""
+
+    def __init__(self, latency=0.05, catalog=None, port=0):
+        self.latency = latency
+        self.catalog = catalog or MockCatalog()
+        self.request_count = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, data, status=200):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-Ratelimit-Limit", "300")
+                self.send_header("X-Ratelimit-Remaining", "299")
+                self.send_header("X-Ratelimit-Reset", "60")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.request_count += 1
+                time.sleep(server.latency)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.strip("/").split("/")
+                if url.path == "/v2/search":
+                    facets = json.loads(query.get("facets", ["[]"])[0])
+                    self._send_json(server.catalog.search(
+                        query.get("query", [""])[0], facets,
+                        int(query.get("offset", ["0"])[0]), int(query.get("limit", ["10"])[0]),
+                        query.get("index", ["relevance"])[0]))
+                elif url.path == "/v2/versions":
+                    ids = set(json.loads(query.get("ids", ["[]"])[0]))
+                    self._send_json([server.with_urls(v) for versions in server.catalog.versions.values()
+                                     for v in versions if v["id"] in ids])
+                elif url.path == "/v2/projects":
+                    ids = set(json.loads(query.get("ids", ["[]"])[0]))
+                    self._send_json([dict(p, id=p["project_id"]) for p in server.catalog.projects
+                                     if p["project_id"] in ids or p["slug"] in ids])
+                elif url.path == "/v2/tag/game_version":
+                    self._send_json([{"version": v, "version_type": "release"} for v in GAME_VERSIONS])
+                elif len(parts) == 4 and parts[:2] == ["v2", "project"] and parts[3] == "version":
+                    versions = server.catalog.versions.get(parts[2])
+                    if versions is None:
+                        self._send_json({"error": "not_found"}, 404)
+                        return
+                    loaders = json.loads(query.get("loaders", ["null"])[0]) or LOADERS
+                    game_versions = json.loads(query.get("game_versions", ["null"])[0]) or GAME_VERSIONS
+                    self._send_json([server.with_urls(v) for v in versions
+                                     if set(v["loaders"]) & set(loaders) and set(v["game_versions"]) & set(game_versions)])
+                elif parts[:1] == ["files"] and len(parts) == 2 and parts[1] in server.catalog.files:
+                    self._send_file(server.catalog.files[parts[1]])
+                else:
+                    self._send_json({"error": "not_found"}, 404)
+
+            def do_POST(self):
+                server.request_count += 1
+                time.sleep(server.latency)
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/v2/version_files":
+                    self._send_json(server.catalog.versions_from_hashes(
+                        body.get("hashes", []), body.get("algorithm", "sha512"), server))
+                else:
+                    self._send_json({"error": "not_found"}, 404)
+
+            def _send_file(self, data):
+                start = 0
+                range_header = self.headers.get("Range")
+                if range_header and range_header.startswith("bytes="):
+                    start = int(range_header[6:].split("-")[0])
+                    self.send_response(206)
+                else:
+                    self.send_response(200)
+                body = data[start:]
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self.api_url = self.base_url + "/v2"
+        self._thread = None
+
+    def with_urls(self, version):
+        version = dict(version)
+        version["files"] = [dict(f, url=f"{self.base_url}/files/{f['filename']}") for f in version["files"]]
+        return version
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a mock Modrinth API for manual testing")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    args = parser.parse_args()
+    with MockModrinthServer(args.latency, port=args.port) as mock:
+        print(f"Mock Modrinth API at {mock.api_url} (set SCMM_MODRINTH_API to use it)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import synthetic
+from mock_modrinth import MockCatalog, MockModrinthServer
+
+MB = 1024 * 1024
+
+
+def timed(name, func, files=None, nbytes=None, **extra):
+    start = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - start
+    result = {"name": name, "seconds": round(seconds, 4)}
+    if files is not None:
+        result["files"] = files
+        result["files_per_s"] = round(files / seconds, 1) if seconds else None
+    if nbytes is not None:
+        result["bytes"] = nbytes
+        result["mb_per_s"] = round(nbytes / MB / seconds, 1) if seconds else None
+    result.update(extra)
+    print(f"  {name}: {seconds:.3f} s" + (f", {result.get('mb_per_s')} MB/s" if nbytes else ""))
+    return result, value
+
+def latency_summary(samples):
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+# --- Scenarios ---
+
+def bench_profiles(args, work, results):
+    import core
+    from sync import format_sync_stats
+
+    print("Generating synthetic profiles...")
+    source_a = os.path.join(work, "source", "a")
+    source_b = os.path.join(work, "source", "b")
+    synthetic.make_mod_profile(source_a, args.jars, args.jar_kb * 1024, seed=1)
+    synthetic.make_mod_profile(source_b, args.jars, args.jar_kb * 1024, shared_with=source_a,
+                               shared_fraction=args.shared, seed=2)
+    jars_a = sorted(os.path.join(source_a, n) for n in os.listdir(source_a))
+    jars_b = sorted(os.path.join(source_b, n) for n in os.listdir(source_b))
+    files_a, bytes_a = synthetic.folder_size(source_a)
+
+    shader_source = os.path.join(work, "source", "shaders")
+    os.makedirs(shader_source)
+    shader_paths = []
+    for i in range(args.shaders):
+        path = os.path.join(shader_source, f"Synthetic_Shader_{i}.zip")
+        synthetic.make_shaderpack(path, args.shader_mb * MB)
+        shader_paths.append(path)
+    shader_files, shader_bytes = synthetic.folder_size(shader_source)
+
+    resource_profile = core.create_profile("resources", "nested")
+    resource_count = synthetic.make_resourcepack_folder(
+        os.path.join(resource_profile, "Synthetic Pack"), args.resource_depth, 3, args.resource_files, 4096)
+    _, resource_bytes = synthetic.folder_size(resource_profile)
+
+    print("Import:")
+    results.append(timed("import_mods", lambda: core.import_files("mods", "A", jars_a), files_a, bytes_a)[0])
+    results.append(timed("import_mods_overlapping", lambda: core.import_files("mods", "B", jars_b), len(jars_b))[0])
+    results.append(timed("import_shaders", lambda: core.import_files("shaders", "S", shader_paths),
+                         shader_files, shader_bytes)[0])
+
+    print("Apply:")
+    for staged in (False, True):
+        mode = "staged" if staged else "in_place"
+        for folder in ("mods", "shaderpacks", "resourcepacks"):
+            shutil.rmtree(os.path.join(core.minecraft_folder(), folder), ignore_errors=True)
+        r, stats = timed(f"apply_mods_cold_{mode}", lambda: core.apply_profile("mods", "A", staged=staged), files_a, bytes_a)
+        results.append(dict(r, sync=format_sync_stats(stats)))
+        r, stats = timed(f"apply_mods_noop_{mode}", lambda: core.apply_profile("mods", "A", staged=staged), files_a)
+        results.append(dict(r, sync=format_sync_stats(stats)))
+        r, stats = timed(f"apply_mods_switch_{mode}", lambda: core.apply_profile("mods", "B", staged=staged), len(jars_b))
+        results.append(dict(r, sync=format_sync_stats(stats), bytes_skipped=stats["skipped_bytes"]))
+        r, stats = timed(f"apply_shaders_{mode}", lambda: core.apply_profile("shaders", "S", staged=staged),
+                         shader_files, shader_bytes)
+        results.append(dict(r, sync=format_sync_stats(stats)))
+        r, stats = timed(f"apply_resources_{mode}", lambda: core.apply_profile("resources", "nested", staged=staged),
+                         resource_count, resource_bytes)
+        results.append(dict(r, sync=format_sync_stats(stats)))
+
+    print("Legacy copy_profile_files (wipe and copy):")
+    legacy_target = os.path.join(work, "legacy_mods")
+    results.append(timed("legacy_clear_and_copy", lambda: (core.clear_folder(legacy_target),
+                                                            core.copy_profile_files(core.profile_path("mods", "A"), legacy_target)),
+                         files_a, bytes_a)[0])
+
+def bench_network(args, work, results):
+    import core
+    import http_cache
+    import modrinth
+    from http_client import get_client
+
+    catalog = MockCatalog(project_count=args.projects, file_size=args.download_kb * 1024)
+    with MockModrinthServer(latency=args.latency, catalog=catalog) as mock:
+        modrinth.API_URL = mock.api_url
+        queries = [f"mod {i}" for i in range(args.searches)]
+
+        print(f"Search ({args.latency * 1000:.0f} ms mock latency):")
+        for label in ("cold", "warm"):
+            if label == "cold":
+                http_cache.clear()
+            samples = []
+            requests_before = mock.request_count
+            start = time.perf_counter()
+            for query in queries:
+                t = time.perf_counter()
+                core.search_mods(query, "fabric", "1.21.5")
+                samples.append(time.perf_counter() - t)
+            seconds = time.perf_counter() - start
+            results.append({"name": f"search_{label}", "seconds": round(seconds, 4),
+                            "requests": mock.request_count - requests_before, **latency_summary(samples)})
+            print(f"  search_{label}: p50 {results[-1]['p50_ms']} ms over {len(samples)} queries")
+
+        print("Download:")
+        project_ids = [p["project_id"] for p in catalog.projects
+                       if "fabric" in p["categories"] and "1.21.5" in p["versions"]][:args.downloads]
+        r, (downloaded, errors) = timed(
+            "download_parallel", lambda: core.download_mods(project_ids, "fabric", "1.21.5", "downloaded"),
+            len(project_ids), len(project_ids) * catalog.file_size)
+        results.append(dict(r, errors=len(errors)))
+        results.append({"name": "http_client_stats", **get_client().get_stats()})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark apply, import, search and download")
+    parser.add_argument("--jars", type=int, default=2000, help="jars per mod profile")
+    parser.add_argument("--jar-kb", type=int, default=64, help="size of each jar")
+    parser.add_argument("--shared", type=float, default=0.8, help="fraction of jars the two mod profiles share")
+    parser.add_argument("--shaders", type=int, default=3, help="number of shaderpacks")
+    parser.add_argument("--shader-mb", type=int, default=256, help="size of each shaderpack (use 2048+ for multi-GB)")
+    parser.add_argument("--resource-depth", type=int, default=4, help="nesting depth of the resourcepack folder")
+    parser.add_argument("--resource-files", type=int, default=8, help="files per resourcepack folder")
+    parser.add_argument("--projects", type=int, default=500, help="projects in the mock Modrinth catalog")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock server latency in seconds")
+    parser.add_argument("--searches", type=int, default=20)
+    parser.add_argument("--downloads", type=int, default=40)
+    parser.add_argument("--download-kb", type=int, default=256)
+    parser.add_argument("--skip-network", action="store_true")
+    parser.add_argument("--skip-profiles", action="store_true")
+    parser.add_argument("--workdir", help="where to generate data (default: a temp folder, removed afterwards)")
+    parser.add_argument("--output", default="bench_results.json", help="machine-readable results")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    work = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="scmm-bench-")
+    os.makedirs(work, exist_ok=True)
+    # Profiles, caches and the blob store are relative to the working directory
+    previous_cwd = os.getcwd()
+    os.chdir(work)
+    os.environ["SCMM_MINECRAFT_DIR"] = os.path.join(work, "minecraft")
+
+    results = []
+    started = time.time()
+    try:
+        if not args.skip_profiles:
+            bench_profiles(args, work, results)
+        if not args.skip_network:
+            bench_network(args, work, results)
+    finally:
+        os.chdir(previous_cwd)
+        if not args.workdir:
+            shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "started": started,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": vars(args),
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
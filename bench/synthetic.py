@@ -0,0 +1,94 @@
+import json
+import os
+import random
+import zipfile
+
+# Generators for synthetic profiles: lots of small jars, a few huge shaderpack zips and
+# deeply nested resourcepack folders.
+
+FILLER_BLOCK = random.Random(0).randbytes(1024 * 1024)
+MB = 1024 * 1024
+
+
+def _filler(size, salt):
+    # Unique-per-file content, so dedup and hashing can't cheat, without generating GBs of random data
+    prefix = salt.encode("utf-8")
+    remaining = size
+    first = True
+    while remaining > 0:
+        chunk = (prefix if first else b"") + FILLER_BLOCK
+        first = False
+        yield chunk[:remaining]
+        remaining -= min(len(chunk), remaining)
+
+def make_jar(path, mod_id, size, version="1.0.0", depends=None):
+    manifest = {
+        "schemaVersion": 1,
+        "id": mod_id,
+        "version": version,
+        "name": mod_id.replace("-", " ").title(),
+        "depends": depends or {"fabricloader": ">=0.15", "minecraft": "~1.21"},
+    }
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as jar:
+        jar.writestr("fabric.mod.json", json.dumps(manifest))
+        with jar.open(f"{mod_id.replace('-', '/')}/Payload.class", "w") as f:
+            for chunk in _filler(size, f"{mod_id}-{version}"):
+                f.write(chunk)
+
+def make_mod_profile(folder, count, jar_size, shared_with=None, shared_fraction=0.8, seed=0):
+    """Create `count` jars. With shared_with, that fraction of the jars are copies of the other profile's."""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    shared = []
+    if shared_with:
+        others = sorted(os.listdir(shared_with))
+        shared = rng.sample(others, min(len(others), int(count * shared_fraction)))
+        for name in shared:
+            with open(os.path.join(shared_with, name), "rb") as src, open(os.path.join(folder, name), "wb") as dst:
+                dst.write(src.read())
+            paths.append(os.path.join(folder, name))
+    for i in range(count - len(shared)):
+        mod_id = f"mod-{seed}-{i}"
+        path = os.path.join(folder, f"{mod_id}-1.0.0.jar")
+        make_jar(path, mod_id, jar_size)
+        paths.append(path)
+    return paths
+
+def make_shaderpack(path, size):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True) as pack:
+        pack.writestr("shaders/composite.fsh", "void main() {}\n")
+        pack.writestr("shaders/shaders.properties", "profile.HIGH=\n")
+        with pack.open("shaders/textures/noise.dat", "w", force_zip64=True) as f:
+            for chunk in _filler(size, os.path.basename(path)):
+                f.write(chunk)
+
+def make_resourcepack_folder(folder, depth, dirs_per_level, files_per_dir, file_size, pack_format=46):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "pack.mcmeta"), "w", encoding="utf-8") as f:
+        json.dump({"pack": {"pack_format": pack_format, "description": "Synthetic pack"}}, f)
+    count = 0
+
+    def fill(directory, level):
+        nonlocal count
+        os.makedirs(directory, exist_ok=True)
+        for i in range(files_per_dir):
+            with open(os.path.join(directory, f"texture_{i}.png"), "wb") as f:
+                for chunk in _filler(file_size, f"{directory}-{i}"):
+                    f.write(chunk)
+            count += 1
+        if level < depth:
+            for d in range(dirs_per_level):
+                fill(os.path.join(directory, f"dir{d}"), level + 1)
+
+    fill(os.path.join(folder, "assets", "minecraft", "textures"), 1)
+    return count
+
+def folder_size(folder):
+    total = 0
+    files = 0
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+            files += 1
+    return files, total
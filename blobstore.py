@@ -0,0 +1,152 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import tracing
+from fileops import HASH_CHUNK_SIZE, clone_or_copy, file_hash, link_or_copy
+from sync import refresh_manifest
+
+# Every unique file is stored once here, named by its sha256; profiles hold links to these blobs
+BLOB_FOLDER = "blobs"
+
+# --- Blob store ---
+
+def blob_path(digest):
+    return os.path.join(BLOB_FOLDER, digest[:2], digest)
+
+def has_blob(digest):
+    return os.path.isfile(blob_path(digest))
+
+def store_file(path, digest=None):
+    """Add a file's content to the store (if it is not there yet) and return its sha256."""
+    if digest is None:
+        digest = file_hash(path)
+    target = blob_path(digest)
+    if os.path.isfile(target):
+        tracing.count("blobs_reused")
+        return digest
+    with tracing.span("blob.store", path=path) as s:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # A name of its own, since import workers may be storing the same content at the same
+        # time, that doesn't exist yet: clonefile() on macOS refuses to clone over a file
+        tmp_path = f"{target}.{os.getpid()}-{threading.get_ident()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            s.set(method=clone_or_copy(path, tmp_path))
+            # Another worker got there first; keep its blob, profiles may already link to it
+            if not os.path.isfile(target):
+                os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return digest
+
+def store_stream(stream, chunk_size=HASH_CHUNK_SIZE, expected=None):
+    """Add the contents of a readable binary stream to the store in a single pass.
+
+    Returns (sha256, size). Used for files that only exist inside an archive. With
+    expected, content that turns out to hash differently is thrown away, not stored.
+    """
+    os.makedirs(BLOB_FOLDER, exist_ok=True)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_FOLDER, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                h.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        digest = h.hexdigest()
+        target = blob_path(digest)
+        if (expected is None or digest == expected) and not os.path.isfile(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return digest, size
+
+def link_blob(digest, dest_path):
+    """Place a stored blob at dest_path, replacing whatever is there."""
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    _replace_with_blob(digest, dest_path)
+
+def copy_blob(digest, dest_path):
+    """Place a private copy (a reflink where possible) of a stored blob at dest_path.
+
+    For game folders: the game may rewrite files in place, which must not reach the store.
+    """
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    clone_or_copy(blob_path(digest), dest_path)
+
+def _replace_with_blob(digest, dest_path):
+    blob = blob_path(digest)
+    if os.path.exists(dest_path):
+        if os.path.samefile(blob, dest_path):
+            return
+        os.remove(dest_path)
+    link_or_copy(blob, dest_path)
+
+def add_to_profile(src_path, profile_folder, file_name=None):
+    """Import a file into a profile as a reference to the store instead of a private copy."""
+    os.makedirs(profile_folder, exist_ok=True)
+    digest = store_file(src_path)
+    _replace_with_blob(digest, os.path.join(profile_folder, file_name or os.path.basename(src_path)))
+    return digest
+
+def ingest_file(path, digest=None):
+    """Move a file that was written straight into a profile (e.g. a download) into the store."""
+    digest = store_file(path, digest)
+    _replace_with_blob(digest, path)
+    return digest
+
+def dedupe_folder(folder):
+    """Replace every file in a profile folder with a link to the store. Returns bytes freed."""
+    freed = 0
+    for rel_path, entry in refresh_manifest(folder).items():
+        if entry["hash"] == "symlink":
+            continue
+        path = os.path.join(folder, rel_path)
+        already_stored = has_blob(entry["hash"])
+        if already_stored and os.path.samefile(blob_path(entry["hash"]), path):
+            continue
+        try:
+            ingest_file(path, entry["hash"])
+        except OSError as e:
+            print(f"Failed to deduplicate {path}: {e}")
+            continue
+        if already_stored and os.path.samefile(blob_path(entry["hash"]), path):
+            freed += entry["size"]
+    # Linked files now carry the blob's mtime, so record it now rather than rehash later
+    refresh_manifest(folder)
+    return freed
+
+def collect_garbage():
+    """Delete blobs that no profile links to and no snapshot needs anymore. Returns bytes freed.
+
+    Profiles that got a reflink or copy instead of a hardlink keep their own data,
+    so dropping the blob behind them is harmless.
+    """
+    from snapshots import referenced_hashes
+
+    freed = 0
+    if not os.path.isdir(BLOB_FOLDER):
+        return freed
+    keep = referenced_hashes()
+    for dirpath, dirnames, filenames in os.walk(BLOB_FOLDER):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            # A blob with a single link is only referenced by the store itself
+            if st.st_nlink <= 1 and name not in keep:
+                try:
+                    os.remove(path)
+                    freed += st.st_size
+                except OSError as e:
+                    print(f"Failed to delete {path}: {e}")
+    return freed
@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import modrinth
+import tracing
+
+# Optional offline copy of Modrinth's project list with a full-text index, filled by an
+# incremental sync. Nothing is created until the first sync, so it costs nothing unused.
+
+CATALOG_DB = os.path.join("cache", "catalog.sqlite3")
+SYNC_PAGE_SIZE = 100
+PROJECT_TYPES = ("mod", "modpack", "shader", "resourcepack")
+# Past this, searches go to Modrinth until the catalog is synced again
+CATALOG_MAX_AGE = 7 * 24 * 3600
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _db():
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(CATALOG_DB), exist_ok=True)
+        _connection = sqlite3.connect(CATALOG_DB, check_same_thread=False)
+        _connection.executescript("""
+            CREATE TABLE IF NOT EXISTS projects (
+                rowid INTEGER PRIMARY KEY,
+                project_id TEXT UNIQUE NOT NULL,
+                project_type TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                categories TEXT NOT NULL,
+                versions TEXT NOT NULL,
+                downloads INTEGER NOT NULL,
+                date_modified TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+                title, description, categories, versions,
+                content='projects', content_rowid='rowid', tokenize='unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS projects_ai AFTER INSERT ON projects BEGIN
+                INSERT INTO projects_fts (rowid, title, description, categories, versions)
+                VALUES (new.rowid, new.title, new.description, new.categories, new.versions);
+            END;
+            CREATE TRIGGER IF NOT EXISTS projects_ad AFTER DELETE ON projects BEGIN
+                INSERT INTO projects_fts (projects_fts, rowid, title, description, categories, versions)
+                VALUES ('delete', old.rowid, old.title, old.description, old.categories, old.versions);
+            END;
+            CREATE TRIGGER IF NOT EXISTS projects_au AFTER UPDATE ON projects BEGIN
+                INSERT INTO projects_fts (projects_fts, rowid, title, description, categories, versions)
+                VALUES ('delete', old.rowid, old.title, old.description, old.categories, old.versions);
+                INSERT INTO projects_fts (rowid, title, description, categories, versions)
+                VALUES (new.rowid, new.title, new.description, new.categories, new.versions);
+            END;
+            CREATE INDEX IF NOT EXISTS projects_type_downloads ON projects (project_type, downloads);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                project_type TEXT PRIMARY KEY,
+                cursor TEXT,
+                resume_offset INTEGER NOT NULL DEFAULT 0,
+                newest TEXT,
+                synced_at REAL
+            );
+        """)
+        _connection.commit()
+    return _connection
+
+def exists():
+    return os.path.exists(CATALOG_DB)
+
+def _upsert(db, hits):
+    for hit in hits:
+        db.execute(
+            "INSERT INTO projects (project_id, project_type, title, description, categories, versions, downloads, "
+            "date_modified, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (project_id) DO UPDATE SET project_type = excluded.project_type, title = excluded.title, "
+            "description = excluded.description, categories = excluded.categories, versions = excluded.versions, "
+            "downloads = excluded.downloads, date_modified = excluded.date_modified, data = excluded.data",
+            (hit["project_id"], hit.get("project_type", "mod"), hit.get("title", ""), hit.get("description", ""),
+             json.dumps(hit.get("categories", [])), json.dumps(hit.get("versions", [])),
+             hit.get("downloads", 0), hit.get("date_modified", ""), json.dumps(hit)),
+        )
+
+def add_projects(hits):
+    """Store search hits that came from the live API, so later offline searches find them."""
+    if not hits or not exists():
+        return
+    with _lock:
+        db = _db()
+        _upsert(db, hits)
+        db.commit()
+
+
+# --- Sync ---
+
+def sync_status(project_type="mod"):
+    """{"synced_at", "cursor", "resume_offset", "projects"} for one project type."""
+    with _lock:
+        db = _db()
+        row = db.execute("SELECT cursor, resume_offset, synced_at FROM sync_state WHERE project_type = ?",
+                         (project_type,)).fetchone()
+        count = db.execute("SELECT COUNT(*) FROM projects WHERE project_type = ?", (project_type,)).fetchone()[0]
+    cursor, resume_offset, synced_at = row or (None, 0, None)
+    return {"synced_at": synced_at, "cursor": cursor, "resume_offset": resume_offset, "projects": count}
+
+def is_synced(project_type="mod"):
+    """True once a full sync of this project type has finished at least once."""
+    return exists() and sync_status(project_type)["synced_at"] is not None
+
+def is_fresh(project_type="mod", max_age=CATALOG_MAX_AGE):
+    """True if this project type finished a sync within the last max_age seconds."""
+    if not exists():
+        return False
+    synced_at = sync_status(project_type)["synced_at"]
+    return synced_at is not None and time.time() - synced_at < max_age
+
+def sync(project_type="mod", progress=None, page_size=SYNC_PAGE_SIZE):
+    """Bring the catalog up to date with Modrinth for one project type.
+
+    Pages through projects newest-modified first and stops at the first one older than
+    the previous sync's high-water mark, so a re-sync costs a page or two. The position
+    is committed with every page; an interrupted sync carries on from there next time.
+    Returns the number of projects added or updated.
+    """
+    with _lock:
+        row = _db().execute("SELECT cursor, resume_offset, newest FROM sync_state WHERE project_type = ?",
+                            (project_type,)).fetchone()
+    cursor, offset, newest = row or (None, 0, None)
+    changed = 0
+    with tracing.operation("catalog.sync", project_type=project_type, resume_offset=offset):
+        while True:
+            data = modrinth.browse_projects(project_type, offset=offset, limit=page_size)
+            hits = data["hits"]
+            fresh = [hit for hit in hits if cursor is None or hit.get("date_modified", "") > cursor]
+            for hit in hits:
+                if newest is None or hit.get("date_modified", "") > newest:
+                    newest = hit["date_modified"]
+            offset += len(hits)
+            with _lock:
+                db = _db()
+                _upsert(db, fresh)
+                db.execute(
+                    "INSERT INTO sync_state (project_type, cursor, resume_offset, newest) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (project_type) DO UPDATE SET resume_offset = excluded.resume_offset, "
+                    "newest = excluded.newest",
+                    (project_type, cursor, offset, newest),
+                )
+                db.commit()
+            changed += len(fresh)
+            total = data.get("total_hits", offset)
+            if progress:
+                progress(min(offset, total), total, f"Synced {offset} {project_type} projects")
+            if not hits or len(fresh) < len(hits) or offset >= total:
+                break
+
+        with _lock:
+            db = _db()
+            db.execute("UPDATE sync_state SET cursor = ?, resume_offset = 0, newest = NULL, synced_at = ? "
+                       "WHERE project_type = ?", (newest or cursor, time.time(), project_type))
+            db.commit()
+    return changed
+
+def sync_all(project_types=PROJECT_TYPES, progress=None):
+    return {project_type: sync(project_type, progress) for project_type in project_types}
+
+
+# --- Search ---
+
+def _match_expression(query):
+    # Every word must match, the last one as a prefix so partially typed words still hit
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return "{title description} : (" + " AND ".join(terms) + ")"
+
+def search(query, loader=None, game_version=None, limit=20, offset=0, project_type="mod"):
+    """Answer a search from the local catalog, in the same shape as modrinth.search_projects."""
+    start = time.perf_counter()
+    where = ["p.project_type = ?"]
+    params = [project_type]
+    if loader:
+        where.append("EXISTS (SELECT 1 FROM json_each(p.categories) WHERE value = ?)")
+        params.append(loader)
+    if game_version:
+        where.append("EXISTS (SELECT 1 FROM json_each(p.versions) WHERE value = ?)")
+        params.append(game_version)
+    match = _match_expression(query)
+    if match:
+        source = "projects_fts JOIN projects p ON p.rowid = projects_fts.rowid"
+        where.insert(0, "projects_fts MATCH ?")
+        params.insert(0, match)
+        order = "bm25(projects_fts, 10.0, 1.0), p.downloads DESC"
+    else:
+        source = "projects p"
+        order = "p.downloads DESC"
+    condition = " AND ".join(where)
+    with _lock, tracing.span("catalog.search", query=query) as s:
+        db = _db()
+        total = db.execute(f"SELECT COUNT(*) FROM {source} WHERE {condition}", params).fetchone()[0]
+        rows = db.execute(f"SELECT p.data FROM {source} WHERE {condition} ORDER BY {order} LIMIT ? OFFSET ?",
+                          params + [limit, offset]).fetchall()
+        s.set(hits=len(rows), total=total)
+    return {
+        "hits": [json.loads(row[0]) for row in rows],
+        "offset": offset,
+        "limit": limit,
+        "total_hits": total,
+        "elapsed": time.perf_counter() - start,
+        "source": "catalog",
+    }
@@ -0,0 +1,405 @@
+import time
+
+_started = time.perf_counter()
+
+import argparse
+import sys
+
+import core
+import tracing
+
+KINDS = tuple(core.PROFILE_KINDS)
+HEAVY_MODULES = ("requests", "packaging", "sqlite3", "tkinter", "zipfile")
+
+
+def print_progress(done, total=None, message=None):
+    if not sys.stderr.isatty():
+        return
+    text = f"{done}/{total}" if total else ""
+    if message:
+        text = f"{text} {message}".strip()
+    sys.stderr.write("\r" + text[:100].ljust(100))
+    sys.stderr.flush()
+
+def end_progress():
+    if sys.stderr.isatty():
+        sys.stderr.write("\r" + " " * 100 + "\r")
+
+
+# --- Commands ---
+
+def cmd_list(args):
+    for kind in [args.kind] if args.kind else KINDS:
+        profiles = core.list_profiles(kind)
+        print(f"{kind}: {', '.join(profiles) if profiles else '(none)'}")
+
+def warn_about_packs(profiles, game_version=None):
+    """Print problems with the packs about to be applied; the CLI applies regardless."""
+    import pack_index
+
+    game_version = game_version or pack_index.game_version_hint()
+    for kind, name in profiles.items():
+        if kind in pack_index.PACK_KINDS:
+            found = pack_index.format_problems(core.inspect_packs(kind, name), game_version)
+            if found:
+                print(f"Warning: problems with packs in {kind} profile '{name}':\n{found}", file=sys.stderr)
+
+def cmd_apply(args):
+    from sync import format_sync_stats
+
+    warn_about_packs({args.kind: args.profile})
+    if args.target:
+        result = core.apply_to_targets(args.kind, args.profile, args.target, staged=not args.in_place,
+                                       progress=print_progress, snapshot=not args.no_snapshot)
+        end_progress()
+        print(f"Applied {args.kind} profile '{args.profile}' to {len(result['applied'])} of {len(args.target)} targets")
+        for target, stats in result["applied"].items():
+            print(f"  {target}: {format_sync_stats(stats)}")
+        for target, error in result["errors"].items():
+            print(f"  {target}: failed: {error}", file=sys.stderr)
+        return 1 if result["errors"] else 0
+    stats = core.apply_profile(args.kind, args.profile, staged=not args.in_place, progress=print_progress,
+                               snapshot=not args.no_snapshot)
+    end_progress()
+    print(f"Applied {args.kind} profile '{args.profile}': {format_sync_stats(stats)}")
+
+def cmd_diff(args):
+    import inventory
+    from sync import format_size
+
+    if args.profile not in core.list_profiles(args.kind):
+        raise FileNotFoundError(f"No {args.kind} profile called '{args.profile}'")
+    info = inventory.summary(args.kind, args.profile)
+    print(f"{args.kind} profile '{args.profile}': {info['files']} files, {format_size(info['size'])}")
+    if args.target:
+        results = core.diff_targets(args.kind, args.profile, args.target)
+    else:
+        results = {"game folder": inventory.diff(args.kind, args.profile)}
+    for where, result in results.items():
+        print(f"{where}: {inventory.format_diff(result)}")
+        for key, sign in (("added", "+"), ("removed", "-"), ("changed", "~")):
+            for rel_path in result[key]:
+                print(f"  {sign} {rel_path}")
+
+def cmd_packs(args):
+    import pack_index
+
+    game_version = args.version or pack_index.game_version_hint()
+    results = core.inspect_packs(args.kind, args.profile)
+    for info in results:
+        print(pack_index.format_info(info, game_version))
+    broken = sum(1 for info in results if pack_index.problems(info, game_version))
+    where = f"{args.kind} profile '{args.profile}'" if args.profile else core.game_folder(args.kind)
+    print(f"{len(results)} packs in {where}, {broken} with problems"
+          + (f" (checked against Minecraft {game_version})" if game_version else ""))
+    return 1 if broken else 0
+
+def cmd_rollback(args):
+    core.rollback_apply(args.kind, target=args.target)
+    print(f"Restored the previous contents of {core.game_folder(args.kind, args.target)}")
+
+def cmd_import(args):
+    from importer import format_summary
+
+    summary = core.import_files(args.kind, args.profile, args.files, progress=print_progress)
+    end_progress()
+    print(f"{args.kind} profile '{args.profile}': {format_summary(summary)}")
+    return 1 if summary["errors"] else 0
+
+def cmd_search(args):
+    data = core.search_mods(args.query, args.loader, args.version, limit=args.limit)
+    for hit in data["hits"]:
+        print(f"{hit['project_id']}  {hit['title']}  ({hit.get('downloads', 0)} downloads)")
+    source = " from the offline catalog" if data.get("source") == "catalog" else ""
+    print(f"{len(data['hits'])} of {data.get('total_hits', len(data['hits']))} results in {data['elapsed'] * 1000:.0f} ms{source}")
+
+def cmd_download(args):
+    downloaded, errors = core.download_mods(args.project_ids, args.loader, args.version, args.profile,
+                                            progress=print_progress)
+    end_progress()
+    for name in downloaded:
+        print(f"Downloaded {name}")
+    for error in errors:
+        print(f"Failed: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+def cmd_update(args):
+    result = core.check_updates(args.profile, args.loader, args.version, progress=print_progress)
+    end_progress()
+    for update in result["updates"]:
+        print(f"{update['path']}: {update['current']['version_number']} -> {update['latest']['version_number']}")
+    print(f"{len(result['updates'])} updates, {len(result['up_to_date'])} up to date, {len(result['unknown'])} unknown")
+    if args.check or not result["updates"]:
+        return 0
+    updated, errors = core.update_mods(args.profile, result["updates"], progress=print_progress)
+    end_progress()
+    print(f"Updated {len(updated)} mods")
+    for error in errors:
+        print(f"Failed: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+def cmd_catalog(args):
+    import catalog
+
+    if args.action == "sync":
+        changed = core.sync_catalog(args.types, progress=print_progress)
+        end_progress()
+        for project_type, count in changed.items():
+            print(f"{project_type}: {count} projects added or updated")
+    for project_type in args.types or catalog.PROJECT_TYPES:
+        status = catalog.sync_status(project_type)
+        if status["resume_offset"]:
+            state = f"interrupted at {status['resume_offset']}, will resume"
+        elif status["synced_at"]:
+            state = "synced " + time.strftime("%Y-%m-%d %H:%M", time.localtime(status["synced_at"]))
+            if not catalog.is_fresh(project_type):
+                state += ", too old to search until synced again"
+        else:
+            state = "never synced"
+        print(f"{project_type}: {status['projects']} projects, {state}")
+
+def cmd_pack_install(args):
+    if args.pack.endswith(".mrpack") or "/" in args.pack or "\\" in args.pack:
+        summary = core.install_modpack(args.pack, args.profile, progress=print_progress)
+    else:
+        summary = core.install_modpack_project(args.pack, args.profile, args.version, progress=print_progress)
+    end_progress()
+    print(f"Installed {summary['name']} {summary['version'] or ''}: {summary['downloaded']} downloaded, "
+          f"{summary['extracted']} from overrides")
+    print("Requires " + ", ".join(f"{key} {value}" for key, value in summary["dependencies"].items()))
+    for error in summary["errors"]:
+        print(f"Failed: {error}", file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+def cmd_pack_export(args):
+    result = core.export_modpack(args.profile, args.output, args.version, args.loader, args.loader_version,
+                                 progress=print_progress)
+    end_progress()
+    print(f"Wrote {args.output}: {result['downloads']} files linked to Modrinth, {result['overrides']} packed as overrides")
+
+def cmd_loadout(args):
+    import loadouts
+    from sync import format_sync_stats
+
+    if args.action == "list":
+        for name, profiles in sorted(loadouts.load_loadouts().items()):
+            print(f"{name}: {loadouts.describe(profiles)}")
+    elif args.action == "save":
+        loadouts.save_loadout(args.name, {kind: getattr(args, kind) for kind in KINDS})
+        print(f"Saved loadout '{args.name}': {loadouts.describe(loadouts.get_loadout(args.name))}")
+    elif args.action == "delete":
+        loadouts.delete_loadout(args.name)
+        print(f"Deleted loadout '{args.name}'")
+    else:
+        warn_about_packs(loadouts.get_loadout(args.name))
+        results = core.apply_loadout(args.name, progress=print_progress, snapshot=not args.no_snapshot,
+                                     target=args.target)
+        end_progress()
+        print(f"Applied loadout '{args.name}'" + (f" to {args.target}" if args.target else ""))
+        for kind, stats in results.items():
+            print(f"  {kind}: {format_sync_stats(stats)}")
+
+def cmd_snapshot(args):
+    import snapshots
+
+    if args.action == "list":
+        for snapshot in snapshots.list_snapshots(args.kind):
+            print(snapshots.describe(snapshot) + ("  [auto]" if snapshot.get("auto") else ""))
+    elif args.action == "take":
+        snapshot = core.take_snapshot(args.kind, args.profile, label=args.label, progress=print_progress,
+                                      target=args.target)
+        end_progress()
+        print(f"Took snapshot {snapshots.describe(snapshot)}")
+    elif args.action == "restore":
+        result = core.restore_snapshot(args.id, profile=args.profile, paths=args.paths or None, progress=print_progress)
+        end_progress()
+        print(f"Restored {args.id} into {args.profile or 'the game folder'}: {result['restored']} restored, "
+              f"{result['removed']} removed, {result['unchanged']} unchanged")
+        for error in result["errors"]:
+            print(error, file=sys.stderr)
+        return 1 if result["errors"] else 0
+    elif args.action == "export":
+        from sync import format_size
+
+        result = core.export_snapshots(args.ids, args.output, progress=print_progress)
+        end_progress()
+        print(f"Wrote {args.output}: {result['snapshots']} snapshots, {result['blobs']} unique files "
+              f"({format_size(result['bytes'])} before compression)")
+    elif args.action == "import":
+        imported = core.import_snapshots(args.archive, progress=print_progress)
+        end_progress()
+        print(f"Imported {len(imported)} snapshots: {', '.join(imported)}")
+    else:
+        snapshots.delete(args.id)
+        print(f"Deleted snapshot {args.id}; the next storage deduplication frees its files")
+
+def cmd_target(args):
+    import targets
+
+    if args.action == "list":
+        for name in targets.list_targets():
+            print(targets.describe(name))
+    elif args.action == "add":
+        folder = targets.add_target(args.name, args.path)
+        print(f"Added target '{args.name}': {folder}")
+    else:
+        targets.remove_target(args.name)
+        print(f"Removed target '{args.name}'; its folder was left as it is")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="scmm", description="ScrubCraft Modding Manager")
+    parser.add_argument("--timings", action="store_true", help="print startup and command timings to stderr")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record timing spans and write them to FILE (Chrome trace if it ends in .json, else JSON lines)")
+    parser.add_argument("--slowest", type=int, metavar="N", help="print the N slowest spans of the command to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("list", help="list profiles")
+    p.add_argument("kind", nargs="?", choices=KINDS)
+    p.set_defaults(func=cmd_list)
+
+    p = commands.add_parser("apply", help="apply a profile to the game folder")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("profile")
+    p.add_argument("--in-place", action="store_true", help="sync the game folder directly instead of staging and swapping")
+    p.add_argument("--no-snapshot", action="store_true", help="don't snapshot the game folder before applying")
+    p.add_argument("--target", action="append", metavar="NAME",
+                   help="apply to this target instead of the default game folder; repeat to apply to several at once")
+    p.set_defaults(func=cmd_apply)
+
+    p = commands.add_parser("diff", help="show how applying a profile would change the game folder")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("profile")
+    p.add_argument("--target", action="append", metavar="NAME", help="compare with this target instead; repeatable")
+    p.set_defaults(func=cmd_diff)
+
+    p = commands.add_parser("packs", help="check the shaderpacks or resource packs in a profile without extracting them")
+    p.add_argument("kind", choices=("shaders", "resources"))
+    p.add_argument("profile", nargs="?", help="profile to check (default: the game folder)")
+    p.add_argument("--version", help="Minecraft version to check pack formats against (default: the launcher's last played)")
+    p.set_defaults(func=cmd_packs)
+
+    p = commands.add_parser("rollback", help="swap the previous contents of a game folder back in")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("--target", metavar="NAME", help="roll back this target instead of the default game folder")
+    p.set_defaults(func=cmd_rollback)
+
+    p = commands.add_parser("loadout", help="save, list or apply loadouts (a mod, shader and resource profile applied together)")
+    p.add_argument("action", choices=("list", "save", "apply", "delete"))
+    p.add_argument("name", nargs="?")
+    for kind in KINDS:
+        p.add_argument(f"--{kind}", metavar="PROFILE", help=f"{kind} profile (for save)")
+    p.add_argument("--no-snapshot", action="store_true", help="don't snapshot the game folders before applying")
+    p.add_argument("--target", metavar="NAME", help="apply to this target instead of the default game folder (for apply)")
+    p.set_defaults(func=cmd_loadout)
+
+    p = commands.add_parser("target", help="list, add or remove targets (instance, launcher or server game directories)")
+    p.add_argument("action", choices=("list", "add", "remove"))
+    p.add_argument("name", nargs="?")
+    p.add_argument("path", nargs="?", help="game directory or MultiMC/Prism instance folder (for add)")
+    p.set_defaults(func=cmd_target)
+
+    p = commands.add_parser("snapshot", help="take, restore, export or import snapshots of profiles and game folders")
+    actions = p.add_subparsers(dest="action", required=True)
+    a = actions.add_parser("list", help="list snapshots, newest first")
+    a.add_argument("kind", nargs="?", choices=KINDS)
+    a = actions.add_parser("take", help="snapshot a profile, or the game folder")
+    a.add_argument("kind", choices=KINDS)
+    a.add_argument("profile", nargs="?", help="profile to snapshot (default: the game folder)")
+    a.add_argument("--label")
+    a.add_argument("--target", metavar="NAME", help="snapshot this target's game folder instead of the default one")
+    a = actions.add_parser("restore", help="restore a snapshot, or just some of its files")
+    a.add_argument("id")
+    a.add_argument("paths", nargs="*", help="files to restore, as listed in the snapshot (default: all, removing others)")
+    a.add_argument("--profile", help="restore into this profile instead of the game folder")
+    a = actions.add_parser("export", help="write snapshots to one compressed archive, each unique file stored once")
+    a.add_argument("ids", nargs="+")
+    a.add_argument("--output", required=True)
+    a = actions.add_parser("import", help="add the snapshots from an exported archive")
+    a.add_argument("archive")
+    a = actions.add_parser("delete", help="delete a snapshot")
+    a.add_argument("id")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = commands.add_parser("import", help="import files, folders or zip archives into a profile")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("profile")
+    p.add_argument("files", nargs="+")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser("search", help="search Modrinth")
+    p.add_argument("query")
+    p.add_argument("--loader")
+    p.add_argument("--version", help="Minecraft version")
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_search)
+
+    p = commands.add_parser("catalog", help="sync or inspect the offline Modrinth catalog used by search")
+    p.add_argument("action", choices=("sync", "status"))
+    p.add_argument("types", nargs="*", help="project types (default: mod, modpack, shader, resourcepack)")
+    p.set_defaults(func=cmd_catalog)
+
+    p = commands.add_parser("download", help="download Modrinth projects into a mod profile")
+    p.add_argument("profile")
+    p.add_argument("project_ids", nargs="+")
+    p.add_argument("--loader", required=True)
+    p.add_argument("--version", required=True, help="Minecraft version")
+    p.set_defaults(func=cmd_download)
+
+    p = commands.add_parser("update", help="update the mods in a mod profile")
+    p.add_argument("profile")
+    p.add_argument("--loader", required=True)
+    p.add_argument("--version", required=True, help="Minecraft version")
+    p.add_argument("--check", action="store_true", help="only list available updates")
+    p.set_defaults(func=cmd_update)
+
+    p = commands.add_parser("pack-install", help="install a .mrpack file or Modrinth modpack as new profiles")
+    p.add_argument("pack", help="path to a .mrpack file, or a Modrinth modpack project id")
+    p.add_argument("profile")
+    p.add_argument("--version", help="Minecraft version (when installing from Modrinth)")
+    p.set_defaults(func=cmd_pack_install)
+
+    p = commands.add_parser("pack-export", help="export the profiles called PROFILE as a .mrpack")
+    p.add_argument("profile")
+    p.add_argument("output")
+    p.add_argument("--version", required=True, help="Minecraft version")
+    p.add_argument("--loader")
+    p.add_argument("--loader-version")
+    p.set_defaults(func=cmd_pack_export)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "loadout" and args.action != "list" and not args.name:
+        parser.error(f"loadout {args.action} needs a loadout name")
+    if args.command == "target" and args.action != "list" and not args.name:
+        parser.error(f"target {args.action} needs a target name")
+    if args.command == "target" and args.action == "add" and not args.path:
+        parser.error("target add needs the game directory")
+    if args.trace or args.slowest:
+        tracing.enable()
+    startup = time.perf_counter() - _started
+    command_start = time.perf_counter()
+    try:
+        status = args.func(args) or 0
+    except Exception as e:
+        end_progress()
+        print(f"Error: {e}", file=sys.stderr)
+        status = 1
+    if args.timings:
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        print(f"startup {startup * 1000:.1f} ms, {args.command} {(time.perf_counter() - command_start) * 1000:.1f} ms, "
+              f"heavy modules loaded: {', '.join(loaded) or 'none'}", file=sys.stderr)
+    if args.slowest:
+        print(tracing.format_slowest(args.slowest), file=sys.stderr)
+    if args.trace:
+        tracing.export(args.trace)
+        print(f"Trace written to {args.trace}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
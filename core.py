@@ -0,0 +1,547 @@
+import os
+import platform
+import shutil
+
+import tracing
+
+# GUI-free profile, apply, import and Modrinth operations shared by the Tk app and the CLI.
+# Anything heavy (requests, packaging, sqlite, zipfile) is imported inside the function that
+# needs it, so importing this module is nearly free.
+
+PROFILE_FOLDER = "profiles"
+SHADERPACK_PROFILE_FOLDER = "shaderpack_profiles"
+RESOURCEPACK_PROFILE_FOLDER = "resourcepack_profiles"
+
+MAX_CONCURRENT_DOWNLOADS = 4
+# Game directories a batch apply writes to at once
+MAX_CONCURRENT_TARGETS = 8
+
+# kind -> (folder holding its profiles, subfolder of the Minecraft folder it applies to)
+PROFILE_KINDS = {
+    "mods": (PROFILE_FOLDER, "mods"),
+    "shaders": (SHADERPACK_PROFILE_FOLDER, "shaderpacks"),
+    "resources": (RESOURCEPACK_PROFILE_FOLDER, "resourcepacks"),
+}
+
+
+# --- Paths ---
+
+def get_minecraft_folder():
+    override = os.getenv("SCMM_MINECRAFT_DIR")
+    if override:
+        return override
+    system = platform.system()
+    if system == "Windows":
+        appdata = os.getenv("APPDATA")
+        return os.path.join(appdata, ".minecraft")
+    elif system == "Darwin":
+        home = os.path.expanduser("~")
+        return os.path.join(home, "Library", "Application Support", "minecraft")
+    elif system == "Linux":
+        home = os.path.expanduser("~")
+        return os.path.join(home, ".minecraft")
+    else:
+        raise Exception("Unsupported OS")
+
+_minecraft_folder = None
+
+def minecraft_folder():
+    global _minecraft_folder
+    if _minecraft_folder is None:
+        _minecraft_folder = get_minecraft_folder()
+    return _minecraft_folder
+
+def game_folder(kind, target=None):
+    """The folder `kind` applies to, in the default Minecraft folder or a named target."""
+    if target is None:
+        return os.path.join(minecraft_folder(), PROFILE_KINDS[kind][1])
+    import targets
+    return os.path.join(targets.target_folder(target), PROFILE_KINDS[kind][1])
+
+def profile_path(kind, name):
+    return os.path.join(PROFILE_KINDS[kind][0], name)
+
+
+# --- Profiles ---
+
+def get_profiles_in(folder):
+    if not os.path.exists(folder):
+        return []
+    return [name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name))]
+
+def list_profiles(kind):
+    import inventory
+    if inventory.is_running():
+        return inventory.list_profiles(kind)
+    return get_profiles_in(PROFILE_KINDS[kind][0])
+
+def create_profile(kind, name):
+    path = profile_path(kind, name)
+    os.makedirs(path, exist_ok=True)
+    _changed(kind, name)
+    return path
+
+def _changed(kind, name=None, live=False):
+    """Tell the profile inventory about our own writes, so it needn't wait for a rescan."""
+    import inventory
+    inventory.invalidate(kind, name, live=live)
+
+def import_files(kind, name, paths, progress=None):
+    """Import files, folders and archives into a profile; see importer.import_paths."""
+    import importer
+    try:
+        return importer.import_paths(kind, name, paths, progress=progress)
+    finally:
+        _changed(kind, name)
+
+def _snapshot_before_apply(kind, label, target=None):
+    """Record the game folder before it is replaced, so any apply can be undone later on.
+
+    Files the blob store already holds (everything that came from a profile) cost nothing,
+    and an unchanged folder is not recorded twice.
+    """
+    import snapshots
+
+    folder = game_folder(kind, target)
+    if os.path.isdir(folder) and os.listdir(folder):
+        with tracing.span("snapshot.before_apply", kind=kind, target=target):
+            snapshots.take(folder, kind, label + (f" on {target}" if target else ""), auto=True, target=target)
+
+def _target_key(target):
+    # The default target is stored and passed around as None
+    import targets
+    return None if target == targets.DEFAULT_TARGET else target
+
+def _apply_to(kind, name, target, staged, progress, src_files):
+    source = profile_path(kind, name)
+    dest = game_folder(kind, target)
+    try:
+        if staged:
+            from staging import staged_apply
+            return staged_apply(source, dest, progress=progress, src_files=src_files)
+        from staging import forget_previous
+        from sync import sync_folder
+        # Rolling back after this would throw away what is about to be synced, not undo it
+        forget_previous(dest)
+        return sync_folder(source, dest, progress=progress, src_files=src_files)
+    finally:
+        if target is None:
+            _changed(kind, live=True)
+
+def _update_mod_index(kind, target, progress):
+    if kind == "mods":
+        import mod_index
+        from sync import load_manifest
+
+        folder = game_folder(kind, target)
+        # The apply just left an up-to-date manifest, so jars applied before needn't be rehashed
+        hashes = {rel_path: entry["hash"] for rel_path, entry in load_manifest(folder).items() if os.sep not in rel_path}
+        with tracing.span("mod_index.update", folder=folder):
+            mod_index.update_folder(folder, progress=progress, hashes=hashes)
+
+def apply_profile(kind, name, staged=True, progress=None, snapshot=True, target=None):
+    """Make the game folder for `kind` (in `target`, or the default Minecraft folder) match
+    the profile. Returns the sync stats."""
+    source = profile_path(kind, name)
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"Profile folder does not exist: {source}")
+    import inventory
+
+    target = _target_key(target)
+    # Up-to-date cached file list of the profile, when notifications vouch for it
+    src_files = inventory.fresh_profile_files(kind, name)
+    with tracing.operation("apply", kind=kind, profile=name, staged=staged, target=target):
+        if snapshot:
+            _snapshot_before_apply(kind, f"Before applying {name}", target)
+        stats = _apply_to(kind, name, target, staged, progress, src_files)
+        _update_mod_index(kind, target, progress)
+    return stats
+
+def apply_to_targets(kind, name, target_names, staged=True, progress=None, snapshot=True):
+    """Apply one profile to several targets at once. Returns {"applied": {target: sync stats},
+    "errors": {target: message}}.
+
+    The profile is scanned once and every target only works out and writes its own
+    differences, MAX_CONCURRENT_TARGETS at a time. Files are reflinked where the filesystem
+    allows, else copied. Each target succeeds or fails on its own.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    import inventory
+    import targets
+    from staging import _part_progress
+    from sync import refresh_manifest
+
+    source = profile_path(kind, name)
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"Profile folder does not exist: {source}")
+    # Unknown names fail here, before anything is written; two names for one folder would
+    # race on the same staging folder, so each folder is applied once
+    by_folder = {}
+    for target in (_target_key(t) for t in target_names):
+        by_folder.setdefault(os.path.realpath(game_folder(kind, target)), target)
+    keys = list(by_folder.values())
+
+    result = {"applied": {}, "errors": {}}
+    with tracing.operation("apply_targets", kind=kind, profile=name, targets=len(keys)):
+        src_files = inventory.fresh_profile_files(kind, name)
+        if src_files is None:
+            with tracing.span("apply.scan_source", folder=source):
+                src_files = refresh_manifest(source)
+        if snapshot:
+            # One after another: they are cheap and share the snapshot list
+            for target in keys:
+                _snapshot_before_apply(kind, f"Before applying {name}", target)
+
+        # Never set: one target failing doesn't stop the others
+        part_progress = _part_progress(progress, len(keys), threading.Event())
+        applied = {}
+
+        def run(i, target):
+            try:
+                applied[target] = _apply_to(kind, name, target, staged, part_progress(i), src_files)
+            except Exception as e:
+                result["errors"][target or targets.DEFAULT_TARGET] = str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(keys), MAX_CONCURRENT_TARGETS))) as pool:
+            list(pool.map(lambda args: run(*args), enumerate(keys)))
+        for target in keys:
+            if target in applied:
+                _update_mod_index(kind, target, None)
+                result["applied"][target or targets.DEFAULT_TARGET] = applied[target]
+    return result
+
+def diff_targets(kind, name, target_names):
+    """{target: inventory-style diff} of what applying the profile would change in each target."""
+    import inventory
+    return {target: inventory.diff(kind, name, _target_key(target)) for target in target_names}
+
+def apply_profiles(profiles, progress=None, snapshot=True, target=None):
+    """Apply one profile per kind ({kind: name}) as a single all-or-nothing change.
+
+    The game folders are staged concurrently and only swapped in once all of them are
+    ready; see staging.staged_apply_many. Returns {kind: sync stats}.
+    """
+    import inventory
+    from staging import staged_apply_many
+
+    kinds = [kind for kind in PROFILE_KINDS if kind in profiles]
+    for kind in kinds:
+        source = profile_path(kind, profiles[kind])
+        if not os.path.isdir(source):
+            raise FileNotFoundError(f"Profile folder does not exist: {source}")
+    target = _target_key(target)
+    with tracing.operation("apply_profiles", kinds=",".join(kinds), target=target):
+        if snapshot:
+            for kind in kinds:
+                _snapshot_before_apply(kind, f"Before applying {profiles[kind]}", target)
+        try:
+            stats = staged_apply_many([(profile_path(kind, profiles[kind]), game_folder(kind, target)) for kind in kinds],
+                                      progress=progress,
+                                      src_files=[inventory.fresh_profile_files(kind, profiles[kind]) for kind in kinds])
+        finally:
+            if target is None:
+                for kind in kinds:
+                    _changed(kind, live=True)
+        if "mods" in profiles:
+            _update_mod_index("mods", target, progress)
+    return dict(zip(kinds, stats))
+
+def apply_loadout(name, progress=None, snapshot=True, target=None):
+    import loadouts
+    return apply_profiles(loadouts.get_loadout(name), progress=progress, snapshot=snapshot, target=target)
+
+def inspect_packs(kind, name=None):
+    """Inspect the shaderpacks or resource packs of a profile (or, without a name, of the
+    game folder) without extracting them. Returns pack_index.inspect_folder's list."""
+    import inventory
+    import pack_index
+
+    if kind not in pack_index.PACK_KINDS:
+        raise ValueError(f"Only {' and '.join(pack_index.PACK_KINDS)} profiles hold packs")
+    if name is None:
+        folder, files = game_folder(kind), inventory.live_files(kind)
+    else:
+        folder = profile_path(kind, name)
+        if not os.path.isdir(folder):
+            raise FileNotFoundError(f"Profile folder does not exist: {folder}")
+        files = inventory.profile_files(kind, name)
+    with tracing.operation("inspect_packs", kind=kind, profile=name or "game folder"):
+        return pack_index.inspect_folder(kind, folder, files)
+
+def rollback_apply(kind, target=None):
+    from staging import rollback
+    target = _target_key(target)
+    try:
+        rollback(game_folder(kind, target))
+    finally:
+        if target is None:
+            _changed(kind, live=True)
+
+# --- Snapshots ---
+
+def take_snapshot(kind, name=None, label=None, progress=None, target=None):
+    """Snapshot a profile or, without a name, the game folder for `kind` (in `target`)."""
+    import snapshots
+
+    target = None if name is not None else _target_key(target)
+    folder = game_folder(kind, target) if name is None else profile_path(kind, name)
+    if not os.path.isdir(folder):
+        raise FileNotFoundError(f"Folder does not exist: {folder}")
+    default_label = f"Profile {name}" if name else "Game folder" + (f" of {target}" if target else "")
+    with tracing.operation("snapshot", kind=kind, profile=name or "game folder"):
+        return snapshots.take(folder, kind, label or default_label, progress=progress, target=target)
+
+def restore_snapshot(snapshot_id, profile=None, paths=None, progress=None):
+    """Restore a snapshot into the game folder it was taken from or into a (possibly new) profile.
+
+    `paths` restores just those files and leaves the rest alone. A restore into a game
+    folder snapshots it first, so the restore itself can be undone.
+    """
+    import snapshots
+
+    snapshot = snapshots.load(snapshot_id)
+    kind, target = snapshot["kind"], snapshot.get("target")
+    dest = game_folder(kind, target) if profile is None else profile_path(kind, profile)
+    with tracing.operation("restore_snapshot", snapshot=snapshot_id, profile=profile or "game folder"):
+        if profile is None:
+            _snapshot_before_apply(kind, f"Before restoring {snapshot_id}", target)
+        try:
+            return snapshots.restore(snapshot_id, dest, paths=paths, progress=progress, link=profile is not None)
+        finally:
+            _changed(kind, profile, live=profile is None and target is None)
+
+def export_snapshots(snapshot_ids, out_path, progress=None):
+    import snapshots
+    with tracing.operation("export_snapshots", snapshots=len(snapshot_ids)):
+        return snapshots.export(snapshot_ids, out_path, progress=progress)
+
+def import_snapshots(path, progress=None):
+    import snapshots
+    with tracing.operation("import_snapshots", path=path):
+        return snapshots.import_archive(path, progress=progress)
+
+def dedupe_profiles(progress=None):
+    from blobstore import collect_garbage, dedupe_folder
+
+    folders = [profile_path(kind, name) for kind in PROFILE_KINDS for name in list_profiles(kind)]
+    freed = 0
+    with tracing.operation("dedupe", folders=len(folders)):
+        for i, folder in enumerate(folders):
+            if progress:
+                progress(i, len(folders), folder)
+            with tracing.span("blob.dedupe_folder", folder=folder):
+                freed += dedupe_folder(folder)
+        with tracing.span("blob.collect_garbage"):
+            freed += collect_garbage()
+    return freed
+
+def profile_info(name, progress=None):
+    """Mods in a mod profile, plus duplicate ids and missing required dependencies."""
+    import mod_index
+
+    path = profile_path("mods", name)
+    mod_index.update_folder(path, progress=progress)
+    return mod_index.list_mods(path), mod_index.find_duplicates(path), mod_index.find_missing_dependencies(path)
+
+
+# --- Legacy folder helpers ---
+
+def clear_folder(folder_path):
+    with tracing.span("fs.clear_folder", folder=folder_path):
+        _clear_folder(folder_path)
+
+def _clear_folder(folder_path):
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+    else:
+        for item in os.listdir(folder_path):
+            item_path = os.path.join(folder_path, item)
+            try:
+                if os.path.isfile(item_path) or os.path.islink(item_path):
+                    os.remove(item_path)
+                elif os.path.isdir(item_path):
+                    shutil.rmtree(item_path)
+            except Exception as e:
+                print(f"Failed to delete {item_path}: {e}")
+
+def copy_profile_files(src_folder, dst_folder):
+    from fileops import clone_or_copy
+
+    os.makedirs(dst_folder, exist_ok=True)
+    for item in os.listdir(src_folder):
+        source_path = os.path.join(src_folder, item)
+        dest_path = os.path.join(dst_folder, item)
+        try:
+            if os.path.isfile(source_path):
+                if os.path.lexists(dest_path):
+                    os.remove(dest_path)
+                clone_or_copy(source_path, dest_path)
+            elif os.path.isdir(source_path):
+                if os.path.exists(dest_path):
+                    with tracing.span("fs.rmtree", path=dest_path):
+                        shutil.rmtree(dest_path)
+                with tracing.span("fs.copytree", path=source_path):
+                    shutil.copytree(source_path, dest_path, copy_function=clone_or_copy)
+        except Exception as e:
+            print(f"Failed to copy {source_path} to {dest_path}: {e}")
+
+
+# --- Modrinth ---
+
+def search_mods(query, loader=None, game_version=None, limit=20, offset=0, project_type="mod", source=None):
+    """Search the offline catalog if it was synced recently, else (or if it has nothing) Modrinth.
+
+    Live results are written through to the catalog. When Modrinth can't be reached any
+    synced catalog's answer is returned, even if stale or empty; with no catalog the error
+    propagates. The result's "source" ("catalog" or "modrinth") should be passed back as
+    source= when fetching later pages, so one query's pages all come from the same place.
+    """
+    import catalog
+    import modrinth
+
+    with tracing.operation("search", query=query, loader=loader, game_version=game_version, offset=offset,
+                           source=source):
+        if source == "catalog":
+            return catalog.search(query, loader, game_version, limit=limit, offset=offset, project_type=project_type)
+        local = None
+        if source is None and catalog.is_synced(project_type):
+            local = catalog.search(query, loader, game_version, limit=limit, offset=offset, project_type=project_type)
+            if local["hits"] and catalog.is_fresh(project_type):
+                return local
+        try:
+            data = modrinth.search_projects(query, loader, game_version, limit=limit, offset=offset,
+                                            project_type=project_type)
+        except OSError:
+            if local is None:
+                raise
+            return local
+        data["source"] = "modrinth"
+        catalog.add_projects(data["hits"])
+        return data
+
+def release_game_versions():
+    """Minecraft release versions (no snapshots), newest first."""
+    import modrinth
+    from packaging.version import parse as parse_version
+
+    all_versions = modrinth.get_game_versions()
+    version_options = [
+        v["version"] for v in all_versions if v.get("version_type") == "release"
+    ]
+    return sorted(version_options, key=parse_version, reverse=True)
+
+def download_mods(mod_ids, loader, game_version, name, progress=None, with_dependencies=True):
+    """Download the best matching version of each project into a mod profile, together with
+    every required dependency the profile doesn't have yet, all in one parallel batch.
+
+    Returns (downloaded file names, error strings); conflicts and unresolvable
+    dependencies are reported as errors.
+    """
+    with tracing.operation("download_mods", projects=len(mod_ids)):
+        return _download_mods(mod_ids, loader, game_version, name, progress, with_dependencies)
+
+def _download_mods(mod_ids, loader, game_version, name, progress, with_dependencies):
+    import mod_index
+    import resolver
+    from blobstore import ingest_file
+    from downloads import DownloadManager
+
+    dest_folder = create_profile("mods", name)
+    if with_dependencies:
+        plan = resolver.resolve(mod_ids, loader, game_version, dest_folder, progress=progress)
+    else:
+        plan = resolver.resolve_without_dependencies(mod_ids, loader, game_version)
+    errors = plan["conflicts"] + plan["missing"]
+    jobs = [(item["file"]["url"], os.path.join(dest_folder, item["file"]["filename"]), item["file"].get("hashes"))
+            for item in plan["downloads"]]
+
+    downloaded = []
+    with tracing.span("download.all", files=len(jobs)):
+        results = DownloadManager(MAX_CONCURRENT_DOWNLOADS).download_all(jobs, progress=progress)
+    for file_path, error in results:
+        if error:
+            errors.append(f"{os.path.basename(file_path)}: {error}")
+        else:
+            ingest_file(file_path)
+            downloaded.append(os.path.basename(file_path))
+    mod_index.update_folder(dest_folder)
+    _changed("mods", name)
+    return downloaded, errors
+
+def check_updates(name, loader, game_version, progress=None):
+    from updates import check_profile_updates
+    with tracing.operation("check_updates", profile=name):
+        return check_profile_updates(profile_path("mods", name), loader, game_version, progress=progress)
+
+def update_mods(name, updates, progress=None):
+    import mod_index
+    from updates import apply_updates
+
+    path = profile_path("mods", name)
+    with tracing.operation("update_mods", profile=name, updates=len(updates)):
+        result = apply_updates(path, updates, MAX_CONCURRENT_DOWNLOADS, progress=progress)
+        mod_index.update_folder(path)
+    _changed("mods", name)
+    return result
+
+
+
+# --- Modpacks ---
+
+def search_modpacks(query, game_version=None, limit=20, offset=0):
+    return search_mods(query, None, game_version, limit=limit, offset=offset, project_type="modpack")
+
+def install_modpack(pack_path, name, progress=None):
+    """Install a .mrpack file as profiles called `name`. Returns modpack.install_mrpack's summary."""
+    import modpack
+    try:
+        return modpack.install_mrpack(pack_path, name, progress=progress)
+    finally:
+        for kind in PROFILE_KINDS:
+            _changed(kind, name)
+
+def install_modpack_project(project_id, name, game_version=None, progress=None):
+    """Download the newest version of a Modrinth modpack (for game_version, if given) and install it."""
+    import modpack
+    import modrinth
+
+    versions = modrinth.get_project_versions(project_id, game_version=game_version)
+    if not versions:
+        raise modpack.ModpackError(f"{project_id} has no versions for Minecraft '{game_version}'")
+    pack_path = modpack.download_mrpack(versions[0], progress=progress)
+    return install_modpack(pack_path, name, progress=progress)
+
+def export_modpack(name, out_path, game_version, loader=None, loader_version=None, progress=None):
+    import modpack
+    return modpack.export_mrpack(out_path, name, game_version, loader, loader_version, progress=progress)
+
+def sync_catalog(project_types=None, progress=None):
+    """Bring the offline catalog up to date (resuming an interrupted sync). Returns {type: changed}."""
+    import catalog
+    return catalog.sync_all(project_types or catalog.PROJECT_TYPES, progress=progress)
+
+def search_modrinth_mods(query):
+    return search_mods(query, limit=5)["hits"]  # list of mod projects
+
+def download_modrinth_mod_file(mod_id, profile_folder):
+    import modrinth
+    from blobstore import ingest_file
+    from downloads import download_file
+
+    # Get versions
+    versions = modrinth.get_project_versions(mod_id)
+
+    # Pick latest stable version (simple example: just take first)
+    latest_version = versions[0]
+    files = latest_version.get("files", [])
+    if not files:
+        raise Exception("No files found for this version")
+    # Download the first file
+    file_url = files[0]["url"]
+    file_name = files[0]["filename"]
+
+    file_path = download_file(file_url, os.path.join(profile_folder, file_name), files[0].get("hashes"))
+    ingest_file(file_path)
+
+    return file_path
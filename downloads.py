@@ -0,0 +1,154 @@
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import tracing
+from http_client import get_client
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DEFAULT_MAX_CONCURRENT = 4
+# Unfinished downloads wait here, not beside their destination: profile folders are
+# applied to the game as they are, and a stray .part would go along
+PART_FOLDER = os.path.join("cache", "downloads")
+
+# Modrinth lists both for every file; whichever are given get checked
+SUPPORTED_HASHES = ("sha512", "sha1")
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _verify_hashes(hashers, expected):
+    for name, hasher in hashers.items():
+        if hasher.hexdigest() != expected[name].lower():
+            raise DownloadError(f"{name} mismatch (expected {expected[name]}, got {hasher.hexdigest()})")
+
+def _part_path(dest_path):
+    key = hashlib.sha1(os.path.abspath(dest_path).encode("utf-8")).hexdigest()
+    return os.path.join(PART_FOLDER, f"{key}.part")
+
+def download_file(url, dest_path, hashes=None, progress=None, session=None):
+    """Stream url to dest_path through a .part file in PART_FOLDER, resuming it with a Range
+    request if one is left from an earlier attempt at the same dest_path. The file is only renamed into place once its sha1/sha512
+    (from Modrinth's `hashes` dict) match. `progress(done, total, message)` may raise to cancel.
+    """
+    with tracing.span("download", url=url, path=dest_path) as s:
+        _download(url, dest_path, hashes, progress, session, s)
+    return dest_path
+
+def _download(url, dest_path, hashes, progress, session, s):
+    http = session or get_client()
+    expected = {name: value for name, value in (hashes or {}).items() if name in SUPPORTED_HASHES}
+    hashers = {name: hashlib.new(name) for name in expected}
+    part_path = _part_path(dest_path)
+    os.makedirs(PART_FOLDER, exist_ok=True)
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+
+    headers = {}
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    with http.get(url, headers=headers, stream=True, timeout=30) as response:
+        if response.status_code == 416:
+            # The .part file is already complete (or bogus); start over
+            os.remove(part_path)
+            return _download(url, dest_path, hashes, progress, session, s)
+        response.raise_for_status()
+        if offset and response.status_code != 206:
+            # Server ignored the Range header, so the body is the whole file
+            offset = 0
+        mode = "ab" if offset else "wb"
+        if offset:
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+        total = response.headers.get("Content-Length")
+        total = int(total) + offset if total is not None else None
+        done = offset
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done, total, os.path.basename(dest_path))
+        s.set(resumed_from=offset)
+        s.add("bytes_downloaded", done - offset)
+
+    try:
+        _verify_hashes(hashers, expected)
+    except DownloadError:
+        os.remove(part_path)
+        raise
+    try:
+        os.replace(part_path, dest_path)
+    except OSError:
+        # The profile is on another filesystem than the cache
+        shutil.move(part_path, dest_path)
+
+
+class DownloadManager:
+    """Runs several download_file calls at once, at most max_concurrent at a time."""
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, session=None):
+        self.max_concurrent = max_concurrent
+        self.session = session
+
+    def download_all(self, jobs, progress=None):
+        """Download (url, dest_path, hashes) jobs concurrently.
+
+        Returns a list of (dest_path, error) pairs where error is None on success.
+        `progress(done, total, message)` gets overall byte progress and may raise to cancel.
+        """
+        jobs = list(jobs)
+        lock = threading.Lock()
+        per_job = {}
+        totals = {}
+        cancelled = threading.Event()
+        cancel_errors = []
+
+        def report(index, done, total, message):
+            if cancelled.is_set():
+                raise DownloadError("cancelled")
+            with lock:
+                per_job[index] = done
+                if total is not None:
+                    totals[index] = total
+                overall_total = sum(totals.values()) if len(totals) == len(jobs) else None
+                overall_done = sum(per_job.values())
+            if progress:
+                try:
+                    progress(overall_done, overall_total, message)
+                except Exception as e:
+                    cancelled.set()
+                    cancel_errors.append(e)
+                    raise
+
+        def run(index, url, dest_path, hashes):
+            if cancelled.is_set():
+                raise DownloadError("cancelled")
+            return download_file(url, dest_path, hashes,
+                                 lambda done, total, message: report(index, done, total, message),
+                                 self.session)
+
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrent)) as pool:
+            futures = {pool.submit(run, i, url, dest, hashes): dest
+                       for i, (url, dest, hashes) in enumerate(jobs)}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    results.append((futures[future], None))
+                except Exception as e:
+                    results.append((futures[future], e))
+        if cancel_errors:
+            # Re-raise whatever the progress callback raised (e.g. a task cancellation);
+            # the .part files stay behind so the next attempt resumes
+            raise cancel_errors[0]
+        return results
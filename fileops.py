@@ -0,0 +1,92 @@
+import errno
+import hashlib
+import os
+import shutil
+import sys
+
+import tracing
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+FICLONE = 0x40049409  # Linux ioctl used by btrfs/xfs/bcachefs for copy-on-write clones
+
+# (source st_dev, destination st_dev) pairs that can't be cloned between, so we don't keep retrying
+_no_reflink_devices = set()
+# What a clone fails with when the filesystems can't do it at all, as opposed to this one file
+REFLINK_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTTY, errno.EINVAL, errno.EXDEV}
+
+
+# --- Linking ---
+
+def _reflink(src, dst):
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                d.close()
+                os.remove(dst)
+                raise
+    elif sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        # Unlike copying, clonefile() won't replace an existing file
+        if os.path.lexists(dst):
+            os.remove(dst)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+    else:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+    shutil.copystat(src, dst)
+
+def _try_reflink(src, dst):
+    devices = (os.stat(src).st_dev, os.stat(os.path.dirname(os.path.abspath(dst))).st_dev)
+    if devices in _no_reflink_devices:
+        return False
+    try:
+        _reflink(src, dst)
+        return True
+    except OSError as e:
+        if e.errno in REFLINK_UNSUPPORTED:
+            _no_reflink_devices.add(devices)
+        return False
+
+def clone_or_copy(src, dst):
+    """Copy src to dst, using a copy-on-write clone when the filesystem supports it."""
+    if _try_reflink(src, dst):
+        return "reflink"
+    shutil.copy2(src, dst)
+    return "copy"
+
+def link_or_copy(src, dst):
+    """Place src at dst as a reflink, else a hardlink, else a plain copy (e.g. across filesystems)."""
+    with tracing.span("fs.link_or_copy", path=dst) as s:
+        method = _link_or_copy(src, dst)
+        s.set(method=method)
+    tracing.count("files_" + method)
+    return method
+
+def _link_or_copy(src, dst):
+    if _try_reflink(src, dst):
+        return "reflink"
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+# --- Hashing ---
+
+def file_hash(path):
+    with tracing.span("fs.hash", path=path) as s:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                h.update(chunk)
+            s.add("bytes_hashed", f.tell())
+    return h.hexdigest()
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+HASH_CACHE_DB = os.path.join("cache", "hashes.sqlite3")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+ALGORITHMS = ("sha1", "sha256", "sha512")
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _db():
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(HASH_CACHE_DB), exist_ok=True)
+        _connection = sqlite3.connect(HASH_CACHE_DB, check_same_thread=False)
+        _connection.execute("""
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                sha1 TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                sha512 TEXT NOT NULL
+            )""")
+        _connection.commit()
+    return _connection
+
+def compute_hashes(path):
+    """sha1, sha256 and sha512 of a file in a single read."""
+    hashers = {name: hashlib.new(name) for name in ALGORITHMS}
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+def get_hashes(path):
+    """Hashes of a file, read from the cache unless its size or mtime changed since."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    with _lock:
+        row = _db().execute(
+            "SELECT size, mtime, sha1, sha256, sha512 FROM file_hashes WHERE path = ?", (path,)
+        ).fetchone()
+    if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+        return dict(zip(ALGORITHMS, row[2:]))
+
+    hashes = compute_hashes(path)
+    with _lock:
+        _db().execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime, sha1, sha256, sha512) VALUES (?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, hashes["sha1"], hashes["sha256"], hashes["sha512"]),
+        )
+        _db().commit()
+    return hashes
+
+def forget(path):
+    with _lock:
+        _db().execute("DELETE FROM file_hashes WHERE path = ?", (os.path.abspath(path),))
+        _db().commit()
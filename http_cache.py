@@ -0,0 +1,130 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+
+import tracing
+from http_client import get_client
+
+CACHE_DB = os.path.join("cache", "http_cache.sqlite3")
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# How long a response may be served without asking the server again, by URL path
+ENDPOINT_TTLS = [
+    (re.compile(r"/tag/"), 24 * 60 * 60),
+    (re.compile(r"/project/[^/]+/version"), 10 * 60),
+    (re.compile(r"/search"), 5 * 60),
+    # Published versions are immutable; project details change rarely
+    (re.compile(r"/versions\?"), 24 * 60 * 60),
+    (re.compile(r"/projects\?"), 60 * 60),
+]
+DEFAULT_TTL = 5 * 60
+
+stats = {"hits": 0, "misses": 0, "revalidated": 0, "evicted": 0}
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _db():
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(CACHE_DB), exist_ok=True)
+        _connection = sqlite3.connect(CACHE_DB, check_same_thread=False)
+        _connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )""")
+        _connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        _connection.commit()
+    return _connection
+
+def ttl_for(url):
+    for pattern, ttl in ENDPOINT_TTLS:
+        if pattern.search(url):
+            return ttl
+    return DEFAULT_TTL
+
+def get_stats():
+    return dict(stats)
+
+def _evict(db):
+    total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total <= MAX_CACHE_BYTES:
+        return
+    for url, size in db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+        db.execute("DELETE FROM responses WHERE url = ?", (url,))
+        stats["evicted"] += 1
+        total -= size
+        if total <= MAX_CACHE_BYTES:
+            break
+
+def get_json(url, params=None):
+    """GET a JSON endpoint through the on-disk cache.
+
+    Fresh entries are served without a request; stale ones are revalidated with
+    If-None-Match / If-Modified-Since so an unchanged response costs only a 304.
+    """
+    with tracing.span("http_cache.get", url=url) as s:
+        body, result = _fetch(url, params)
+        s.set(result=result, bytes=len(body))
+        tracing.count("http_cache_" + result)
+        with tracing.span("json.decode", bytes=len(body)):
+            return json.loads(body)
+
+def _fetch(url, params):
+    """Return (body bytes, "hit" | "revalidated" | "miss")."""
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    now = time.time()
+    with _lock:
+        row = _db().execute(
+            "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (full_url,)
+        ).fetchone()
+        if row and now - row[3] < ttl_for(full_url):
+            _db().execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, full_url))
+            _db().commit()
+            stats["hits"] += 1
+            return row[0], "hit"
+
+    headers = {}
+    if row:
+        if row[1]:
+            headers["If-None-Match"] = row[1]
+        if row[2]:
+            headers["If-Modified-Since"] = row[2]
+    response = get_client().get(full_url, headers=headers)
+
+    with _lock:
+        db = _db()
+        if row and response.status_code == 304:
+            db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, full_url))
+            db.commit()
+            stats["revalidated"] += 1
+            return row[0], "revalidated"
+
+        response.raise_for_status()
+        stats["misses"] += 1
+        body = response.content
+        db.execute(
+            "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at, accessed_at, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (full_url, body, response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, len(body)),
+        )
+        _evict(db)
+        db.commit()
+    return body, "miss"
+
+def clear():
+    with _lock:
+        _db().execute("DELETE FROM responses")
+        _db().commit()
@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import tracing
+
+USER_AGENT = "Bengaming2790/SCModManager (ScrubCraft Modding Manager)"
+
+DEFAULT_TIMEOUT = 30
+POOL_SIZE = 16
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+# Modrinth allows 300 requests per minute per IP; the response headers refine this as we go
+DEFAULT_RATE_LIMIT = 300
+RATE_WINDOW = 60
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Client-side rate limiter that follows X-Ratelimit-* headers when the server sends them."""
+
+    def __init__(self, limit=DEFAULT_RATE_LIMIT, window=RATE_WINDOW):
+        self.capacity = limit
+        self.rate = limit / window
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def update(self, headers):
+        limit = headers.get("X-Ratelimit-Limit")
+        remaining = headers.get("X-Ratelimit-Remaining")
+        reset = headers.get("X-Ratelimit-Reset")
+        with self._lock:
+            try:
+                if limit is not None:
+                    self.capacity = max(1, int(limit))
+                    self.rate = self.capacity / RATE_WINDOW
+                if remaining is not None:
+                    self._refill(time.monotonic())
+                    self.tokens = min(self.tokens, float(remaining))
+                    if int(remaining) <= 0 and reset is not None:
+                        self.blocked_until = time.monotonic() + float(reset)
+            except ValueError:
+                pass
+
+    def block_for(self, seconds):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class HttpClient:
+    """One pooled keep-alive session shared by every Modrinth call and download.
+
+    Idempotent requests are retried with jittered exponential backoff on connection
+    errors, 429 and 5xx; all requests wait on the rate-limit bucket first.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES):
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.adapter = adapter
+        self.max_retries = max_retries
+        self.bucket = TokenBucket()
+        self.recent = deque(maxlen=200)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "total_time": 0.0, "rate_limit_wait": 0.0}
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After") or response.headers.get("X-Ratelimit-Reset")
+            if retry_after:
+                try:
+                    return min(BACKOFF_MAX, float(retry_after))
+                except ValueError:
+                    pass
+        return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def _record(self, method, url, status, elapsed, attempt):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["total_time"] += elapsed
+            self.recent.append({"method": method, "url": url, "status": status,
+                                "elapsed": elapsed, "attempt": attempt})
+
+    def request(self, method, url, retry=None, **kwargs):
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            with self._lock:
+                self.stats["rate_limit_wait"] += waited
+            start = time.perf_counter()
+            try:
+                with tracing.span("http.request", method=method, url=url, attempt=attempt) as s:
+                    opened = self.connection_stats()["connections_opened"] if tracing.is_enabled() else 0
+                    response = self.session.request(method, url, **kwargs)
+                    # requests hides DNS/TLS timings; a new pooled connection is where that cost went
+                    s.set(status=response.status_code, headers_ms=round(response.elapsed.total_seconds() * 1000, 1),
+                          rate_limit_wait_ms=round(waited * 1000, 1))
+                    if tracing.is_enabled():
+                        s.set(new_connection=self.connection_stats()["connections_opened"] > opened)
+                tracing.count("http_requests")
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(method, url, None, time.perf_counter() - start, attempt)
+                if not retry or attempt >= self.max_retries:
+                    with self._lock:
+                        self.stats["failures"] += 1
+                    raise
+                time.sleep(self._backoff(attempt))
+            else:
+                self._record(method, url, response.status_code, time.perf_counter() - start, attempt)
+                self.bucket.update(response.headers)
+                if response.status_code not in RETRY_STATUSES or not retry or attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                if response.status_code == 429:
+                    self.bucket.block_for(delay)
+                response.close()
+                time.sleep(delay)
+            attempt += 1
+            with self._lock:
+                self.stats["retries"] += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def connection_stats(self):
+        """How many TCP/TLS connections were opened versus requests sent over them."""
+        opened = 0
+        sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return {"connections_opened": opened, "requests_sent": sent, "connections_reused": max(0, sent - opened)}
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update(self.connection_stats())
+        if stats["requests"]:
+            stats["average_time"] = stats["total_time"] / stats["requests"]
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,196 @@
+import os
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import core
+import tracing
+from blobstore import link_blob, store_file, store_stream
+from fileops import file_hash
+from sync import load_manifest, refresh_manifest, save_manifest
+
+# Bulk import into a profile: files, whole folders (e.g. another launcher's mods folder),
+# unpacked packs and zip archives of jars. Work runs on a bounded pool; files whose
+# content the profile already has are skipped, so importing the same folder twice is a no-op.
+
+IMPORT_WORKERS = 8
+# What counts as an importable file, per profile kind
+KIND_EXTENSIONS = {
+    "mods": (".jar",),
+    "shaders": (".zip",),
+    "resources": (".zip",),
+}
+
+
+def _is_unpacked_pack(kind, folder):
+    if kind == "resources":
+        return os.path.isfile(os.path.join(folder, "pack.mcmeta"))
+    if kind == "shaders":
+        return os.path.isdir(os.path.join(folder, "shaders"))
+    return False
+
+def _is_jar_archive(path):
+    """A plain zip (not itself a mod) holding jars, like a downloaded mod collection."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+    return any(n.endswith(".jar") for n in names) and not any(
+        n in ("fabric.mod.json", "quilt.mod.json", "META-INF/mods.toml", "META-INF/neoforge.mods.toml") for n in names)
+
+def collect(kind, paths):
+    """Expand the selected paths into import items.
+
+    Each item is (source path, archive member or None, path inside the profile,
+    top_level). Top-level items are deduplicated against everything in the profile;
+    files inside an unpacked pack only against the same path.
+    """
+    extensions = KIND_EXTENSIONS[kind]
+    items = []
+
+    def add_tree(folder, prefix):
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(path, folder)
+                items.append((path, None, os.path.join(prefix, rel_path), False))
+
+    def add_folder(folder):
+        if _is_unpacked_pack(kind, folder):
+            add_tree(folder, os.path.basename(os.path.normpath(folder)))
+            return
+        for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+            if entry.is_dir():
+                if kind == "mods" or _is_unpacked_pack(kind, entry.path):
+                    add_folder(entry.path)
+            elif entry.name.lower().endswith(extensions):
+                items.append((entry.path, None, entry.name, True))
+            elif kind == "mods" and entry.name.lower().endswith(".zip") and _is_jar_archive(entry.path):
+                add_archive(entry.path)
+
+    def add_archive(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(extensions):
+                    items.append((path, info.filename, os.path.basename(info.filename), True))
+
+    for path in paths:
+        if os.path.isdir(path):
+            add_folder(path)
+        elif kind == "mods" and path.lower().endswith(".zip") and _is_jar_archive(path):
+            add_archive(path)
+        else:
+            items.append((path, None, os.path.basename(path), True))
+    return items
+
+
+def import_paths(kind, name, paths, progress=None, workers=IMPORT_WORKERS):
+    """Import files, folders and archives into a profile.
+
+    Returns a summary dict: imported, skipped (already there), replaced (names whose
+    old content was swapped for new), bytes, and errors.
+    """
+    destination = core.create_profile(kind, name)
+    with tracing.operation("import", kind=kind, profile=name):
+        with tracing.span("import.collect") as s:
+            items = collect(kind, paths)
+            s.set(items=len(items))
+        existing = refresh_manifest(destination)
+        present_hashes = {entry["hash"] for entry in existing.values()}
+        summary = {"imported": 0, "skipped": 0, "replaced": [], "bytes": 0, "errors": []}
+        lock = threading.Lock()
+        claimed = set()  # hashes and paths taken by this batch, so duplicates inside it import once
+        names = {}  # path in the profile -> (hash, source) of the item of this batch that took it
+        added = {}
+        cancelled = threading.Event()
+        done = 0
+
+        def already_there(digest, rel_path, top_level, label):
+            current = existing.get(rel_path)
+            key = (digest, "*" if top_level else rel_path)
+            with lock:
+                if (current and current["hash"] == digest) or (top_level and digest in present_hashes) or key in claimed:
+                    summary["skipped"] += 1
+                    return True
+                # Jars from different subfolders or archives can share a name; only one gets it
+                if rel_path in names and names[rel_path][0] != digest:
+                    summary["errors"].append(f"{label}: not imported, {names[rel_path][1]} has the same name "
+                                             f"and different content")
+                    return True
+                claimed.add(key)
+                names[rel_path] = (digest, label)
+            return False
+
+        def run(item):
+            if cancelled.is_set():
+                return
+            source, member, rel_path, top_level = item
+            label = f"{source}:{member}" if member else source
+            if member is None:
+                # Hash first, so content the profile already has is never copied
+                digest = file_hash(source)
+                if already_there(digest, rel_path, top_level, label):
+                    return
+                store_file(source, digest)
+                size = os.path.getsize(source)
+            else:
+                # Each worker opens its own handle; ZipFile objects are not safe to share across threads
+                with zipfile.ZipFile(source) as archive, archive.open(member) as stream:
+                    digest, size = store_stream(stream)
+                if already_there(digest, rel_path, top_level, label):
+                    return
+            dest_path = os.path.join(destination, rel_path)
+            link_blob(digest, dest_path)
+            st = os.lstat(dest_path)
+            with lock:
+                if rel_path in existing:
+                    summary["replaced"].append(rel_path)
+                summary["imported"] += 1
+                summary["bytes"] += size
+                added[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "hash": digest}
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(run, item): item for item in items}
+            try:
+                for future in as_completed(futures):
+                    item = futures[future]
+                    try:
+                        future.result()
+                    except (OSError, zipfile.BadZipFile) as e:
+                        summary["errors"].append(f"{item[1] or item[0]}: {e}")
+                    except (zlib.error, EOFError) as e:
+                        # An archive member whose compressed data is damaged
+                        summary["errors"].append(f"{item[1] or item[0]}: is damaged ({e})")
+                    except (RuntimeError, NotImplementedError) as e:
+                        # An encrypted member, or one compressed in a way zipfile can't read
+                        summary["errors"].append(f"{item[1] or item[0]}: could not be read: {e}")
+                    done += 1
+                    if progress:
+                        progress(done, len(items), item[2])
+            except BaseException:
+                # Cancelled through progress(): let queued items fall through quickly
+                cancelled.set()
+                raise
+            finally:
+                # Record what was linked, even on cancel, so the next apply needn't rehash it
+                manifest = load_manifest(destination)
+                manifest.update(added)
+                save_manifest(destination, manifest)
+
+        if kind == "mods" and summary["imported"]:
+            import mod_index
+            with tracing.span("mod_index.update", folder=destination):
+                mod_index.update_folder(destination, progress=progress)
+    return summary
+
+def format_summary(summary):
+    text = f"{summary['imported']} imported, {summary['skipped']} already in the profile"
+    if summary["replaced"]:
+        text += f", {len(summary['replaced'])} replaced with new content ({', '.join(summary['replaced'][:5])}"
+        text += ", ...)" if len(summary["replaced"]) > 5 else ")"
+    if summary["errors"]:
+        text += f"\n{len(summary['errors'])} errors:\n" + "\n".join(summary["errors"][:10])
+    return text
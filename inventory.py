@@ -0,0 +1,322 @@
+import os
+import threading
+import time
+
+import core
+import tracing
+from sync import build_manifest, load_manifest, plan_sync, save_manifest
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional; without it changes are picked up by the periodic rescan
+    FileSystemEventHandler = object
+    Observer = None
+
+# In-memory inventory of every profile (file list, sizes, hashes) and of the live game
+# folders, so dropdowns, diffs and apply planning don't walk the disk. A background
+# thread keeps it current: filesystem notifications (when watchdog is installed) mark
+# folders dirty, and a periodic rescan catches whatever the notifications missed.
+
+RESCAN_INTERVAL = 30
+# With notifications the periodic rescan is only a safety net
+WATCHED_RESCAN_INTERVAL = 600
+# Bursts of events (an import, a download) are gathered for this long before rescanning
+SETTLE_SECONDS = 0.5
+
+_lock = threading.Lock()
+_names = {}      # kind -> sorted profile names
+_folders = {}    # folder -> {"files": manifest, "size", "scanned_at"}
+_dirty = set()   # kinds whose profile list, and folders whose files, need a rescan
+_scanning = set()  # items taken off _dirty whose rescan hasn't been stored yet
+_wake = threading.Event()
+_thread = None
+_observer = None
+_generation = 0
+
+
+def _profile_folder(kind, name):
+    return os.path.abspath(core.profile_path(kind, name))
+
+def _live_folder(kind):
+    return os.path.abspath(core.game_folder(kind))
+
+def is_running():
+    return _thread is not None
+
+def is_watching():
+    """True when filesystem notifications keep the inventory current between rescans."""
+    return _observer is not None
+
+def generation():
+    """Bumped on every change to the inventory, so a UI can poll it cheaply."""
+    return _generation
+
+
+# --- Scanning ---
+
+def _scan_names(kind):
+    return sorted(core.get_profiles_in(core.PROFILE_KINDS[kind][0]), key=str.lower)
+
+def _scan_folder(folder):
+    previous = load_manifest(folder)
+    files = build_manifest(folder, previous)
+    if files != previous and os.path.isdir(folder):
+        save_manifest(folder, files)
+    return {"files": files, "size": sum(entry["size"] for entry in files.values()), "scanned_at": time.time()}
+
+def _store_names(kind, names):
+    global _generation
+    with _lock:
+        old = _names.get(kind)
+        _names[kind] = names
+        if old is not None:
+            for name in set(old) - set(names):
+                _folders.pop(_profile_folder(kind, name), None)
+        if old != names:
+            _generation += 1
+
+def _store_folder(folder, entry):
+    global _generation
+    with _lock:
+        old = _folders.get(folder)
+        _folders[folder] = entry
+        if old is None or old["files"] != entry["files"]:
+            _generation += 1
+
+def _refresh_dirty():
+    with _lock:
+        dirty = list(_dirty)
+        _dirty.clear()
+        # Until each rescan is stored, the cached copy is still the old one
+        _scanning.update(dirty)
+    if not dirty:
+        return
+    with tracing.span("inventory.refresh", items=len(dirty)):
+        try:
+            # Profile lists first, so folders of removed profiles are not rescanned
+            for kind in [item for item in dirty if item in core.PROFILE_KINDS]:
+                _store_names(kind, _scan_names(kind))
+                with _lock:
+                    _scanning.discard(kind)
+            for folder in [item for item in dirty if item not in core.PROFILE_KINDS]:
+                if os.path.isdir(folder) or folder in _folders:
+                    _store_folder(folder, _scan_folder(folder))
+                with _lock:
+                    _scanning.discard(folder)
+        except BaseException:
+            # Whatever wasn't rescanned goes back on the list for the next round
+            with _lock:
+                _dirty.update(_scanning)
+                _scanning.clear()
+            raise
+
+def _mark_all():
+    with _lock:
+        _dirty.update(core.PROFILE_KINDS)
+        for kind in core.PROFILE_KINDS:
+            _dirty.update(_profile_folder(kind, name) for name in _names.get(kind, ()))
+            _dirty.add(_live_folder(kind))
+
+def _run(interval):
+    next_rescan = time.monotonic()
+    while _thread is not None:
+        _wake.wait(timeout=max(0.0, next_rescan - time.monotonic()))
+        if _thread is None:
+            break
+        if _wake.is_set():
+            time.sleep(SETTLE_SECONDS)
+            _wake.clear()
+        if time.monotonic() >= next_rescan:
+            _mark_all()
+            next_rescan = time.monotonic() + interval
+        try:
+            _refresh_dirty()
+            # New profiles found by this pass get their files scanned straight away
+            _mark_unscanned()
+            _refresh_dirty()
+        except OSError as e:
+            print(f"Profile inventory rescan failed: {e}")
+
+def _mark_unscanned():
+    with _lock:
+        for kind, names in _names.items():
+            _dirty.update(folder for folder in (_profile_folder(kind, name) for name in names)
+                          if folder not in _folders)
+
+
+# --- Notifications ---
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, kind, root):
+        super().__init__()
+        self.kind = kind
+        self.root = root
+
+    def on_any_event(self, event):
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self._mark(os.path.abspath(path))
+
+    def _mark(self, path):
+        rel_path = os.path.relpath(path, self.root)
+        if rel_path.startswith(os.pardir) or rel_path == os.curdir:
+            return
+        parts = rel_path.split(os.sep)
+        with _lock:
+            if len(parts) == 1:
+                # A profile folder itself was created, removed or renamed
+                _dirty.add(self.kind)
+            _dirty.add(os.path.join(self.root, parts[0]))
+        _wake.set()
+
+def _start_observer():
+    observer = Observer()
+    for kind, (folder, _) in core.PROFILE_KINDS.items():
+        os.makedirs(folder, exist_ok=True)
+        root = os.path.abspath(folder)
+        observer.schedule(_ChangeHandler(kind, root), root, recursive=True)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+# --- Control ---
+
+def start(interval=None):
+    """Scan everything in the background and keep it current until stop(). Safe to call twice."""
+    global _thread, _observer
+    if _thread is not None:
+        return
+    if Observer is not None:
+        try:
+            _observer = _start_observer()
+        except OSError as e:
+            print(f"Filesystem notifications unavailable, rescanning every {RESCAN_INTERVAL}s: {e}")
+            _observer = None
+    if interval is None:
+        interval = WATCHED_RESCAN_INTERVAL if _observer is not None else RESCAN_INTERVAL
+    _thread = threading.Thread(target=_run, args=(interval,), name="profile-inventory", daemon=True)
+    _thread.start()
+
+def stop():
+    global _thread, _observer
+    thread, _thread = _thread, None
+    _wake.set()
+    if _observer is not None:
+        _observer.stop()
+        _observer = None
+    if thread is not None:
+        thread.join()
+    _wake.clear()
+
+def invalidate(kind, name=None, live=False):
+    """Note that the profile list of `kind`, one profile, or the live game folder has changed.
+
+    Called after the app's own writes so the next read doesn't wait for a notification
+    or the periodic rescan.
+    """
+    with _lock:
+        if name is None and not live:
+            _dirty.add(kind)
+        if name is not None:
+            _dirty.add(kind)
+            _dirty.add(_profile_folder(kind, name))
+        if live:
+            _dirty.add(_live_folder(kind))
+        if _thread is None:
+            # Nothing refreshes in the background, so just forget it and rescan on the next read
+            _names.pop(kind, None)
+            if name is not None:
+                _folders.pop(_profile_folder(kind, name), None)
+            if live:
+                _folders.pop(_live_folder(kind), None)
+    _wake.set()
+
+
+# --- Reads ---
+
+def list_profiles(kind):
+    with _lock:
+        names = _names.get(kind)
+    if names is None:
+        names = _scan_names(kind)
+        # Without the background thread nothing would ever refresh a cached copy
+        if _thread is not None:
+            _store_names(kind, names)
+    return list(names)
+
+def _files(folder):
+    with _lock:
+        entry = _folders.get(folder)
+    if entry is None:
+        entry = _scan_folder(folder)
+        if _thread is not None:
+            _store_folder(folder, entry)
+    return entry
+
+def profile_files(kind, name):
+    """{relative path: {"size", "mtime", "hash"}} for a profile, from the cache when possible."""
+    return _files(_profile_folder(kind, name))["files"]
+
+def live_files(kind):
+    return _files(_live_folder(kind))["files"]
+
+def fresh_profile_files(kind, name):
+    """The cached files of a profile if notifications vouch that they are current, else None.
+
+    Only then can apply planning trust the cache instead of checking every file itself.
+    """
+    folder = _profile_folder(kind, name)
+    with _lock:
+        if _observer is None or folder in _dirty or folder in _scanning or folder not in _folders:
+            return None
+        return _folders[folder]["files"]
+
+def summary(kind, name):
+    entry = _files(_profile_folder(kind, name))
+    return {"files": len(entry["files"]), "size": entry["size"], "scanned_at": entry["scanned_at"]}
+
+def diff(kind, name, target=None):
+    """How applying a profile would change the live game folder, worked out from the cache.
+
+    Named targets aren't watched, so their folder is checked against its manifest (a stat
+    per file; only changed files are hashed) instead.
+    """
+    if target is None:
+        return _diff(profile_files(kind, name), live_files(kind))
+    return _diff(profile_files(kind, name), _scan_folder(core.game_folder(kind, target))["files"])
+
+def _diff(src_files, dst_files):
+    to_remove, to_copy, unchanged = plan_sync(src_files, dst_files)
+    changed = set(to_remove) & set(to_copy)
+    return {
+        "added": sorted(set(to_copy) - changed),
+        "removed": sorted(set(to_remove) - changed),
+        "changed": sorted(changed),
+        "unchanged": len(unchanged),
+        "copy_bytes": sum(src_files[p]["size"] for p in to_copy),
+    }
+
+def cached_status(kind, name):
+    """One line about a profile (size, and how it differs from the game folder), or None
+    if it hasn't been scanned yet. Never touches the disk, so it is safe on the UI thread."""
+    from sync import format_size
+
+    with _lock:
+        entry = _folders.get(_profile_folder(kind, name))
+        live = _folders.get(_live_folder(kind))
+    if entry is None:
+        return None
+    text = f"{len(entry['files'])} files, {format_size(entry['size'])}"
+    if live is not None:
+        text += "; " + format_diff(_diff(entry["files"], live["files"]))
+    return text
+
+def format_diff(result):
+    if not (result["added"] or result["removed"] or result["changed"]):
+        return "matches the game folder"
+    from sync import format_size
+
+    parts = [f"{len(result[key])} {key}" for key in ("added", "removed", "changed") if result[key]]
+    return ", ".join(parts) + f" ({format_size(result['copy_bytes'])} to copy)"
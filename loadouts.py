@@ -0,0 +1,64 @@
+import json
+import os
+
+import core
+
+# A loadout names one profile per kind (e.g. a mod profile with the shader and resource
+# profiles that go with it), so a whole setup switches with one apply.
+
+LOADOUTS_FILE = "loadouts.json"
+
+
+class LoadoutError(Exception):
+    pass
+
+
+def load_loadouts():
+    """{loadout name: {kind: profile name}}"""
+    try:
+        with open(LOADOUTS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise LoadoutError(f"Could not read {LOADOUTS_FILE}: {e}")
+
+def _save_loadouts(loadouts):
+    tmp_path = LOADOUTS_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(loadouts, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, LOADOUTS_FILE)
+
+def list_loadouts():
+    return sorted(load_loadouts())
+
+def get_loadout(name):
+    loadouts = load_loadouts()
+    if name not in loadouts:
+        raise LoadoutError(f"No loadout called '{name}'")
+    return loadouts[name]
+
+def save_loadout(name, profiles):
+    """Create or replace a loadout from {kind: profile name}; kinds left out are not touched on apply."""
+    profiles = {kind: profile for kind, profile in profiles.items() if profile}
+    if not name:
+        raise LoadoutError("A loadout needs a name")
+    if not profiles:
+        raise LoadoutError("A loadout needs at least one profile")
+    for kind, profile in profiles.items():
+        if kind not in core.PROFILE_KINDS:
+            raise LoadoutError(f"Unknown profile kind '{kind}'")
+        if not os.path.isdir(core.profile_path(kind, profile)):
+            raise LoadoutError(f"No {kind} profile called '{profile}'")
+    loadouts = load_loadouts()
+    loadouts[name] = profiles
+    _save_loadouts(loadouts)
+
+def delete_loadout(name):
+    loadouts = load_loadouts()
+    if loadouts.pop(name, None) is None:
+        raise LoadoutError(f"No loadout called '{name}'")
+    _save_loadouts(loadouts)
+
+def describe(profiles):
+    return ", ".join(f"{kind}: {profiles[kind]}" for kind in core.PROFILE_KINDS if kind in profiles)
@@ -1,14 +1,20 @@
 import os
-import platform
-import shutil
 import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox, Listbox, Scrollbar, simpledialog
 import tkinter.ttk as ttk
-import requests
-from packaging.version import parse as parse_version
-import zipfile
-import io
+import core
+import tracing
+import loadouts
+import pack_index
+import snapshots
+import targets
+from sync import format_sync_stats, format_size
+import inventory
+from staging import ApplyError, can_rollback
+from tasks import TaskManager
+from importer import format_summary
+from widgets import VirtualList
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -18,342 +24,778 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
-# --- Paths ---
+# --- Background jobs (run on the task pool, never on the Tk main loop) ---
 
-def get_minecraft_folder():
-    system = platform.system()
-    if system == "Windows":
-        appdata = os.getenv("APPDATA")
-        return os.path.join(appdata, ".minecraft")
-    elif system == "Darwin":
-        home = os.path.expanduser("~")
-        return os.path.join(home, "Library", "Application Support", "minecraft")
-    elif system == "Linux":
-        home = os.path.expanduser("~")
-        return os.path.join(home, ".minecraft")
-    else:
-        raise Exception("Unsupported OS")
-
-MC_FOLDER = get_minecraft_folder()
-MODS_FOLDER = os.path.join(MC_FOLDER, "mods")
-SHADERPACKS_FOLDER = os.path.join(MC_FOLDER, "shaderpacks")
-RESOURCEPACKS_FOLDER = os.path.join(MC_FOLDER, "resourcepacks")
+def import_files_task(task, kind, name, file_paths):
+    return core.import_files(kind, name, file_paths, progress=task.set_progress)
 
-PROFILE_FOLDER = "profiles"
-SHADERPACK_PROFILE_FOLDER = "shaderpack_profiles"
-RESOURCEPACK_PROFILE_FOLDER = "resourcepack_profiles"
+def apply_profile_task(task, kind, name, staged=False, snapshot=True):
+    return core.apply_profile(kind, name, staged=staged, progress=task.set_progress, snapshot=snapshot)
 
-# --- Utility functions ---
+def apply_to_targets_task(task, kind, name, target_names, staged=True, snapshot=True):
+    return core.apply_to_targets(kind, name, target_names, staged=staged, progress=task.set_progress, snapshot=snapshot)
 
-def get_profiles_in(folder):
-    if not os.path.exists(folder):
-        return []
-    return [name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name))]
+def apply_loadout_task(task, name, snapshot=True, target_names=(targets.DEFAULT_TARGET,)):
+    """{"applied": {target: {kind: sync stats}}, "failed": (target, error) or None}.
 
-def clear_folder(folder_path):
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
-    else:
-        for item in os.listdir(folder_path):
-            item_path = os.path.join(folder_path, item)
-            try:
-                if os.path.isfile(item_path) or os.path.islink(item_path):
-                    os.remove(item_path)
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-            except Exception as e:
-                print(f"Failed to delete {item_path}: {e}")
-
-def copy_profile_files(src_folder, dst_folder):
-    os.makedirs(dst_folder, exist_ok=True)
-    for item in os.listdir(src_folder):
-        source_path = os.path.join(src_folder, item)
-        dest_path = os.path.join(dst_folder, item)
+    Each target is all-or-nothing and the first failure stops the rest. A failure on the
+    first target is raised, since nothing was changed then.
+    """
+    results = {}
+    for target in target_names:
+        try:
+            results[target] = core.apply_loadout(name, progress=task.set_progress, snapshot=snapshot, target=target)
+        except Exception as e:
+            if not results:
+                raise
+            return {"applied": results, "failed": (target, e)}
+    return {"applied": results, "failed": None}
+
+def rollback_group_task(task, group):
+    """Roll back every (kind, target) folder of an applied group, or none of them.
+
+    Rolling back twice redoes an apply, so a failure partway rolls the folders already
+    done forward again before the error is raised.
+    """
+    done = []
+    for kind, target in group:
         try:
-            if os.path.isfile(source_path):
-                shutil.copy2(source_path, dest_path)
-            elif os.path.isdir(source_path):
-                if os.path.exists(dest_path):
-                    shutil.rmtree(dest_path)
-                shutil.copytree(source_path, dest_path)
+            core.rollback_apply(kind, target)
         except Exception as e:
-            print(f"Failed to copy {source_path} to {dest_path}: {e}")
+            stuck = []
+            for kind_done, target_done in reversed(done):
+                try:
+                    core.rollback_apply(kind_done, target_done)
+                except Exception:
+                    stuck.append(core.game_folder(kind_done, target_done))
+            if stuck:
+                raise ApplyError(f"{e}\nThese folders are still rolled back:\n" + "\n".join(stuck)) from e
+            raise ApplyError(f"{e}\nNothing was changed.") from e
+        done.append((kind, target))
+
+def take_snapshots_task(task, kinds):
+    return [core.take_snapshot(kind, progress=task.set_progress) for kind in kinds
+            if os.path.isdir(core.game_folder(kind))]
+
+def restore_snapshot_task(task, snapshot_id, profile=None, paths=None):
+    return core.restore_snapshot(snapshot_id, profile=profile, paths=paths, progress=task.set_progress)
+
+def export_snapshots_task(task, snapshot_ids, out_path):
+    return core.export_snapshots(snapshot_ids, out_path, progress=task.set_progress)
+
+def import_snapshots_task(task, path):
+    return core.import_snapshots(path, progress=task.set_progress)
+
+def inspect_packs_task(task, profiles):
+    """{kind: pack_index results} for the shader and resource profiles in {kind: name}."""
+    return {kind: core.inspect_packs(kind, name) for kind, name in profiles.items() if kind in pack_index.PACK_KINDS}
+
+def download_mods_task(task, mod_ids, loader, game_version, name):
+    return core.download_mods(mod_ids, loader, game_version, name, progress=task.set_progress)
+
+def fetch_game_versions_task(task):
+    return core.release_game_versions()
+
+def check_updates_task(task, name, loader, game_version):
+    return core.check_updates(name, loader, game_version, progress=task.set_progress)
+
+def apply_updates_task(task, name, updates):
+    return core.update_mods(name, updates, progress=task.set_progress)
+
+def profile_info_task(task, name):
+    return core.profile_info(name, progress=task.set_progress)
+
+def dedupe_profiles_task(task):
+    return core.dedupe_profiles(progress=task.set_progress)
+
+def search_page_task(task, query, loader, game_version, offset, limit, source=None):
+    data = core.search_mods(query, loader, game_version, limit=limit, offset=offset, source=source)
+    # A newer query may have replaced this one while the request was out
+    task.check_cancelled()
+    return data
+
+def sync_catalog_task(task):
+    return core.sync_catalog(progress=task.set_progress)
+
+def install_modpack_task(task, pack, name, game_version=None):
+    if os.path.isfile(pack):
+        return core.install_modpack(pack, name, progress=task.set_progress)
+    return core.install_modpack_project(pack, name, game_version, progress=task.set_progress)
+
+def export_modpack_task(task, name, out_path, game_version, loader, loader_version):
+    return core.export_modpack(name, out_path, game_version, loader, loader_version, progress=task.set_progress)
+
+
+# --- Profiles (one set of functions for every kind in core.PROFILE_KINDS) ---
+
+# kind -> labels and file dialogs for its section of the main window
+PROFILE_SECTIONS = {
+    "mods": {
+        "title": "Mod Profiles", "noun": "mod", "button": "Mod",
+        "import_text": "Import Mods (.jar)", "file_title": "Select Mod Files (.jar)",
+        "file_types": [("Java Mod Files", "*.jar")],
+        "folder_title": "Select a Folder of Mods (or a mods folder to copy from)",
+    },
+    "shaders": {
+        "title": "Shaderpack Profiles", "noun": "shaderpack", "button": "Shader",
+        "import_text": "Import Shaderpack Files (.zip)", "file_title": "Select Shaderpack Files (.zip)",
+        "file_types": [("Zip Files", "*.zip"), ("All Files", "*.*")],
+        "folder_title": "Select a Folder of Shaderpacks or an Unpacked Shaderpack",
+    },
+    "resources": {
+        "title": "Resourcepack Profiles", "noun": "resourcepack", "button": "Resource",
+        "import_text": "Import Resourcepack Files (.zip)", "file_title": "Select Resourcepack Files (.zip)",
+        "file_types": [("Zip Files", "*.zip"), ("All Files", "*.*")],
+        "folder_title": "Select a Folder of Resourcepacks or an Unpacked Resourcepack",
+    },
+}
+
+# kind -> widget or variable, filled in by build_profile_section
+selected_profiles = {}
+profile_dropdowns = {}
+profile_name_entries = {}
+profile_status_labels = {}
+
+def selected_profile(kind):
+    """The profile picked for `kind`, or None (after telling the user) if there is none."""
+    selected = selected_profiles[kind].get()
+    if selected == "No Profiles":
+        messagebox.showwarning("No Profile Selected",
+                               f"Please create and select a {PROFILE_SECTIONS[kind]['noun']} profile first.")
+        return None
+    return selected
 
+def set_menu_options(dropdown, variable, options, empty_label="No Profiles"):
+    menu = dropdown["menu"]
+    menu.delete(0, "end")
+    if options:
+        for option in options:
+            menu.add_command(label=option, command=lambda value=option: variable.set(value))
+        if variable.get() not in options:
+            variable.set(options[0])
+    else:
+        menu.add_command(label=empty_label, command=lambda: variable.set(empty_label))
+        variable.set(empty_label)
+
+def refresh_profiles(kind):
+    set_menu_options(profile_dropdowns[kind], selected_profiles[kind], core.list_profiles(kind))
+
+def update_profile_status(kind):
+    selected = selected_profiles[kind].get()
+    status = inventory.cached_status(kind, selected) if selected != "No Profiles" else ""
+    profile_status_labels[kind].configure(text="Scanning..." if status is None else status)
+
+INVENTORY_POLL_MS = 1000
+inventory_seen = None
+
+def poll_inventory():
+    """Redraw the profile menus and status lines when the background inventory has changed."""
+    global inventory_seen
+    if inventory.generation() != inventory_seen:
+        inventory_seen = inventory.generation()
+        for kind in PROFILE_SECTIONS:
+            refresh_profiles(kind)
+            update_profile_status(kind)
+    root.after(INVENTORY_POLL_MS, poll_inventory)
+
+def create_profile(kind):
+    noun = PROFILE_SECTIONS[kind]["noun"]
+    profile_name = profile_name_entries[kind].get().strip()
+    if not profile_name:
+        messagebox.showwarning("Input Error", f"Please enter a {noun} profile name.")
+        return
+    try:
+        path = core.create_profile(kind, profile_name)
+        messagebox.showinfo("Success", f"{noun.capitalize()} profile created:\n{path}")
+        refresh_profiles(kind)
+        selected_profiles[kind].set(profile_name)
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to create {noun} profile:\n{e}")
 
+def show_import_summary(summary, target):
+    text = f"{target}: {format_summary(summary)}"
+    if summary["errors"]:
+        messagebox.showwarning("Import Finished With Errors", text)
+    else:
+        messagebox.showinfo("Success", text)
 
-def search_modrinth_mods(query):
-    url = "https://api.modrinth.com/v2/search"
-    params = {
-        "query": query,
-        "facets": ["versions:"],  # can filter by Minecraft version if you want
-        "index": 0,
-        "limit": 5
-    }
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        raise Exception("Modrinth API error")
-    data = response.json()
-    return data["hits"]  # list of mod projects
+def import_profile_files(kind, folder=False):
+    section = PROFILE_SECTIONS[kind]
+    if folder:
+        folder_path = filedialog.askdirectory(title=section["folder_title"])
+        file_paths = (folder_path,) if folder_path else ()
+    else:
+        file_paths = filedialog.askopenfilenames(title=section["file_title"], filetypes=section["file_types"])
+    if not file_paths:
+        return
 
-def download_modrinth_mod_file(mod_id, profile_folder):
-    # Get versions
-    versions_url = f"https://api.modrinth.com/v2/project/{mod_id}/version"
-    response = requests.get(versions_url)
-    response.raise_for_status()
-    versions = response.json()
+    selected = selected_profile(kind)
+    if selected is None:
+        return
 
-    # Pick latest stable version (simple example: just take first)
-    latest_version = versions[0]
-    files = latest_version.get("files", [])
-    if not files:
-        raise Exception("No files found for this version")
-    # Download the first file
-    file_url = files[0]["url"]
-    file_name = files[0]["filename"]
+    target = f"{section['noun']} profile '{selected}'"
+    task_manager.submit(
+        f"Import {', '.join(os.path.basename(p) for p in file_paths[:3])} into {target}",
+        import_files_task, kind, selected, file_paths,
+        on_done=lambda summary: show_import_summary(summary, target),
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to import {section['noun']} files:\n{e}"),
+    )
 
-    response = requests.get(file_url, stream=True)
-    response.raise_for_status()
+def apply_selected_profile(kind):
+    noun = PROFILE_SECTIONS[kind]["noun"]
+    selected = selected_profile(kind)
+    if selected is None:
+        return
 
-    os.makedirs(profile_folder, exist_ok=True)
-    file_path = os.path.join(profile_folder, file_name)
+    profile_path = core.profile_path(kind, selected)
+    if not os.path.exists(profile_path):
+        messagebox.showerror("Error", f"{noun.capitalize()} profile folder does not exist:\n{profile_path}")
+        return
 
-    with open(file_path, "wb") as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    target_names = selected_targets()
+    if target_names == [targets.DEFAULT_TARGET]:
+        apply = lambda: task_manager.submit(
+            f"Apply {noun} profile '{selected}'",
+            apply_profile_task, kind, selected, staged=staged_apply_enabled.get(), snapshot=snapshot_before_apply.get(),
+            on_done=lambda stats: applied([((kind, None), stats)], f"Applied {noun} profile '{selected}'.\n{format_sync_stats(stats)}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to apply {noun} profile:\n{e}"),
+        )
+    else:
+        apply = lambda: task_manager.submit(
+            f"Apply {noun} profile '{selected}' to {len(target_names)} targets",
+            apply_to_targets_task, kind, selected, target_names,
+            staged=staged_apply_enabled.get(), snapshot=snapshot_before_apply.get(),
+            on_done=lambda result: show_applied_to_targets(kind, f"{noun} profile '{selected}'", result),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to apply {noun} profile:\n{e}"),
+        )
+    check_packs_then({kind: selected}, f"{noun} profile '{selected}'", apply)
+
+def show_applied_to_targets(kind, what, result):
+    lines = [f"{target}: {format_sync_stats(stats)}" for target, stats in result["applied"].items()]
+    if result["applied"]:
+        applied([((kind, None if target == targets.DEFAULT_TARGET else target), stats)
+                 for target, stats in result["applied"].items()],
+                f"Applied {what} to {len(result['applied'])} targets.\n" + "\n".join(lines),
+                show=not result["errors"])
+    if result["errors"]:
+        failed = "\n".join(f"{target}: {error}" for target, error in result["errors"].items())
+        messagebox.showerror("Apply Failed for Some Targets",
+                             "\n".join(lines) + ("\n\n" if lines else "") + f"Failed:\n{failed}")
+
+def check_packs_then(profiles, what, apply):
+    """Inspect the packs about to be applied and only go on to apply() if they look fine
+    or the user says so. Mods have nothing to check, so they go straight through."""
+    if not any(kind in pack_index.PACK_KINDS for kind in profiles):
+        apply()
+        return
+    game_version = pack_index.game_version_hint()
+
+    def checked(results):
+        found = "\n".join(problems for problems in (pack_index.format_problems(r, game_version) for r in results.values())
+                          if problems)
+        against = f" (checked against Minecraft {game_version}, last played in the launcher)" if game_version else ""
+        if found and not messagebox.askyesno(
+                "Pack Problems", f"Some packs in {what} won't work as expected{against}:\n\n{found}\n\nApply anyway?"):
+            return
+        apply()
 
-    return file_path
+    def check_failed(e):
+        # A failed check shouldn't stand in the way, but the user decides
+        if messagebox.askyesno("Pack Check Failed", f"Could not check the packs in {what}:\n{e}\n\nApply anyway?"):
+            apply()
 
+    task_manager.submit(f"Check packs in {what}", inspect_packs_task, profiles,
+                        on_done=checked, on_error=check_failed)
 
+def open_pack_info_window(kind):
+    noun = PROFILE_SECTIONS[kind]["noun"]
+    selected = selected_profile(kind)
+    if selected is None:
+        return
+    game_version = pack_index.game_version_hint()
+
+    def show(results):
+        lines = [pack_index.format_info(info, game_version) for info in results[kind]]
+        broken = sum(1 for info in results[kind] if pack_index.problems(info, game_version))
+        summary_var.set(f"{len(results[kind])} packs, {broken} with problems"
+                        + (f"; pack formats checked against Minecraft {game_version}" if game_version else ""))
+        text.configure(state=tk.NORMAL)
+        text.delete("1.0", tk.END)
+        text.insert(tk.END, "\n".join(lines) or "No packs in this profile.")
+        text.configure(state=tk.DISABLED)
+
+    info_window = tk.Toplevel(root)
+    info_window.title(f"{noun.capitalize()} Profile '{selected}'")
+    info_window.geometry("560x420")
+    summary_var = tk.StringVar(info_window, value="Inspecting packs...")
+    tk.Label(info_window, textvariable=summary_var).pack(pady=5)
+    text = tk.Text(info_window, wrap=tk.WORD, state=tk.DISABLED)
+    text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+    task_manager.submit(
+        f"Inspect packs in {noun} profile '{selected}'", inspect_packs_task, {kind: selected},
+        on_done=show,
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to inspect packs:\n{e}"),
+    )
 
-# --- GUI Setup ---
+def build_profile_section(kind):
+    section = PROFILE_SECTIONS[kind]
+    section_label(section["title"])
 
-root = tk.Tk()
-root.geometry("600x720")
-root.title("ScrubCraft Modding Manager")
+    selected_profiles[kind] = tk.StringVar(root)
+    profile_dropdowns[kind] = tk.OptionMenu(root, selected_profiles[kind], "")
+    profile_dropdowns[kind].pack()
+    refresh_profiles(kind)
 
-icon_path = resource_path("icon.png")
-try:
-    icon = tk.PhotoImage(file=icon_path)
-    root.iconphoto(True, icon)
-except Exception as e:
-    print(f"Failed to load icon: {e}")
+    profile_status_labels[kind] = tk.Label(root, text="", fg="gray")
+    profile_status_labels[kind].pack()
+    selected_profiles[kind].trace_add("write", lambda *args: update_profile_status(kind))
 
+    profile_name_entries[kind] = tk.Entry(root)
+    profile_name_entries[kind].pack(pady=5)
 
-try:
-    icon = tk.PhotoImage(file="icon.png")
-    root.iconphoto(True, icon)
-except Exception:
-    pass
+    create_button = tk.Button(root, text=f"Create {section['button']} Profile", command=lambda: create_profile(kind))
+    create_button.pack()
 
-# --- Variables ---
+    import_frame = tk.Frame(root)
+    import_frame.pack(pady=5)
+    import_button = tk.Button(import_frame, text=section["import_text"], command=lambda: import_profile_files(kind))
+    import_button.pack(side=tk.LEFT)
+    import_folder_button = tk.Button(import_frame, text="Import Folder",
+                                     command=lambda: import_profile_files(kind, folder=True))
+    import_folder_button.pack(side=tk.LEFT, padx=(5, 0))
 
-mod_selected_profile = tk.StringVar(root)
-shader_selected_profile = tk.StringVar(root)
-resource_selected_profile = tk.StringVar(root)
+    apply_button = tk.Button(root, text=f"Apply {section['button']} Profile", command=lambda: apply_selected_profile(kind))
+    apply_button.pack()
 
-# --- Functions for mods ---
+    if kind in pack_index.PACK_KINDS:
+        pack_info_button = tk.Button(root, text=f"{section['button']} Pack Info", command=lambda: open_pack_info_window(kind))
+        pack_info_button.pack(pady=(5, 0))
 
-def refresh_mod_profiles():
-    profiles = get_profiles_in(PROFILE_FOLDER)
-    menu = mod_profile_dropdown["menu"]
-    menu.delete(0, "end")
-    if profiles:
-        for p in profiles:
-            menu.add_command(label=p, command=lambda value=p: mod_selected_profile.set(value))
-        mod_selected_profile.set(profiles[0])
-    else:
-        menu.add_command(label="No Profiles", command=lambda: mod_selected_profile.set("No Profiles"))
-        mod_selected_profile.set("No Profiles")
+# --- Functions for mods ---
 
-def create_mod_profile():
-    profile_name = mod_profile_name_entry.get().strip()
-    if not profile_name:
-        messagebox.showwarning("Input Error", "Please enter a mod profile name.")
+def open_update_window():
+    selected = selected_profile("mods")
+    if selected is None:
         return
-    path = os.path.join(PROFILE_FOLDER, profile_name)
-    try:
-        os.makedirs(path, exist_ok=True)
-        messagebox.showinfo("Success", f"Mod profile created:\n{path}")
-        refresh_mod_profiles()
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to create mod profile:\n{e}")
+    updates = []
+
+    def check_updates():
+        update_listbox.delete(0, tk.END)
+        updates.clear()
+        status_var.set("Checking...")
+
+        def show_updates(result):
+            updates.extend(result["updates"])
+            for update in updates:
+                update_listbox.insert(
+                    tk.END,
+                    f"{os.path.basename(update['path'])}: {update['current']['version_number']} -> {update['latest']['version_number']}")
+            status_var.set(f"{len(updates)} updates, {len(result['up_to_date'])} up to date, "
+                           f"{len(result['unknown'])} not found for this loader/version")
+
+        task_manager.submit(
+            f"Check updates for mod profile '{selected}'",
+            check_updates_task, selected, loader_var.get(), version_var.get(),
+            on_done=show_updates,
+            on_error=lambda e: messagebox.showerror("Update Error", f"Failed to check for updates:\n{e}"),
+        )
+
+    def download_updates():
+        if not updates:
+            messagebox.showinfo("No Updates", "Nothing to update, check for updates first.")
+            return
 
-def import_mod_files():
-    file_paths = filedialog.askopenfilenames(
-        title="Select Mod Files (.jar)",
-        filetypes=[("Java Mod Files", "*.jar")]
-    )
-    if not file_paths:
-        return
+        def show_result(result):
+            updated, errors = result
+            if errors:
+                messagebox.showerror("Update Error", "Failed to update:\n" + "\n".join(errors))
+            messagebox.showinfo("Success", f"Updated {len(updated)} mods in profile '{selected}'.")
+            check_updates()
+
+        task_manager.submit(
+            f"Update {len(updates)} mods in profile '{selected}'",
+            apply_updates_task, selected, list(updates),
+            on_done=show_result,
+            on_error=lambda e: messagebox.showerror("Update Error", f"Failed to download updates:\n{e}"),
+        )
+
+    update_window = tk.Toplevel()
+    update_window.title(f"Update Mod Profile '{selected}'")
+    update_window.geometry("480x420")
+
+    tk.Label(update_window, text="Mod Loader").pack()
+    loader_var = tk.StringVar(value="fabric")
+    tk.OptionMenu(update_window, loader_var, "fabric", "forge", "neoforge", "quilt").pack(pady=5)
+
+    tk.Label(update_window, text="Minecraft Version").pack()
+    version_var = tk.StringVar(value="1.21.5")
+    version_combobox = ttk.Combobox(update_window, textvariable=version_var, values=[version_var.get()], height=15)
+    version_combobox.pack(pady=5)
 
-    selected = mod_selected_profile.get()
-    if selected == "No Profiles":
-        messagebox.showwarning("No Profile Selected", "Please create and select a mod profile first.")
-        return
+    tk.Button(update_window, text="Check for Updates", command=check_updates).pack(pady=5)
 
-    destination_folder = os.path.join(PROFILE_FOLDER, selected)
-    os.makedirs(destination_folder, exist_ok=True)
-    try:
-        for file_path in file_paths:
-            file_name = os.path.basename(file_path)
-            shutil.copy(file_path, os.path.join(destination_folder, file_name))
-        messagebox.showinfo("Success", f"Imported {len(file_paths)} files to mod profile '{selected}'.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to import mod files:\n{e}")
+    update_listbox = Listbox(update_window)
+    update_listbox.pack(expand=True, fill=tk.BOTH, padx=5, pady=5)
 
-def apply_mod_profile():
-    selected = mod_selected_profile.get()
-    if selected == "No Profiles":
-        messagebox.showwarning("No Profile Selected", "Please create and select a mod profile first.")
-        return
+    status_var = tk.StringVar(value="")
+    tk.Label(update_window, textvariable=status_var).pack()
 
-    profile_path = os.path.join(PROFILE_FOLDER, selected)
-    if not os.path.exists(profile_path):
-        messagebox.showerror("Error", f"Mod profile folder does not exist:\n{profile_path}")
+    tk.Button(update_window, text="Download Updates", command=download_updates).pack(pady=10)
+
+    def show_game_versions(version_options):
+        version_combobox.configure(values=version_options)
+        if version_var.get() not in version_options:
+            version_var.set(version_options[0])
+
+    task_manager.submit("Fetch Minecraft versions", fetch_game_versions_task, on_done=show_game_versions)
+
+def open_profile_info_window():
+    selected = selected_profile("mods")
+    if selected is None:
         return
 
-    try:
-        clear_folder(MODS_FOLDER)
-        copy_profile_files(profile_path, MODS_FOLDER)
-        messagebox.showinfo("Success", f"Applied mod profile '{selected}'.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to apply mod profile:\n{e}")
+    def show_info(result):
+        mods, duplicates, missing = result
+        info_window = tk.Toplevel()
+        info_window.title(f"Mod Profile '{selected}'")
+        info_window.geometry("520x480")
+
+        text = tk.Text(info_window, wrap=tk.NONE)
+        text_scrollbar = Scrollbar(info_window, command=text.yview)
+        text.configure(yscrollcommand=text_scrollbar.set)
+        text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text.pack(expand=True, fill=tk.BOTH)
+
+        if duplicates:
+            text.insert(tk.END, "Duplicate mods:\n")
+            for mod_id, file_names in duplicates.items():
+                text.insert(tk.END, f"  {mod_id}: {', '.join(file_names)}\n")
+            text.insert(tk.END, "\n")
+        if missing:
+            text.insert(tk.END, "Missing dependencies:\n")
+            for dep_id, file_names in missing.items():
+                text.insert(tk.END, f"  {dep_id} (needed by {', '.join(file_names)})\n")
+            text.insert(tk.END, "\n")
+        text.insert(tk.END, f"{len(mods)} mods:\n")
+        for mod in mods:
+            if mod["error"] or not mod["mod_id"]:
+                text.insert(tk.END, f"  {mod['file_name']} (unreadable: {mod['error'] or 'no mod manifest'})\n")
+            else:
+                text.insert(tk.END, f"  {mod['name']} {mod['version']} [{mod['loader']}] - {mod['file_name']}\n")
+        text.configure(state=tk.DISABLED)
+
+    task_manager.submit(
+        f"Index mod profile '{selected}'",
+        profile_info_task, selected,
+        on_done=show_info,
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to read mod profile:\n{e}"),
+    )
 
-# --- Functions for shaderpacks ---
+# --- Loadouts ---
 
-def refresh_shader_profiles():
-    profiles = get_profiles_in(SHADERPACK_PROFILE_FOLDER)
-    menu = shader_profile_dropdown["menu"]
-    menu.delete(0, "end")
-    if profiles:
-        for p in profiles:
-            menu.add_command(label=p, command=lambda value=p: shader_selected_profile.set(value))
-        shader_selected_profile.set(profiles[0])
-    else:
-        menu.add_command(label="No Profiles", command=lambda: shader_selected_profile.set("No Profiles"))
-        shader_selected_profile.set("No Profiles")
+def refresh_loadouts():
+    set_menu_options(loadout_dropdown, selected_loadout, loadouts.list_loadouts(), "No Loadouts")
 
-def create_shader_profile():
-    profile_name = shader_profile_name_entry.get().strip()
-    if not profile_name:
-        messagebox.showwarning("Input Error", "Please enter a shaderpack profile name.")
+def save_loadout():
+    profiles = {kind: selected_profiles[kind].get() for kind in PROFILE_SECTIONS
+                if selected_profiles[kind].get() != "No Profiles"}
+    if not profiles:
+        messagebox.showwarning("No Profiles", "Create and select at least one profile first.")
+        return
+    current = selected_loadout.get()
+    name = simpledialog.askstring(
+        "Save Loadout", f"Name for the loadout ({loadouts.describe(profiles)}):",
+        initialvalue="" if current == "No Loadouts" else current)
+    if not name or not name.strip():
         return
-    path = os.path.join(SHADERPACK_PROFILE_FOLDER, profile_name)
     try:
-        os.makedirs(path, exist_ok=True)
-        messagebox.showinfo("Success", f"Shaderpack profile created:\n{path}")
-        refresh_shader_profiles()
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to create shaderpack profile:\n{e}")
-
-def import_shader_files():
-    file_paths = filedialog.askopenfilenames(
-        title="Select Shaderpack Files (.zip)",
-        filetypes=[("Zip Files", "*.zip"), ("All Files", "*.*")]
-    )
-    if not file_paths:
+        loadouts.save_loadout(name.strip(), profiles)
+    except loadouts.LoadoutError as e:
+        messagebox.showerror("Error", f"Failed to save loadout:\n{e}")
         return
-
-    selected = shader_selected_profile.get()
-    if selected == "No Profiles":
-        messagebox.showwarning("No Profile Selected", "Please create and select a shader profile first.")
+    refresh_loadouts()
+    selected_loadout.set(name.strip())
+
+def show_loadout_applied(name, result):
+    results = result["applied"]
+    lines = []
+    for target, kinds in results.items():
+        prefix = "" if len(results) == 1 else f"{target} "
+        lines += [f"{prefix}{kind}: {format_sync_stats(stats)}" for kind, stats in kinds.items()]
+    # Recorded even after a failure, so Undo reaches the targets that were applied
+    applied([((kind, None if target == targets.DEFAULT_TARGET else target), stats)
+             for target, kinds in results.items() for kind, stats in kinds.items()],
+            f"Applied loadout '{name}'.\n" + "\n".join(lines), show=result["failed"] is None)
+    if result["failed"] is not None:
+        target, error = result["failed"]
+        messagebox.showerror("Error", f"Failed to apply loadout '{name}' to {target}; it was left unchanged, "
+                                      f"as were the targets after it. Already applied:\n" + "\n".join(lines)
+                                      + f"\n\n{error}")
+
+def apply_selected_loadout():
+    name = selected_loadout.get()
+    if name == "No Loadouts":
+        messagebox.showwarning("No Loadout Selected", "Save a loadout first.")
         return
-
-    destination_folder = os.path.join(SHADERPACK_PROFILE_FOLDER, selected)
-    os.makedirs(destination_folder, exist_ok=True)
     try:
-        for file_path in file_paths:
-            file_name = os.path.basename(file_path)
-            shutil.copy(file_path, os.path.join(destination_folder, file_name))
-        messagebox.showinfo("Success", f"Imported {len(file_paths)} files to shader profile '{selected}'.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to import shaderpack files:\n{e}")
-
-def apply_shader_profile():
-    selected = shader_selected_profile.get()
-    if selected == "No Profiles":
-        messagebox.showwarning("No Profile Selected", "Please create and select a shader profile first.")
+        profiles = loadouts.get_loadout(name)
+    except loadouts.LoadoutError as e:
+        messagebox.showerror("Error", str(e))
         return
-
-    profile_path = os.path.join(SHADERPACK_PROFILE_FOLDER, selected)
-    if not os.path.exists(profile_path):
-        messagebox.showerror("Error", f"Shader profile folder does not exist:\n{profile_path}")
+    check_packs_then(profiles, f"loadout '{name}'", lambda: task_manager.submit(
+        f"Apply loadout '{name}' ({loadouts.describe(profiles)})",
+        apply_loadout_task, name, snapshot=snapshot_before_apply.get(), target_names=selected_targets(),
+        on_done=lambda result: show_loadout_applied(name, result),
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to apply loadout '{name}', nothing was changed:\n{e}"),
+    ))
+
+def delete_selected_loadout():
+    name = selected_loadout.get()
+    if name == "No Loadouts" or not messagebox.askyesno("Delete Loadout", f"Delete loadout '{name}'? Its profiles are kept."):
         return
-
     try:
-        clear_folder(SHADERPACKS_FOLDER)
-        copy_profile_files(profile_path, SHADERPACKS_FOLDER)
-        messagebox.showinfo("Success", f"Applied shader profile '{selected}'.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to apply shader profile:\n{e}")
+        loadouts.delete_loadout(name)
+    except loadouts.LoadoutError as e:
+        messagebox.showerror("Error", str(e))
+    refresh_loadouts()
+
+# --- Apply history ---
+
+# (kind, target) pairs whose game folders were swapped in together (one apply or one
+# loadout), oldest first; target None is the default game folder
+applied_groups = []
+
+def applied(changes, message, show=True):
+    """Record [((kind, target), sync stats)] from one apply in the history.
+
+    Only folders a staged apply swapped in can be undone. A folder synced in place has
+    lost its previous contents, so every group holding it is dropped.
+    """
+    in_place = {folder for folder, stats in changes if "swapped" not in stats}
+    applied_groups[:] = [group for group in applied_groups if not in_place.intersection(group)]
+    folders = [folder for folder, stats in changes if stats.get("swapped")]
+    if folders:
+        if folders in applied_groups:
+            applied_groups.remove(folders)
+        applied_groups.append(folders)
+    if show:
+        messagebox.showinfo("Success", message)
+
+def undo_last_apply():
+    group = next((g for g in reversed(applied_groups)
+                  if all(can_rollback(core.game_folder(kind, target)) for kind, target in g)), None)
+    if group is None:
+        messagebox.showinfo("Nothing to Undo", "No staged apply to roll back.")
+        return
+    folders = [core.game_folder(kind, target) for kind, target in group]
+
+    def undone(result):
+        # Undoing again would redo it, so the group is no longer in the history
+        if group in applied_groups:
+            applied_groups.remove(group)
+        messagebox.showinfo("Success", "Restored the previous contents of:\n" + "\n".join(folders))
+
+    task_manager.submit(
+        f"Roll back {', '.join(os.path.basename(f) for f in folders)}",
+        rollback_group_task, group,
+        on_done=undone,
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to roll back:\n{e}"),
+    )
 
-# --- Functions for resourcepacks ---
+# --- Targets ---
 
-def refresh_resource_profiles():
-    profiles = get_profiles_in(RESOURCEPACK_PROFILE_FOLDER)
-    menu = resource_profile_dropdown["menu"]
-    menu.delete(0, "end")
-    if profiles:
-        for p in profiles:
-            menu.add_command(label=p, command=lambda value=p: resource_selected_profile.set(value))
-        resource_selected_profile.set(profiles[0])
-    else:
-        menu.add_command(label="No Profiles", command=lambda: resource_selected_profile.set("No Profiles"))
-        resource_selected_profile.set("No Profiles")
+# Target names in the order target_listbox shows them
+shown_targets = []
 
-def create_resource_profile():
-    profile_name = resource_profile_name_entry.get().strip()
-    if not profile_name:
-        messagebox.showwarning("Input Error", "Please enter a resourcepack profile name.")
-        return
-    path = os.path.join(RESOURCEPACK_PROFILE_FOLDER, profile_name)
+def refresh_targets():
+    target_listbox.delete(0, tk.END)
     try:
-        os.makedirs(path, exist_ok=True)
-        messagebox.showinfo("Success", f"Resourcepack profile created:\n{path}")
-        refresh_resource_profiles()
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to create resourcepack profile:\n{e}")
-
-def import_resource_files():
-    file_paths = filedialog.askopenfilenames(
-        title="Select Resourcepack Files (.zip or folder)",
-        filetypes=[("Zip Files", "*.zip"), ("All Files", "*.*")]
-    )
-    if not file_paths:
+        shown_targets[:] = targets.list_targets()
+    except targets.TargetError as e:
+        shown_targets[:] = [targets.DEFAULT_TARGET]
+        messagebox.showerror("Error", str(e))
+    for name in shown_targets:
+        target_listbox.insert(tk.END, targets.describe(name))
+
+def selected_targets():
+    """Names of the targets picked in the list; the default game folder if none are."""
+    names = [shown_targets[i] for i in target_listbox.curselection()]
+    return names or [targets.DEFAULT_TARGET]
+
+def add_target():
+    folder = filedialog.askdirectory(title="Select a Game Directory, Instance Folder or Server Folder")
+    if not folder:
         return
-
-    selected = resource_selected_profile.get()
-    if selected == "No Profiles":
-        messagebox.showwarning("No Profile Selected", "Please create and select a resource profile first.")
+    name = simpledialog.askstring("Add Target", "Name for the target:", initialvalue=os.path.basename(folder))
+    if not name or not name.strip():
         return
-
-    destination_folder = os.path.join(RESOURCEPACK_PROFILE_FOLDER, selected)
-    os.makedirs(destination_folder, exist_ok=True)
     try:
-        for file_path in file_paths:
-            file_name = os.path.basename(file_path)
-            shutil.copy(file_path, os.path.join(destination_folder, file_name))
-        messagebox.showinfo("Success", f"Imported {len(file_paths)} files to resource profile '{selected}'.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to import resourcepack files:\n{e}")
-
-def apply_resource_profile():
-    selected = resource_selected_profile.get()
-    if selected == "No Profiles":
-        messagebox.showwarning("No Profile Selected", "Please create and select a resource profile first.")
+        targets.add_target(name.strip(), folder)
+    except targets.TargetError as e:
+        messagebox.showerror("Error", f"Failed to add target:\n{e}")
         return
+    refresh_targets()
 
-    profile_path = os.path.join(RESOURCEPACK_PROFILE_FOLDER, selected)
-    if not os.path.exists(profile_path):
-        messagebox.showerror("Error", f"Resource profile folder does not exist:\n{profile_path}")
+def remove_selected_targets():
+    names = [name for name in selected_targets() if name != targets.DEFAULT_TARGET]
+    if not names or not messagebox.askyesno("Remove Targets", f"Remove {', '.join(names)}? Their folders are kept."):
         return
-
-    try:
-        clear_folder(RESOURCEPACKS_FOLDER)
-        copy_profile_files(profile_path, RESOURCEPACKS_FOLDER)
-        messagebox.showinfo("Success", f"Applied resource profile '{selected}'.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to apply resource profile:\n{e}")
+    for name in names:
+        try:
+            targets.remove_target(name)
+        except targets.TargetError as e:
+            messagebox.showerror("Error", str(e))
+    refresh_targets()
+
+# --- Snapshots ---
+
+def open_snapshots_window():
+    shown = []
+
+    def refresh():
+        shown[:] = snapshots.list_snapshots()
+        snapshot_list.delete(0, tk.END)
+        for snapshot in shown:
+            snapshot_list.insert(tk.END, f"[{snapshot['kind']}] " + snapshots.describe(snapshot)
+                                 + ("  (auto)" if snapshot.get("auto") else ""))
+        file_list.delete(0, tk.END)
+
+    def selected_snapshots():
+        return [shown[i] for i in snapshot_list.curselection()]
+
+    def show_files(event=None):
+        file_list.delete(0, tk.END)
+        picked = selected_snapshots()
+        if len(picked) == 1:
+            for rel_path in sorted(snapshots.load(picked[0]["id"])["files"]):
+                file_list.insert(tk.END, rel_path)
+
+    def one_snapshot():
+        picked = selected_snapshots()
+        if len(picked) != 1:
+            messagebox.showwarning("Select a Snapshot", "Please select one snapshot.")
+            return None
+        return picked[0]
+
+    def restored(result, target):
+        refresh()
+        message = (f"Restored into {target}: {result['restored']} files restored, "
+                   f"{result['removed']} removed, {result['unchanged']} already matched.")
+        if result["errors"]:
+            messagebox.showerror("Restored With Errors", message + "\n\nFailed:\n" + "\n".join(result["errors"]))
+        else:
+            messagebox.showinfo("Snapshot Restored", message)
+
+    def restore(selected_files=False, as_profile=False):
+        snapshot = one_snapshot()
+        if snapshot is None:
+            return
+        paths = [file_list.get(i) for i in file_list.curselection()] if selected_files else None
+        if selected_files and not paths:
+            messagebox.showwarning("No Files Selected", "Select the files to restore first.")
+            return
+        profile = None
+        if as_profile:
+            profile = simpledialog.askstring("Restore as Profile", f"Restore into {snapshot['kind']} profile:")
+            if not profile or not profile.strip():
+                return
+            profile = profile.strip()
+        elif not messagebox.askyesno(
+                "Restore Snapshot",
+                f"Restore {len(paths) if paths else 'all'} files of '{snapshot['label']}' into the game folder?"
+                + ("" if paths else " Files not in the snapshot are removed.")
+                + " The game folder is snapshotted first."):
+            return
+        target = f"{snapshot['kind']} profile '{profile}'" if profile else core.game_folder(snapshot["kind"])
+        task_manager.submit(
+            f"Restore snapshot {snapshot['id']}", restore_snapshot_task, snapshot["id"], profile, paths,
+            on_done=lambda result: (refresh_profiles(snapshot["kind"]) if profile else None, restored(result, target)),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to restore snapshot:\n{e}"),
+        )
+
+    def take():
+        task_manager.submit(
+            "Snapshot game folders", take_snapshots_task, list(PROFILE_SECTIONS),
+            on_done=lambda taken: (refresh(), messagebox.showinfo("Snapshots Taken", f"Took {len(taken)} snapshots.")),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to take snapshots:\n{e}"),
+        )
+
+    def export():
+        picked = selected_snapshots()
+        if not picked:
+            messagebox.showwarning("Select Snapshots", "Please select the snapshots to export.")
+            return
+        out_path = filedialog.asksaveasfilename(defaultextension=".zip", initialfile="snapshots.zip",
+                                                filetypes=[("Snapshot archives", "*.zip")])
+        if not out_path:
+            return
+        task_manager.submit(
+            f"Export {len(picked)} snapshots", export_snapshots_task, [s["id"] for s in picked], out_path,
+            on_done=lambda result: messagebox.showinfo(
+                "Snapshots Exported", f"Wrote {out_path}\n{result['snapshots']} snapshots, {result['blobs']} unique files "
+                                      f"({format_size(result['bytes'])} before compression)"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export snapshots:\n{e}"),
+        )
+
+    def import_archive():
+        path = filedialog.askopenfilename(filetypes=[("Snapshot archives", "*.zip")])
+        if not path:
+            return
+        task_manager.submit(
+            f"Import snapshots from {os.path.basename(path)}", import_snapshots_task, path,
+            on_done=lambda imported: (refresh(), messagebox.showinfo("Snapshots Imported", f"Imported {len(imported)} snapshots.")),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to import snapshots:\n{e}"),
+        )
+
+    def delete():
+        picked = selected_snapshots()
+        if not picked or not messagebox.askyesno("Delete Snapshots", f"Delete {len(picked)} snapshots?"):
+            return
+        for snapshot in picked:
+            try:
+                snapshots.delete(snapshot["id"])
+            except snapshots.SnapshotError as e:
+                messagebox.showerror("Error", str(e))
+        refresh()
+
+    snapshot_window = tk.Toplevel(root)
+    snapshot_window.title("Snapshots")
+    snapshot_window.geometry("720x560")
+
+    snapshot_list = Listbox(snapshot_window, selectmode=tk.EXTENDED, height=12, exportselection=False)
+    snapshot_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+    snapshot_list.bind("<<ListboxSelect>>", show_files)
+
+    tk.Label(snapshot_window, text="Files in the selected snapshot").pack()
+    file_list = Listbox(snapshot_window, selectmode=tk.EXTENDED, height=10, exportselection=False)
+    file_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 5))
+
+    restore_frame = tk.Frame(snapshot_window)
+    restore_frame.pack(pady=5)
+    tk.Button(restore_frame, text="Restore to Game Folder", command=restore).pack(side=tk.LEFT)
+    tk.Button(restore_frame, text="Restore Selected Files",
+              command=lambda: restore(selected_files=True)).pack(side=tk.LEFT, padx=(5, 0))
+    tk.Button(restore_frame, text="Restore as Profile",
+              command=lambda: restore(as_profile=True)).pack(side=tk.LEFT, padx=(5, 0))
+
+    manage_frame = tk.Frame(snapshot_window)
+    manage_frame.pack(pady=(0, 10))
+    tk.Button(manage_frame, text="Snapshot Game Folders Now", command=take).pack(side=tk.LEFT)
+    tk.Button(manage_frame, text="Export Selected", command=export).pack(side=tk.LEFT, padx=(5, 0))
+    tk.Button(manage_frame, text="Import", command=import_archive).pack(side=tk.LEFT, padx=(5, 0))
+    tk.Button(manage_frame, text="Delete", command=delete).pack(side=tk.LEFT, padx=(5, 0))
+
+    refresh()
+
+# --- Storage ---
+
+def dedupe_all_profiles():
+    task_manager.submit(
+        "Deduplicate profile storage", dedupe_profiles_task,
+        on_done=lambda freed: messagebox.showinfo("Success", f"Profile storage deduplicated, {format_size(freed)} freed."),
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to deduplicate profiles:\n{e}"),
+    )
 
 # --- Layout ---
 
@@ -365,48 +807,106 @@ def section_label(text):
 
 
 #Extra Menu for Modrinth integration
+SEARCH_PAGE_SIZE = 50
+SEARCH_DEBOUNCE_MS = 250
+# Pages are only fetched once scrolling pauses this long, so flicking past them is free
+SCROLL_SETTLE_MS = 150
+
 def open_modrinth_window():
-    def search_mods():
+    def search_mods(show_warning=True):
         query = search_entry.get().strip()
         if not query:
-            messagebox.showwarning("Input Error", "Please enter a search term.")
+            if show_warning:
+                messagebox.showwarning("Input Error", "Please enter a search term.")
             return
-
-        selected_loader = loader_var.get()
-        selected_version = version_var.get()
-
-        listbox.delete(0, tk.END)
+        key = (query, loader_var.get(), version_var.get())
+        if key == search["key"]:
+            return
+        start_search(key)
+
+    def start_search(key):
+        # Drop whatever the previous query still has queued or in flight
+        for task in search["tasks"].values():
+            task.cancel()
+        search["key"] = key
+        search["generation"] += 1
+        search["tasks"] = {}
+        search["source"] = None
         mods.clear()
+        listbox.clear()
+        if key is None:
+            status_var.set("")
+            return
+        status_var.set("Searching...")
+        load_page(0)
 
-        try:
-            response = requests.get("https://api.modrinth.com/v2/search", params={"query": query, "limit": 20})
-            response.raise_for_status()
-            data = response.json()
-
-            for mod in data["hits"]:
-                mod_id = mod["project_id"]
-                # Fetch versions for this mod
-                version_res = requests.get(f"https://api.modrinth.com/v2/project/{mod_id}/version")
-                version_res.raise_for_status()
-                versions = version_res.json()
-
-                # Check if any version matches filters
-                matching_versions = [
-                    v for v in versions
-                    if selected_loader in v.get("loaders", [])
-                       and selected_version in v.get("game_versions", [])
-                ]
-
-                if matching_versions:
-                    mods.append((mod["title"], mod_id))
-                    listbox.insert(tk.END, mod["title"])
-
-            if not mods:
-                messagebox.showinfo("No Mods Found",
-                                    f"No mods found for loader '{selected_loader}' and version '{selected_version}'.")
+    def load_page(page):
+        if search["key"] is None or page in search["tasks"]:
+            return
+        generation = search["generation"]
+        query, selected_loader, selected_version = search["key"]
 
-        except Exception as e:
-            messagebox.showerror("API Error", f"Failed to fetch mods:\n{e}")
+        def show_page(data):
+            if generation != search["generation"]:
+                return
+            if page == 0:
+                # Later pages must come from wherever the first one did, or the rows won't line up
+                search["source"] = data.get("source")
+            first = page * SEARCH_PAGE_SIZE
+            for i, mod in enumerate(data["hits"]):
+                mods[first + i] = (mod["title"], mod["project_id"])
+            listbox.set_count(data.get("total_hits", len(mods)))
+            listbox.set_rows(first, [mod["title"] for mod in data["hits"]])
+
+            import http_cache
+            cache_stats = http_cache.get_stats()
+            if data.get("source") == "catalog":
+                source = "offline catalog"
+            else:
+                source = f"cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses"
+            if listbox.count:
+                status_var.set(f"{len(mods)} of {listbox.count} results loaded, last page in "
+                               f"{data['elapsed'] * 1000:.0f} ms ({source})")
+            else:
+                status_var.set(f"No mods found for loader '{selected_loader}' and version '{selected_version}'.")
+
+        def show_error(e):
+            if generation != search["generation"]:
+                return
+            search["tasks"].pop(page, None)
+            status_var.set(f"Search failed: {e}")
+
+        # Loader and game version are filtered through facets, so each page is a single request
+        search["tasks"][page] = task_manager.submit(
+            f"Search Modrinth for '{query}'" + (f" (page {page + 1})" if page else ""),
+            search_page_task, query, selected_loader, selected_version, page * SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE,
+            search["source"] if page else None, on_done=show_page, on_error=show_error,
+        )
+
+    def schedule_search(*args):
+        if search["debounce"]:
+            mod_window.after_cancel(search["debounce"])
+        if not search_entry.get().strip():
+            search["debounce"] = None
+            start_search(None)
+            return
+        search["debounce"] = mod_window.after(SEARCH_DEBOUNCE_MS, lambda: search_mods(show_warning=False))
+
+    def load_visible_pages(first, last):
+        search["scroll"] = None
+        wanted = set(range(first // SEARCH_PAGE_SIZE, last // SEARCH_PAGE_SIZE + 1))
+        # Pages scrolled out of view before their request started are not worth fetching
+        for page, task in list(search["tasks"].items()):
+            if page not in wanted and task.status == "queued":
+                task.cancel()
+                del search["tasks"][page]
+        for page in sorted(wanted):
+            load_page(page)
+
+    def need_rows(first, last):
+        if search["scroll"]:
+            mod_window.after_cancel(search["scroll"])
+        search["scroll"] = mod_window.after(SCROLL_SETTLE_MS, lambda: load_visible_pages(first, last))
 
     def download_selected():
         selection = listbox.curselection()
@@ -414,71 +914,53 @@ def open_modrinth_window():
             messagebox.showwarning("No Selection", "Please select a mod to download.")
             return
 
-        index = selection[0]
-        mod_name, mod_id = mods[index]
+        selected_mods = [mods[index] for index in selection if index in mods]
+        if not selected_mods:
+            return
 
         selected_loader = loader_var.get()
         selected_version = version_var.get()
 
-        try:
-            version_res = requests.get(f"https://api.modrinth.com/v2/project/{mod_id}/version")
-            version_res.raise_for_status()
-            versions = version_res.json()
-
-            # Filter by selected loader and game version
-            matching_versions = [
-                v for v in versions
-                if selected_loader in v.get("loaders", [])
-                and selected_version in v.get("game_versions", [])
-            ]
-
-            if not matching_versions:
-                raise Exception(f"No matching versions for loader '{selected_loader}' and Minecraft '{selected_version}'.")
-
-            file_info = matching_versions[0]["files"][0]
-            download_url = file_info["url"]
-            file_name = file_info["filename"]
-
-            profile_name = simpledialog.askstring("Choose Profile", "Enter the profile name to download this mod into:")
-            if not profile_name:
-                return
-
-            dest_folder = os.path.join(PROFILE_FOLDER, profile_name)
-            os.makedirs(dest_folder, exist_ok=True)
-
-            file_path = os.path.join(dest_folder, file_name)
-            with open(file_path, "wb") as f:
-                file_data = requests.get(download_url)
-                f.write(file_data.content)
-
-            messagebox.showinfo("Success", f"Downloaded '{file_name}' to profile '{profile_name}'")
-
-        except Exception as e:
-            messagebox.showerror("Download Error", f"Failed to download mod:\n{e}")
+        profile_name = simpledialog.askstring("Choose Profile", "Enter the profile name to download this mod into:")
+        if not profile_name:
+            return
 
-    # Fetch Minecraft release versions (excluding snapshots) and sort properly
-    try:
-        ver_response = requests.get("https://api.modrinth.com/v2/tag/game_version")
-        ver_response.raise_for_status()
-        all_versions = ver_response.json()
-        version_options = [
-            v["version"] for v in all_versions if v.get("version_type") == "release"
-        ]
-        version_options = sorted(version_options, key=parse_version, reverse=True)
-    except Exception as e:
-        messagebox.showerror("Version Fetch Error", f"Could not fetch Minecraft versions:\n{e}")
-        version_options = ["1.21.5", "1.20.1"]
+        def show_result(result):
+            downloaded, errors = result
+            if errors:
+                messagebox.showerror("Download Error", "Failed to download:\n" + "\n".join(errors))
+            if downloaded:
+                messagebox.showinfo("Success", f"Downloaded {', '.join(downloaded)} to profile '{profile_name}'")
+
+        name = selected_mods[0][0] if len(selected_mods) == 1 else f"{len(selected_mods)} mods"
+        task_manager.submit(
+            f"Download {name}",
+            download_mods_task, [mod_id for _, mod_id in selected_mods], selected_loader, selected_version, profile_name,
+            on_done=show_result,
+            on_error=lambda e: messagebox.showerror("Download Error", f"Failed to download mod:\n{e}"),
+        )
+
+    def show_game_versions(version_options):
+        version_combobox.configure(values=version_options)
+        if version_var.get() not in version_options:
+            version_var.set(version_options[0])
+
+    # Shown until the real list arrives from the background fetch
+    version_options = ["1.21.5", "1.20.1"]
 
     # Mod Loader options
     loader_options = ["fabric", "forge", "neoforge", "quilt"]
 
     mod_window = tk.Toplevel()
     mod_window.title("Search Modrinth Mods")
-    mod_window.geometry("420x520")
+    mod_window.geometry("420x560")
 
     search_entry = tk.Entry(mod_window, width=30)
     search_entry.pack(pady=5)
 
+    search_entry.bind("<KeyRelease>", schedule_search)
+    search_entry.bind("<Return>", lambda e: search_mods())
+
     search_btn = tk.Button(mod_window, text="Search", command=search_mods)
     search_btn.pack(pady=5)
 
@@ -495,97 +977,367 @@ def open_modrinth_window():
     version_combobox.pack(pady=5)
     version_combobox.state(["readonly"])  # Make it readonly dropdown
 
-    # Mod list
-    list_frame = tk.Frame(mod_window)
-    list_frame.pack(expand=True, fill=tk.BOTH, pady=5)
+    # Mod list, drawing only the visible rows and fetching pages as they scroll into view
+    listbox = VirtualList(mod_window, on_need_rows=need_rows)
+    listbox.pack(expand=True, fill=tk.BOTH, pady=5)
 
+    status_var = tk.StringVar(value="")
+    tk.Label(mod_window, textvariable=status_var).pack()
+
+    download_btn = tk.Button(mod_window, text="Download to Profile", command=download_selected)
+    download_btn.pack(pady=10)
+
+    def sync_catalog():
+        task_manager.submit(
+            "Sync offline Modrinth catalog", sync_catalog_task,
+            on_done=lambda changed: status_var.set(
+                f"Offline catalog synced: {sum(changed.values())} projects added or updated"),
+            on_error=lambda e: messagebox.showerror(
+                "Catalog Sync Error", f"Catalog sync stopped (it will resume next time):\n{e}"),
+        )
+
+    sync_btn = tk.Button(mod_window, text="Sync Offline Catalog", command=sync_catalog)
+    sync_btn.pack()
+
+    mods = {}  # row index -> (title, project id)
+    search = {"key": None, "generation": 0, "tasks": {}, "debounce": None, "scroll": None, "source": None}
+    loader_var.trace_add("write", schedule_search)
+    version_var.trace_add("write", schedule_search)
+
+    task_manager.submit(
+        "Fetch Minecraft versions", fetch_game_versions_task,
+        on_done=show_game_versions,
+        on_error=lambda e: messagebox.showerror("Version Fetch Error", f"Could not fetch Minecraft versions:\n{e}"),
+    )
+
+def open_modpack_window():
+    def search_packs():
+        query = search_entry.get().strip()
+        selected_version = version_var.get()
+        listbox.delete(0, tk.END)
+        packs.clear()
+        status_var.set("Searching...")
+
+        def show_results(data):
+            for pack in data["hits"]:
+                packs.append((pack["title"], pack["project_id"]))
+                listbox.insert(tk.END, f"{pack['title']} ({pack.get('downloads', 0)} downloads)")
+            status_var.set(f"{len(packs)} of {data.get('total_hits', len(packs))} modpacks in {data['elapsed'] * 1000:.0f} ms")
+
+        task_manager.submit(
+            f"Search modpacks for '{query}'",
+            lambda task: core.search_modpacks(query, selected_version),
+            on_done=show_results,
+            on_error=lambda e: (status_var.set(""), messagebox.showerror("API Error", f"Failed to fetch modpacks:\n{e}")),
+        )
+
+    def show_installed(summary):
+        for kind in PROFILE_SECTIONS:
+            refresh_profiles(kind)
+        requires = ", ".join(f"{key} {value}" for key, value in summary["dependencies"].items())
+        message = (f"Installed {summary['name']}: {summary['downloaded']} files downloaded, "
+                   f"{summary['extracted']} from overrides.\n\nRequires {requires}")
+        if summary["errors"]:
+            messagebox.showerror("Modpack Installed With Errors", message + "\n\nFailed:\n" + "\n".join(summary["errors"]))
+        else:
+            messagebox.showinfo("Modpack Installed", message)
+
+    def install(pack, title):
+        profile_name = simpledialog.askstring("Profile Name", "Install the modpack as profile:", initialvalue=title)
+        if not profile_name:
+            return
+        task_manager.submit(
+            f"Install modpack {title}",
+            install_modpack_task, pack, profile_name, version_var.get(),
+            on_done=show_installed,
+            on_error=lambda e: messagebox.showerror("Modpack Error", f"Failed to install modpack:\n{e}"),
+        )
+
+    def install_selected():
+        selection = listbox.curselection()
+        if not selection:
+            messagebox.showwarning("No Selection", "Please select a modpack to install.")
+            return
+        title, project_id = packs[selection[0]]
+        install(project_id, title)
+
+    def install_from_file():
+        path = filedialog.askopenfilename(filetypes=[("Modrinth modpacks", "*.mrpack")])
+        if path:
+            install(path, os.path.splitext(os.path.basename(path))[0])
+
+    def export_profile():
+        selected = selected_profile("mods")
+        if selected is None:
+            return
+        out_path = filedialog.asksaveasfilename(defaultextension=".mrpack", initialfile=f"{selected}.mrpack",
+                                                filetypes=[("Modrinth modpacks", "*.mrpack")])
+        if not out_path:
+            return
+        loader_version = simpledialog.askstring(
+            "Loader Version", f"{loader_var.get()} version the pack needs (leave empty to skip):")
+        task_manager.submit(
+            f"Export '{selected}' as modpack",
+            export_modpack_task, selected, out_path, version_var.get(), loader_var.get(), loader_version or None,
+            on_done=lambda result: messagebox.showinfo(
+                "Modpack Exported", f"Wrote {out_path}\n{result['downloads']} files linked to Modrinth, "
+                                    f"{result['overrides']} packed as overrides"),
+            on_error=lambda e: messagebox.showerror("Export Error", f"Failed to export modpack:\n{e}"),
+        )
+
+    def show_game_versions(version_options):
+        version_combobox.configure(values=version_options)
+        if version_var.get() not in version_options:
+            version_var.set(version_options[0])
+
+    pack_window = tk.Toplevel()
+    pack_window.title("Official Modpacks")
+    pack_window.geometry("420x560")
+
+    search_entry = tk.Entry(pack_window, width=30)
+    search_entry.pack(pady=5)
+    tk.Button(pack_window, text="Search", command=search_packs).pack(pady=5)
+
+    tk.Label(pack_window, text="Select Minecraft Version").pack()
+    version_var = tk.StringVar(value="1.21.5")
+    version_combobox = ttk.Combobox(pack_window, textvariable=version_var, values=["1.21.5", "1.20.1"], height=15)
+    version_combobox.pack(pady=5)
+    version_combobox.state(["readonly"])
+
+    list_frame = tk.Frame(pack_window)
+    list_frame.pack(expand=True, fill=tk.BOTH, pady=5)
     scrollbar = Scrollbar(list_frame)
     scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
     listbox = Listbox(list_frame, yscrollcommand=scrollbar.set)
     listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     scrollbar.config(command=listbox.yview)
 
-    download_btn = tk.Button(mod_window, text="Download to Profile", command=download_selected)
-    download_btn.pack(pady=10)
+    status_var = tk.StringVar(value="")
+    tk.Label(pack_window, textvariable=status_var).pack()
+
+    tk.Button(pack_window, text="Install Selected Modpack", command=install_selected).pack(pady=(10, 0))
+    tk.Button(pack_window, text="Install From .mrpack File", command=install_from_file).pack(pady=5)
+
+    # Export uses the mod profile selected in the main window
+    export_frame = tk.Frame(pack_window)
+    export_frame.pack(pady=5)
+    loader_var = tk.StringVar(value="fabric")
+    tk.OptionMenu(export_frame, loader_var, "fabric", "forge", "neoforge", "quilt").pack(side=tk.LEFT)
+    tk.Button(export_frame, text="Export Selected Mod Profile", command=export_profile).pack(side=tk.LEFT, padx=5)
+
+    packs = []
+
+    task_manager.submit(
+        "Fetch Minecraft versions", fetch_game_versions_task,
+        on_done=show_game_versions,
+        on_error=lambda e: messagebox.showerror("Version Fetch Error", f"Could not fetch Minecraft versions:\n{e}"),
+    )
+
+# --- Timings ---
+
+def open_timings_window():
+    timings_window = tk.Toplevel()
+    timings_window.title("Timings")
+    timings_window.geometry("720x420")
+
+    recording = tk.BooleanVar(timings_window, value=tracing.is_enabled())
+
+    def refresh():
+        operation = tracing.last_operation()
+        text.configure(state=tk.NORMAL)
+        text.delete("1.0", tk.END)
+        if not tracing.is_enabled() and operation is None:
+            text.insert(tk.END, "Turn on recording, then run an apply, import or search.\n")
+        else:
+            if operation is not None:
+                text.insert(tk.END, f"Slowest spans of the last {operation.name} ({operation.duration * 1000:.0f} ms):\n\n")
+            text.insert(tk.END, tracing.format_slowest(25) + "\n")
+        text.configure(state=tk.DISABLED)
+
+    def toggle_recording():
+        tracing.enable(recording.get())
+        refresh()
+
+    def save_trace():
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("JSON lines", "*.jsonl")],
+        )
+        if path:
+            tracing.export(path)
+
+    controls = tk.Frame(timings_window)
+    controls.pack(fill=tk.X)
+    tk.Checkbutton(controls, text="Record timing spans", variable=recording, command=toggle_recording).pack(side=tk.LEFT)
+    tk.Button(controls, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+    tk.Button(controls, text="Clear", command=lambda: (tracing.reset(), refresh())).pack(side=tk.LEFT)
+    tk.Button(controls, text="Save Trace...", command=save_trace).pack(side=tk.LEFT, padx=5)
+
+    text = tk.Text(timings_window, wrap=tk.NONE)
+    text_scrollbar = Scrollbar(timings_window, command=text.yview)
+    text.configure(yscrollcommand=text_scrollbar.set)
+    text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    text.pack(expand=True, fill=tk.BOTH)
+    refresh()
+
+# --- Tasks panel ---
+
+def cancel_selected_task():
+    selection = task_listbox.curselection()
+    if selection and selection[0] < len(task_panel_tasks):
+        task_panel_tasks[selection[0]].cancel()
+
+def update_task_panel(manager):
+    tasks = list(reversed(manager.tasks))
+    lines = [t.describe() for t in tasks]
+    if lines != list(task_listbox.get(0, tk.END)):
+        selection = task_listbox.curselection()
+        task_listbox.delete(0, tk.END)
+        for line in lines:
+            task_listbox.insert(tk.END, line)
+        if selection and selection[0] < len(lines):
+            task_listbox.selection_set(selection[0])
+    task_panel_tasks[:] = tasks
+
+    running = [t for t in tasks if t.status == "running"]
+    fractions = [t.fraction for t in running if t.fraction is not None]
+    if running and not fractions:
+        if str(task_progress["mode"]) != "indeterminate":
+            task_progress.configure(mode="indeterminate")
+            task_progress.start(15)
+    else:
+        if str(task_progress["mode"]) != "determinate":
+            task_progress.stop()
+            task_progress.configure(mode="determinate")
+        task_progress["value"] = sum(fractions) / len(fractions) * 100 if fractions else 0
+
+def on_close():
+    task_manager.shutdown()
+    inventory.stop()
+    root.destroy()
+
+# --- GUI Setup ---
+
+task_panel_tasks = []
+
+def main():
+    global root, task_manager, staged_apply_enabled, snapshot_before_apply, task_progress, task_listbox
+    global loadout_dropdown, selected_loadout, target_listbox
+
+    root = tk.Tk()
+    root.geometry("600x1460")
+    root.title("ScrubCraft Modding Manager")
+
+    icon_path = resource_path("icon.png")
+    try:
+        icon = tk.PhotoImage(file=icon_path)
+        root.iconphoto(True, icon)
+    except Exception as e:
+        print(f"Failed to load icon: {e}")
+
+
+    try:
+        icon = tk.PhotoImage(file="icon.png")
+        root.iconphoto(True, icon)
+    except Exception:
+        pass
+
+    # --- Variables ---
+
+    task_manager = TaskManager()
+    inventory.start()
+    staged_apply_enabled = tk.BooleanVar(root, value=True)
+    snapshot_before_apply = tk.BooleanVar(root, value=True)
+
+    build_profile_section("mods")
+
+    mod_update_button = tk.Button(root, text="Update Mod Profile", command=open_update_window)
+    mod_update_button.pack(pady=(5, 0))
+
+    mod_info_button = tk.Button(root, text="Mod Profile Info", command=open_profile_info_window)
+    mod_info_button.pack(pady=5)
 
-    mods = []
+    build_profile_section("shaders")
+    build_profile_section("resources")
 
-# Mods UI
-section_label("Mod Profiles")
+    # Loadouts UI
+    section_label("Loadouts")
 
-mod_profiles = get_profiles_in(PROFILE_FOLDER)
-if mod_profiles:
-    mod_options = mod_profiles
-else:
-    mod_options = ["No Profiles"]
-    mod_selected_profile.set("No Profiles")
-mod_profile_dropdown = tk.OptionMenu(root, mod_selected_profile, *mod_options)
-mod_profile_dropdown.pack()
+    selected_loadout = tk.StringVar(root)
+    loadout_dropdown = tk.OptionMenu(root, selected_loadout, "")
+    loadout_dropdown.pack()
+    refresh_loadouts()
 
-mod_profile_name_entry = tk.Entry(root)
-mod_profile_name_entry.pack(pady=5)
+    loadout_frame = tk.Frame(root)
+    loadout_frame.pack(pady=5)
+    loadout_apply_button = tk.Button(loadout_frame, text="Apply Loadout", command=apply_selected_loadout)
+    loadout_apply_button.pack(side=tk.LEFT)
+    loadout_save_button = tk.Button(loadout_frame, text="Save Selected Profiles as Loadout", command=save_loadout)
+    loadout_save_button.pack(side=tk.LEFT, padx=(5, 0))
+    loadout_delete_button = tk.Button(loadout_frame, text="Delete", command=delete_selected_loadout)
+    loadout_delete_button.pack(side=tk.LEFT, padx=(5, 0))
 
-mod_create_profile_button = tk.Button(root, text="Create Mod Profile", command=create_mod_profile)
-mod_create_profile_button.pack()
+    # Targets UI
+    section_label("Targets")
+    tk.Label(root, text="Apply to the selected targets (none selected: the default game folder)", fg="gray").pack()
 
-mod_import_button = tk.Button(root, text="Import Mods (.jar)", command=import_mod_files)
-mod_import_button.pack(pady=5)
+    target_listbox = Listbox(root, selectmode=tk.EXTENDED, height=4, width=70, exportselection=False)
+    target_listbox.pack()
+    refresh_targets()
 
-mod_apply_button = tk.Button(root, text="Apply Mod Profile", command=apply_mod_profile)
-mod_apply_button.pack()
+    target_frame = tk.Frame(root)
+    target_frame.pack(pady=5)
+    add_target_button = tk.Button(target_frame, text="Add Target", command=add_target)
+    add_target_button.pack(side=tk.LEFT)
+    remove_target_button = tk.Button(target_frame, text="Remove", command=remove_selected_targets)
+    remove_target_button.pack(side=tk.LEFT, padx=(5, 0))
 
-# Shaderpacks UI
-section_label("Shaderpack Profiles")
+    staged_apply_check = tk.Checkbutton(root, text="Staged apply (swap in when complete, keep previous for undo)",
+                                        variable=staged_apply_enabled)
+    staged_apply_check.pack(pady=(20, 0))
+    snapshot_check = tk.Checkbutton(root, text="Snapshot game folders before applying",
+                                    variable=snapshot_before_apply)
+    snapshot_check.pack()
 
-shader_profiles = get_profiles_in(SHADERPACK_PROFILE_FOLDER)
-if shader_profiles:
-    shader_options = shader_profiles
-else:
-    shader_options = ["No Profiles"]
-    shader_selected_profile.set("No Profiles")
-shader_profile_dropdown = tk.OptionMenu(root, shader_selected_profile, *shader_options)
-shader_profile_dropdown.pack()
+    snapshots_button = tk.Button(root, text="Snapshots", command=open_snapshots_window)
+    snapshots_button.pack(pady=(5, 0))
 
-shader_profile_name_entry = tk.Entry(root)
-shader_profile_name_entry.pack(pady=5)
+    undo_apply_button = tk.Button(root, text="Undo Last Apply", command=undo_last_apply)
+    undo_apply_button.pack(pady=5)
 
-shader_create_profile_button = tk.Button(root, text="Create Shader Profile", command=create_shader_profile)
-shader_create_profile_button.pack()
+    dedupe_button = tk.Button(root, text="Deduplicate Profile Storage", command=dedupe_all_profiles)
+    dedupe_button.pack()
 
-shader_import_button = tk.Button(root, text="Import Shaderpack Files (.zip)", command=import_shader_files)
-shader_import_button.pack(pady=5)
+    open_button = tk.Button(root, text="Search Modrinth", command=open_modrinth_window)
+    open_button.pack(pady=30)
+    open_mods_button = tk.Button(root, text="Official Modpacks", command=open_modpack_window)
+    open_mods_button.pack(pady=30)
 
-shader_apply_button = tk.Button(root, text="Apply Shader Profile", command=apply_shader_profile)
-shader_apply_button.pack()
+    # Background tasks UI
+    section_label("Tasks")
 
-# Resourcepacks UI
-section_label("Resourcepack Profiles")
+    task_progress = ttk.Progressbar(root, length=400, mode="determinate", maximum=100)
+    task_progress.pack(pady=5)
 
-resource_profiles = get_profiles_in(RESOURCEPACK_PROFILE_FOLDER)
-if resource_profiles:
-    resource_options = resource_profiles
-else:
-    resource_options = ["No Profiles"]
-    resource_selected_profile.set("No Profiles")
-resource_profile_dropdown = tk.OptionMenu(root, resource_selected_profile, *resource_options)
-resource_profile_dropdown.pack()
+    task_listbox = Listbox(root, height=4, width=70)
+    task_listbox.pack()
 
-resource_profile_name_entry = tk.Entry(root)
-resource_profile_name_entry.pack(pady=5)
+    task_cancel_button = tk.Button(root, text="Cancel Selected Task", command=cancel_selected_task)
+    task_cancel_button.pack(pady=5)
 
-resource_create_profile_button = tk.Button(root, text="Create Resource Profile", command=create_resource_profile)
-resource_create_profile_button.pack()
+    timings_button = tk.Button(root, text="Timings", command=open_timings_window)
+    timings_button.pack()
 
-resource_import_button = tk.Button(root, text="Import Resourcepack Files (.zip)", command=import_resource_files)
-resource_import_button.pack(pady=5)
+    task_manager.start_polling(root, on_update=update_task_panel)
+    poll_inventory()
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
-resource_apply_button = tk.Button(root, text="Apply Resource Profile", command=apply_resource_profile)
-resource_apply_button.pack()
+    root.mainloop()
 
-open_button = tk.Button(root, text="Search Modrinth", command=open_modrinth_window)
-open_button.pack(pady=30)
-open_mods_button = tk.Button(root, text="Official Modpacks", command=open_modpack_window)
-open_mods_button.pack(pady=30)
 
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Any arguments mean a headless command, e.g. "apply mods <profile>"
+        import cli
+        sys.exit(cli.main())
+    main()
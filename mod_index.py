@@ -0,0 +1,334 @@
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import zipfile
+import zlib
+
+import hash_cache
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+MOD_INDEX_DB = os.path.join("cache", "mod_index.sqlite3")
+# Bumped when indexing learns something new, so jars indexed before are read again
+INDEX_VERSION = 2
+# Jar-in-jar nesting followed this deep (Fabric API bundles its modules one level down)
+MAX_NESTING = 3
+
+# Checked in this order; the first one present in a jar describes it
+MANIFEST_MEMBERS = (
+    ("fabric.mod.json", "fabric"),
+    ("quilt.mod.json", "quilt"),
+    ("META-INF/neoforge.mods.toml", "neoforge"),
+    ("META-INF/mods.toml", "forge"),
+)
+
+# Dependencies every loader satisfies on its own, so they never count as missing
+BUILTIN_IDS = {
+    "minecraft", "java", "fabricloader", "fabric-loader", "quilt_loader", "quilted_fabric_api_loader",
+    "forge", "neoforge", "javafml", "lowcodefml", "mclanguage",
+}
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _db():
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(MOD_INDEX_DB), exist_ok=True)
+        _connection = sqlite3.connect(MOD_INDEX_DB, check_same_thread=False)
+        if _connection.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+            # Older indexes lack the nested column and never looked inside bundled jars
+            _connection.executescript("DROP TABLE IF EXISTS jars; DROP TABLE IF EXISTS provides; "
+                                      "DROP TABLE IF EXISTS dependencies;")
+            _connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        _connection.executescript("""
+            CREATE TABLE IF NOT EXISTS jars (
+                path TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                loader TEXT,
+                mod_id TEXT,
+                version TEXT,
+                name TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jars_folder ON jars (folder);
+            CREATE INDEX IF NOT EXISTS jars_mod_id ON jars (mod_id);
+            CREATE TABLE IF NOT EXISTS provides (
+                path TEXT NOT NULL,
+                mod_id TEXT NOT NULL,
+                nested INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS provides_path ON provides (path);
+            CREATE TABLE IF NOT EXISTS dependencies (
+                path TEXT NOT NULL,
+                dep_id TEXT NOT NULL,
+                version_range TEXT,
+                required INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dependencies_path ON dependencies (path);
+        """)
+        _connection.commit()
+    return _connection
+
+
+# --- Manifest parsing ---
+
+def _parse_fabric(data):
+    info = json.loads(data, strict=False)
+    deps = [(dep_id, str(rng), True) for dep_id, rng in info.get("depends", {}).items()]
+    deps += [(dep_id, str(rng), False) for dep_id, rng in info.get("recommends", {}).items()]
+    return {
+        "mod_id": info.get("id"),
+        "version": info.get("version"),
+        "name": info.get("name") or info.get("id"),
+        "provides": list(info.get("provides", [])),
+        "dependencies": deps,
+        "jars": [entry["file"] for entry in info.get("jars", []) if isinstance(entry, dict) and entry.get("file")],
+    }
+
+def _nested_ids(jar, member, depth=1):
+    """Mod ids a jar bundled inside another one provides (its id, provides and own nested jars)."""
+    try:
+        with zipfile.ZipFile(io.BytesIO(jar.read(member))) as nested:
+            info = _parse_fabric(nested.read("fabric.mod.json"))
+            ids = [info["mod_id"]] if info["mod_id"] else []
+            ids += info["provides"]
+            if depth < MAX_NESTING:
+                for inner in info["jars"]:
+                    ids += _nested_ids(nested, inner, depth + 1)
+            return ids
+    except (KeyError, zipfile.BadZipFile, ValueError, AttributeError, TypeError, zlib.error, EOFError, RuntimeError):
+        # Missing, not a Fabric mod, or a malformed manifest: it provides nothing we can name
+        return []
+
+def _parse_quilt(data):
+    loader = json.loads(data, strict=False).get("quilt_loader", {})
+    deps = []
+    for dep in loader.get("depends", []):
+        if isinstance(dep, str):
+            deps.append((dep, "*", True))
+        elif isinstance(dep, dict) and "id" in dep:
+            deps.append((dep["id"], str(dep.get("versions", "*")), not dep.get("optional", False)))
+    provides = [p if isinstance(p, str) else p.get("id") for p in loader.get("provides", [])]
+    return {
+        "mod_id": loader.get("id"),
+        "version": loader.get("version"),
+        "name": loader.get("metadata", {}).get("name") or loader.get("id"),
+        "provides": [p for p in provides if p],
+        "dependencies": deps,
+    }
+
+def _parse_toml(data, jar):
+    if tomllib is None:
+        raise ValueError("reading mods.toml needs Python 3.11+ or the tomli package")
+    info = tomllib.loads(data.decode("utf-8", errors="replace"))
+    mods = info.get("mods") or [{}]
+    main = mods[0]
+    version = main.get("version")
+    if version and "${file.jarVersion}" in version:
+        # Forge fills this in from the jar manifest at runtime
+        try:
+            manifest = jar.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+            match = re.search(r"^Implementation-Version:\s*(\S+)", manifest, re.MULTILINE)
+            version = match.group(1) if match else version
+        except KeyError:
+            pass
+    deps = []
+    for dep_list in info.get("dependencies", {}).values():
+        for dep in dep_list if isinstance(dep_list, list) else []:
+            if "type" in dep:
+                required = dep["type"].lower() == "required"
+            else:
+                required = bool(dep.get("mandatory", False))
+            deps.append((dep.get("modId"), dep.get("versionRange", "*"), required))
+    return {
+        "mod_id": main.get("modId"),
+        "version": version,
+        "name": main.get("displayName") or main.get("modId"),
+        "provides": [m.get("modId") for m in mods[1:] if m.get("modId")],
+        "dependencies": [d for d in deps if d[0]],
+    }
+
+def read_jar_metadata(path):
+    """Read a jar's mod manifest without extracting it: zipfile only loads the central
+    directory, then the single manifest member is read."""
+    with zipfile.ZipFile(path) as jar:
+        names = set(jar.namelist())
+        for member, loader in MANIFEST_MEMBERS:
+            if member not in names:
+                continue
+            data = jar.read(member)
+            if loader == "fabric":
+                info = _parse_fabric(data)
+                info["nested_provides"] = [mod_id for member in info.pop("jars")
+                                           for mod_id in _nested_ids(jar, member)]
+            elif loader == "quilt":
+                info = _parse_quilt(data)
+            else:
+                info = _parse_toml(data, jar)
+            info["loader"] = loader
+            return info
+    return None
+
+
+# --- Indexing ---
+
+def _copy_indexed(db, folder, path, st, sha256):
+    """Index a jar from another already indexed jar with the same content, if there is one."""
+    row = db.execute("SELECT path, loader, mod_id, version, name, error FROM jars WHERE sha256 = ? AND path != ? LIMIT 1",
+                     (sha256, path)).fetchone()
+    if row is None:
+        return False
+    source, loader, mod_id, version, name, error = row
+    _forget(db, path)
+    db.execute(
+        "INSERT INTO jars (path, folder, file_name, size, mtime, sha256, loader, mod_id, version, name, error) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (path, folder, os.path.basename(path), st.st_size, st.st_mtime_ns, sha256, loader, mod_id, version, name, error),
+    )
+    db.execute("INSERT INTO provides (path, mod_id, nested) SELECT ?, mod_id, nested FROM provides WHERE path = ?",
+               (path, source))
+    db.execute("INSERT INTO dependencies (path, dep_id, version_range, required) "
+               "SELECT ?, dep_id, version_range, required FROM dependencies WHERE path = ?", (path, source))
+    return True
+
+def _index_jar(db, folder, path, st, sha256=None):
+    if sha256 is not None and _copy_indexed(db, folder, path, st, sha256):
+        return
+    info = None
+    error = None
+    try:
+        info = read_jar_metadata(path)
+    except Exception as e:
+        error = str(e)
+    if sha256 is None:
+        sha256 = hash_cache.get_hashes(path)["sha256"]
+    db.execute("DELETE FROM provides WHERE path = ?", (path,))
+    db.execute("DELETE FROM dependencies WHERE path = ?", (path,))
+    info = info or {}
+    db.execute(
+        "INSERT OR REPLACE INTO jars (path, folder, file_name, size, mtime, sha256, loader, mod_id, version, name, error) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (path, folder, os.path.basename(path), st.st_size, st.st_mtime_ns, sha256,
+         info.get("loader"), info.get("mod_id"), info.get("version"), info.get("name"), error),
+    )
+    provided = [info["mod_id"]] if info.get("mod_id") else []
+    provided += info.get("provides", [])
+    db.executemany("INSERT INTO provides (path, mod_id) VALUES (?, ?)", [(path, p) for p in provided])
+    # Bundled jars count when looking for missing dependencies, not as duplicates
+    db.executemany("INSERT INTO provides (path, mod_id, nested) VALUES (?, ?, 1)",
+                   [(path, p) for p in info.get("nested_provides", [])])
+    db.executemany(
+        "INSERT INTO dependencies (path, dep_id, version_range, required) VALUES (?, ?, ?, ?)",
+        [(path, dep_id, rng, int(required)) for dep_id, rng, required in info.get("dependencies", [])],
+    )
+
+def _forget(db, path):
+    db.execute("DELETE FROM jars WHERE path = ?", (path,))
+    db.execute("DELETE FROM provides WHERE path = ?", (path,))
+    db.execute("DELETE FROM dependencies WHERE path = ?", (path,))
+
+def update_folder(folder, progress=None, hashes=None):
+    """Bring the index for one folder of jars up to date, only reopening jars whose size or
+    mtime changed. Returns the number of jars that were (re)read.
+
+    hashes, if given, maps file names to sha256 values known to be current (from a sync
+    manifest); a jar whose content is already indexed elsewhere is then copied from
+    there instead of being opened and hashed again.
+    """
+    folder = os.path.abspath(folder)
+    on_disk = {}
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            if name.endswith(".jar") and os.path.isfile(path):
+                on_disk[path] = os.stat(path)
+
+    with _lock:
+        db = _db()
+        known = {path: (size, mtime) for path, size, mtime in
+                 db.execute("SELECT path, size, mtime FROM jars WHERE folder = ?", (folder,))}
+        for path in known.keys() - on_disk.keys():
+            _forget(db, path)
+        changed = [path for path, st in on_disk.items()
+                   if known.get(path) != (st.st_size, st.st_mtime_ns)]
+        for i, path in enumerate(changed):
+            if progress:
+                progress(i, len(changed), f"Indexing {os.path.basename(path)}")
+            _index_jar(db, folder, path, on_disk[path], (hashes or {}).get(os.path.basename(path)))
+        db.commit()
+    return len(changed)
+
+
+# --- Queries ---
+
+def list_mods(folder):
+    with _lock:
+        rows = _db().execute(
+            "SELECT file_name, mod_id, name, version, loader, sha256, error FROM jars WHERE folder = ? ORDER BY name",
+            (os.path.abspath(folder),),
+        ).fetchall()
+    keys = ("file_name", "mod_id", "name", "version", "loader", "sha256", "error")
+    return [dict(zip(keys, row)) for row in rows]
+
+def provided_mods(folder):
+    """Every mod id the jars in the folder provide, bundled ones included. Returns {mod_id: file name}."""
+    with _lock:
+        rows = _db().execute(
+            "SELECT p.mod_id, j.file_name FROM provides p JOIN jars j ON j.path = p.path WHERE j.folder = ? "
+            "ORDER BY p.nested DESC, j.file_name DESC",
+            (os.path.abspath(folder),),
+        ).fetchall()
+    # Later rows win, so a jar that is the mod itself is named over one bundling it
+    return dict(rows)
+
+def find_duplicates(folder):
+    """Mod ids provided by more than one jar in the folder. Returns {mod_id: [file names]}."""
+    with _lock:
+        rows = _db().execute("""
+            SELECT p.mod_id, j.file_name FROM provides p JOIN jars j ON j.path = p.path
+            WHERE j.folder = ? AND p.nested = 0 AND p.mod_id IN (
+                SELECT p2.mod_id FROM provides p2 JOIN jars j2 ON j2.path = p2.path
+                WHERE j2.folder = ? AND p2.nested = 0 GROUP BY p2.mod_id HAVING COUNT(DISTINCT p2.path) > 1
+            ) ORDER BY p.mod_id""", (os.path.abspath(folder),) * 2).fetchall()
+    duplicates = {}
+    for mod_id, file_name in rows:
+        duplicates.setdefault(mod_id, []).append(file_name)
+    return duplicates
+
+def find_missing_dependencies(folder):
+    """Required dependencies nothing in the folder provides. Returns {dep_id: [file names needing it]}."""
+    with _lock:
+        rows = _db().execute("""
+            SELECT d.dep_id, j.file_name FROM dependencies d JOIN jars j ON j.path = d.path
+            WHERE j.folder = ? AND d.required = 1 AND d.dep_id NOT IN (
+                SELECT p.mod_id FROM provides p JOIN jars j2 ON j2.path = p.path WHERE j2.folder = ?
+            ) ORDER BY d.dep_id""", (os.path.abspath(folder),) * 2).fetchall()
+    missing = {}
+    for dep_id, file_name in rows:
+        if dep_id not in BUILTIN_IDS:
+            missing.setdefault(dep_id, []).append(file_name)
+    return missing
+
+def folders_with_mod(mod_id):
+    """Every indexed folder (profile or game folder) containing a jar that provides mod_id."""
+    with _lock:
+        rows = _db().execute(
+            "SELECT DISTINCT j.folder FROM provides p JOIN jars j ON j.path = p.path WHERE p.mod_id = ?",
+            (mod_id,),
+        ).fetchall()
+    return [row[0] for row in rows]
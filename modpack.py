@@ -0,0 +1,296 @@
+import json
+import os
+import posixpath
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import core
+import hash_cache
+import modrinth
+import tracing
+from blobstore import ingest_file
+from downloads import DownloadManager, download_file
+from updates import primary_file
+
+# Modrinth's .mrpack format: a zip holding modrinth.index.json (files to download, with
+# hashes and mirror URLs) plus overrides/ and client-overrides/ copied over the instance.
+
+INDEX_NAME = "modrinth.index.json"
+OVERRIDE_PREFIXES = ("overrides/", "client-overrides/")  # later ones win
+# Kept below the HTTP pool size, so every download gets a pooled connection
+MAX_CONCURRENT_DOWNLOADS = 12
+COPY_CHUNK_SIZE = 1024 * 1024
+# Pack files outside mods/shaderpacks/resourcepacks (config/, options.txt, ...) land here
+EXTRAS_FOLDER = "modpack_extras"
+MODPACK_DOWNLOAD_FOLDER = os.path.join("cache", "modpacks")
+
+LOADER_DEPENDENCIES = {
+    "fabric": "fabric-loader",
+    "quilt": "quilt-loader",
+    "forge": "forge",
+    "neoforge": "neoforge",
+}
+
+# Instance subfolder -> profile kind
+FOLDER_KINDS = {subfolder: kind for kind, (_, subfolder) in core.PROFILE_KINDS.items()}
+
+
+class ModpackError(Exception):
+    pass
+
+
+def _safe_path(rel_path):
+    """Normalise a path from the pack and refuse anything that would escape the instance."""
+    path = posixpath.normpath(rel_path.replace("\\", "/"))
+    if path.startswith(("/", "../")) or path == ".." or ":" in path.split("/")[0]:
+        raise ModpackError(f"Unsafe path in modpack: {rel_path}")
+    return path
+
+def destination_for(name, rel_path):
+    """Where an instance-relative path from the pack goes: a profile of the matching kind, or the extras folder."""
+    folder, _, rest = rel_path.partition("/")
+    if rest and folder in FOLDER_KINDS:
+        return os.path.join(core.profile_path(FOLDER_KINDS[folder], name), *rest.split("/"))
+    return os.path.join(EXTRAS_FOLDER, name, *rel_path.split("/"))
+
+def read_index(pack):
+    """The parsed modrinth.index.json of an open pack, read straight from the archive."""
+    try:
+        with pack.open(INDEX_NAME) as f:
+            index = json.load(f)
+    except KeyError:
+        raise ModpackError(f"Not a Modrinth modpack: {INDEX_NAME} is missing")
+    if index.get("game") != "minecraft":
+        raise ModpackError(f"Unsupported modpack game: {index.get('game')}")
+    return index
+
+
+# --- Install ---
+
+def _download_jobs(name, index, overridden):
+    jobs = []
+    for entry in index.get("files", []):
+        if (entry.get("env") or {}).get("client") == "unsupported":
+            continue
+        rel_path = _safe_path(entry["path"])
+        if rel_path in overridden:
+            continue
+        hashes = {key: value for key, value in entry.get("hashes", {}).items() if key in ("sha1", "sha512")}
+        if not hashes:
+            raise ModpackError(f"{rel_path} has no sha1 or sha512 hash")
+        if not entry.get("downloads"):
+            raise ModpackError(f"{rel_path} has no download URL")
+        jobs.append({"urls": entry["downloads"], "dest": destination_for(name, rel_path),
+                     "hashes": hashes, "size": entry.get("fileSize", 0)})
+    # Biggest first, so the longest download starts right away instead of trailing at the end
+    jobs.sort(key=lambda job: job["size"], reverse=True)
+    return jobs
+
+def _override_members(pack):
+    """{instance-relative path: archive member} for the override folders, client-overrides winning."""
+    members = {}
+    for prefix in OVERRIDE_PREFIXES:
+        for info in pack.infolist():
+            if info.filename.startswith(prefix) and not info.is_dir():
+                members[_safe_path(info.filename[len(prefix):])] = info
+    return members
+
+def _extract_overrides(pack, name, members, stop):
+    """Stream the overrides into place; stops early once stop is set."""
+    written = []
+    with tracing.span("modpack.extract_overrides", files=len(members)) as s:
+        for rel_path, info in members.items():
+            if stop.is_set():
+                break
+            dest = destination_for(name, rel_path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with pack.open(info) as src, open(dest, "wb") as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            written.append(dest)
+            s.add("bytes_extracted", info.file_size)
+    return written
+
+def _download_with_mirrors(jobs, progress):
+    """Download every job, trying each file's other mirror URLs for the ones that failed."""
+    errors = {}
+    pending = jobs
+    attempt = 0
+    while pending:
+        batch = [(job["urls"][attempt], job["dest"], job["hashes"]) for job in pending]
+        results = dict(DownloadManager(MAX_CONCURRENT_DOWNLOADS).download_all(batch, progress=progress))
+        attempt += 1
+        retry = []
+        for job in pending:
+            error = results.get(job["dest"])
+            if error is None:
+                errors.pop(job["dest"], None)
+            else:
+                errors[job["dest"]] = error
+                if attempt < len(job["urls"]):
+                    retry.append(job)
+        pending = retry
+    return errors
+
+def _target_folders(name, index, overrides):
+    paths = [_safe_path(entry["path"]) for entry in index.get("files", [])] + list(overrides)
+    folders = set()
+    for rel_path in paths:
+        folder, _, rest = rel_path.partition("/")
+        if rest and folder in FOLDER_KINDS:
+            folders.add(core.profile_path(FOLDER_KINDS[folder], name))
+        else:
+            folders.add(os.path.join(EXTRAS_FOLDER, name))
+    return sorted(folders)
+
+def _remove_install(folders, existed):
+    """Undo a failed install: remove the folders it created and empty the ones it found empty."""
+    for folder in folders:
+        shutil.rmtree(folder, ignore_errors=True)
+        if folder in existed:
+            os.makedirs(folder, exist_ok=True)
+
+def install_mrpack(pack_path, name, progress=None):
+    """Install a .mrpack file as new profiles called `name`.
+
+    Files listed in the index are downloaded concurrently and checked against their
+    hashes while the overrides are streamed out of the archive, so nothing is unpacked
+    to a temporary folder. Returns a summary dict with the pack's metadata. If it is
+    cancelled or fails, the profile folders are left as they were, so it can be retried.
+    """
+    with tracing.operation("modpack.install", pack=pack_path), zipfile.ZipFile(pack_path) as pack:
+        index = read_index(pack)
+        overrides = _override_members(pack)
+        folders = _target_folders(name, index, overrides)
+        for folder in folders:
+            if os.path.isdir(folder) and os.listdir(folder):
+                raise ModpackError(f"{folder} already exists and is not empty")
+        existed = [folder for folder in folders if os.path.isdir(folder)]
+
+        jobs = _download_jobs(name, index, set(overrides))
+        try:
+            # The archive is only read on the extraction thread while downloads run on the pool
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                stop = threading.Event()
+                extraction = pool.submit(_extract_overrides, pack, name, overrides, stop)
+                try:
+                    errors = _download_with_mirrors(jobs, progress)
+                except BaseException:
+                    # Cancelled or failed: the extraction would only be thrown away
+                    stop.set()
+                    wait([extraction])
+                    raise
+                extracted = extraction.result()
+
+            if progress:
+                progress(0, None, "Adding files to the store")
+            downloaded = [job["dest"] for job in jobs if job["dest"] not in errors]
+            for path in downloaded + extracted:
+                ingest_file(path)
+        except BaseException:
+            _remove_install(folders, existed)
+            raise
+    mods_folder = core.profile_path("mods", name)
+    if os.path.isdir(mods_folder):
+        import mod_index
+        mod_index.update_folder(mods_folder)
+
+    return {
+        "name": index.get("name", name),
+        "version": index.get("versionId"),
+        "dependencies": index.get("dependencies", {}),
+        "folders": folders,
+        "downloaded": len(downloaded),
+        "extracted": len(extracted),
+        "errors": [f"{os.path.basename(dest)}: {error}" for dest, error in errors.items()],
+    }
+
+def download_mrpack(version, progress=None):
+    """Fetch the .mrpack of a modpack version (from the Modrinth API) into the cache. Returns its path."""
+    pack_file = primary_file(version)
+    if pack_file is None:
+        raise ModpackError(f"Version {version.get('version_number')} has no files")
+    dest = os.path.join(MODPACK_DOWNLOAD_FOLDER, pack_file["filename"])
+    return download_file(pack_file["url"], dest, pack_file.get("hashes"), progress)
+
+
+# --- Export ---
+
+def _folder_files(folder, prefix):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for file_name in sorted(filenames):
+            path = os.path.join(dirpath, file_name)
+            rel_path = os.path.relpath(path, folder).replace(os.sep, "/")
+            files.append((path, prefix + rel_path))
+    return files
+
+def export_mrpack(out_path, name, game_version, loader=None, loader_version=None,
+                  kinds=("mods", "shaders", "resources"), progress=None):
+    """Write the `name` profiles of the given kinds, plus any pack extras, to a .mrpack.
+
+    Files Modrinth knows (one bulk hash lookup, reusing cached hashes) become download
+    entries; everything else is streamed into overrides/. The pack is written beside
+    out_path and renamed into place once complete.
+    """
+    files = []
+    for kind in kinds:
+        files.extend(_folder_files(core.profile_path(kind, name), core.PROFILE_KINDS[kind][1] + "/"))
+    has_profiles = bool(files)
+    # config/ and friends from an installed pack travel along
+    files.extend(_folder_files(os.path.join(EXTRAS_FOLDER, name), ""))
+    if not has_profiles:
+        raise ModpackError(f"No profile called '{name}' to export")
+
+    with tracing.operation("modpack.export", profile=name, files=len(files)):
+        hashes = {}
+        for i, (path, rel_path) in enumerate(files):
+            if progress:
+                progress(i, len(files), f"Hashing {rel_path}")
+            hashes[path] = hash_cache.get_hashes(path)
+        if progress:
+            progress(len(files), len(files), "Looking up files on Modrinth")
+        known = modrinth.get_versions_from_hashes([h["sha512"] for h in hashes.values()])
+
+        index_files = []
+        overrides = []
+        for path, rel_path in files:
+            file_hashes = hashes[path]
+            version = known.get(file_hashes["sha512"])
+            remote = next((f for f in (version or {}).get("files", [])
+                           if f.get("hashes", {}).get("sha512") == file_hashes["sha512"]), None)
+            if remote is None:
+                overrides.append((path, rel_path))
+                continue
+            index_files.append({
+                "path": rel_path,
+                "hashes": {"sha1": file_hashes["sha1"], "sha512": file_hashes["sha512"]},
+                "downloads": [remote["url"]],
+                "fileSize": os.path.getsize(path),
+            })
+
+        dependencies = {"minecraft": game_version}
+        if loader and loader_version:
+            dependencies[LOADER_DEPENDENCIES.get(loader, loader)] = loader_version
+        index = {
+            "formatVersion": 1,
+            "game": "minecraft",
+            "versionId": "1.0.0",
+            "name": name,
+            "files": index_files,
+            "dependencies": dependencies,
+        }
+
+        part_path = out_path + ".part"
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as pack:
+            pack.writestr(INDEX_NAME, json.dumps(index, indent=2))
+            for i, (path, rel_path) in enumerate(overrides):
+                if progress:
+                    progress(i, len(overrides), f"Packing {rel_path}")
+                # Jars and zips are already compressed
+                compression = zipfile.ZIP_STORED if rel_path.endswith((".jar", ".zip")) else zipfile.ZIP_DEFLATED
+                pack.write(path, "overrides/" + rel_path, compress_type=compression)
+        os.replace(part_path, out_path)
+
+    return {"downloads": len(index_files), "overrides": len(overrides)}
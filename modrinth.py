@@ -0,0 +1,109 @@
+import json
+import os
+import time
+
+import http_cache
+from http_client import get_client
+
+# SCMM_MODRINTH_API points the manager at another server, e.g. bench/mock_modrinth.py
+API_URL = os.getenv("SCMM_MODRINTH_API", "https://api.modrinth.com/v2")
+
+
+# --- Search ---
+
+def build_facets(loader=None, game_version=None, project_type="mod"):
+    """Facets are AND-ed lists of OR-ed filters, sent as a JSON string."""
+    facets = []
+    if project_type:
+        facets.append([f"project_type:{project_type}"])
+    if loader:
+        facets.append([f"categories:{loader}"])
+    if game_version:
+        facets.append([f"versions:{game_version}"])
+    return json.dumps(facets)
+
+def search_projects(query, loader=None, game_version=None, limit=20, offset=0, project_type="mod"):
+    """Search Modrinth with loader/version filtering done server side, in a single request.
+
+    Returns the response dict with an extra "elapsed" key (seconds the lookup took,
+    near zero when it was answered from the cache).
+    """
+    params = {
+        "query": query,
+        "facets": build_facets(loader, game_version, project_type),
+        "limit": limit,
+        "offset": offset,
+    }
+    start = time.perf_counter()
+    data = http_cache.get_json(f"{API_URL}/search", params=params)
+    data["elapsed"] = time.perf_counter() - start
+    return data
+
+def browse_projects(project_type="mod", offset=0, limit=100, index="updated"):
+    """One page of all projects of a type, most recently modified first.
+
+    Bypasses the response cache: this feeds the offline catalog sync, which would
+    only flood it with pages that are never asked for twice.
+    """
+    params = {
+        "query": "",
+        "facets": build_facets(project_type=project_type),
+        "index": index,
+        "limit": limit,
+        "offset": offset,
+    }
+    response = get_client().get(f"{API_URL}/search", params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+# --- Versions ---
+
+def get_project_versions(project_id, loader=None, game_version=None):
+    """List a project's versions, newest first, filtered by loader and game version."""
+    params = {}
+    if loader:
+        params["loaders"] = json.dumps([loader])
+    if game_version:
+        params["game_versions"] = json.dumps([game_version])
+    return http_cache.get_json(f"{API_URL}/project/{project_id}/version", params=params)
+
+def get_versions(version_ids):
+    """Fetch many versions by id in one request (cached like any other GET)."""
+    if not version_ids:
+        return []
+    return http_cache.get_json(f"{API_URL}/versions", params={"ids": json.dumps(sorted(version_ids))})
+
+def get_projects(project_ids):
+    """Fetch many projects by id or slug in one request."""
+    if not project_ids:
+        return []
+    return http_cache.get_json(f"{API_URL}/projects", params={"ids": json.dumps(sorted(project_ids))})
+
+def get_game_versions():
+    return http_cache.get_json(f"{API_URL}/tag/game_version")
+
+
+# --- Bulk hash lookups ---
+
+def get_versions_from_hashes(hashes, algorithm="sha512"):
+    """Resolve many file hashes to their Modrinth versions in one request. Returns {hash: version}."""
+    if not hashes:
+        return {}
+    response = get_client().post(f"{API_URL}/version_files",
+                                 json={"hashes": list(hashes), "algorithm": algorithm}, retry=True)
+    response.raise_for_status()
+    return response.json()
+
+def get_latest_versions_from_hashes(hashes, loader=None, game_version=None, algorithm="sha512"):
+    """For each file hash, the newest version of the same project for the loader/game version."""
+    if not hashes:
+        return {}
+    body = {"hashes": list(hashes), "algorithm": algorithm}
+    if loader:
+        body["loaders"] = [loader]
+    if game_version:
+        body["game_versions"] = [game_version]
+    response = get_client().post(f"{API_URL}/version_files/update", json=body, retry=True)
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,338 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sqlite3
+import threading
+import zipfile
+import zlib
+
+# Checks shaderpacks and resourcepacks without unpacking them. For a zip only the central
+# directory and pack.mcmeta are read, so a multi-GB pack costs about as much as a small
+# one; folder packs are looked at in place. Results are cached by content hash.
+
+PACK_INDEX_DB = os.path.join("cache", "pack_index.sqlite3")
+PACK_KINDS = ("shaders", "resources")
+# Bumped when inspection learns something new, so older cached results are redone
+INSPECTOR_VERSION = 1
+MAX_MCMETA_SIZE = 1024 * 1024
+SHADER_PROGRAM_EXTENSIONS = (".fsh", ".vsh", ".gsh", ".csh", ".glsl")
+
+# Resource pack_format -> the Minecraft releases that use it
+PACK_FORMATS = {
+    1: ("1.6.1", "1.8.9"),
+    2: ("1.9", "1.10.2"),
+    3: ("1.11", "1.12.2"),
+    4: ("1.13", "1.14.4"),
+    5: ("1.15", "1.16.1"),
+    6: ("1.16.2", "1.16.5"),
+    7: ("1.17", "1.17.1"),
+    8: ("1.18", "1.18.2"),
+    9: ("1.19", "1.19.2"),
+    12: ("1.19.3", "1.19.3"),
+    13: ("1.19.4", "1.19.4"),
+    15: ("1.20", "1.20.1"),
+    18: ("1.20.2", "1.20.2"),
+    22: ("1.20.3", "1.20.4"),
+    32: ("1.20.5", "1.20.6"),
+    34: ("1.21", "1.21.1"),
+    42: ("1.21.2", "1.21.3"),
+    46: ("1.21.4", "1.21.4"),
+    55: ("1.21.5", "1.21.5"),
+    63: ("1.21.6", "1.21.6"),
+    64: ("1.21.7", "1.21.8"),
+}
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _db():
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(PACK_INDEX_DB), exist_ok=True)
+        _connection = sqlite3.connect(PACK_INDEX_DB, check_same_thread=False)
+        _connection.execute("""
+            CREATE TABLE IF NOT EXISTS packs (
+                key TEXT PRIMARY KEY,
+                inspector INTEGER NOT NULL,
+                info TEXT NOT NULL
+            )""")
+        _connection.commit()
+    return _connection
+
+
+# --- Versions ---
+
+def _version_key(version):
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+def pack_format_for(game_version):
+    """The resource pack_format of a Minecraft release, or None if it isn't in the table."""
+    key = _version_key(game_version)
+    for pack_format, (first, last) in PACK_FORMATS.items():
+        if _version_key(first) <= key <= _version_key(last):
+            return pack_format
+    return None
+
+def describe_formats(low, high):
+    """The Minecraft releases a pack_format range covers, e.g. "1.20-1.20.1"."""
+    known = [PACK_FORMATS[f] for f in sorted(PACK_FORMATS) if low <= f <= high]
+    if not known:
+        return f"pack_format {low}" if low == high else f"pack_format {low}-{high}"
+    first, last = known[0][0], known[-1][1]
+    return first if first == last else f"{first}-{last}"
+
+def _format_range(value):
+    """supported_formats/min_format/max_format come as an int, [min, max] or {min_inclusive, max_inclusive}."""
+    if isinstance(value, int):
+        return value, value
+    if isinstance(value, list) and len(value) == 2 and all(isinstance(v, int) for v in value):
+        return value[0], value[1]
+    if isinstance(value, dict) and isinstance(value.get("min_inclusive"), int):
+        return value["min_inclusive"], value.get("max_inclusive", value["min_inclusive"])
+    return None
+
+def _major(value):
+    # 1.21.9+ writes formats as [major, minor]
+    if isinstance(value, list) and value and isinstance(value[0], int):
+        return value[0]
+    return value if isinstance(value, int) else None
+
+def game_version_hint():
+    """The Minecraft release the launcher last played, if it can be told from launcher_profiles.json."""
+    import core
+
+    try:
+        with open(os.path.join(core.minecraft_folder(), "launcher_profiles.json"), "r", encoding="utf-8") as f:
+            profiles = json.load(f).get("profiles", {})
+    except (OSError, ValueError, AttributeError):
+        return None
+    last = sorted(profiles.values(), key=lambda p: p.get("lastUsed", ""), reverse=True)
+    for profile in last:
+        # e.g. "1.20.1", "fabric-loader-0.15.11-1.20.1", "1.20.1-forge-47.2.0"
+        match = re.search(r"(?:^|-)(1\.\d+(?:\.\d+)?)(?:-|$)", profile.get("lastVersionId", ""))
+        if match:
+            return match.group(1)
+    return None
+
+
+# --- Inspection ---
+
+def _parse_mcmeta(data, info):
+    try:
+        meta = json.loads(data.decode("utf-8-sig", errors="replace"), strict=False)
+        pack = meta["pack"]
+    except (ValueError, KeyError, TypeError):
+        info["errors"].append("pack.mcmeta is not valid JSON with a \"pack\" section")
+        return
+    description = pack.get("description", "")
+    if isinstance(description, dict):
+        description = description.get("text", "")
+    elif isinstance(description, list):
+        description = "".join(part if isinstance(part, str) else part.get("text", "") for part in description
+                              if isinstance(part, (str, dict)))
+    info["description"] = str(description)[:200]
+    pack_format = _major(pack.get("pack_format", pack.get("min_format")))
+    if pack_format is None:
+        info["errors"].append("pack.mcmeta has no pack_format")
+        return
+    info["pack_format"] = pack_format
+    supported = _format_range(pack.get("supported_formats"))
+    if supported is None and "min_format" in pack:
+        supported = (_major(pack["min_format"]), _major(pack.get("max_format", pack["min_format"])))
+    info["formats"] = list(supported or (pack_format, pack_format))
+
+def _check_layout(names, read_member, info):
+    """Shared checks for a pack's entries, given as posix paths relative to its root."""
+    top = {name.split("/", 1)[0] for name in names}
+    if info["kind"] == "shaders":
+        programs = [n for n in names if n.startswith("shaders/") and n.endswith(SHADER_PROGRAM_EXTENSIONS)]
+        info["programs"] = len(programs)
+        info["dimensions"] = sorted({n.split("/")[1] for n in programs if re.match(r"shaders/world-?\d+/", n)})
+        if not programs:
+            nested = [n for n in names if n.count("/") >= 2 and n.split("/")[1] == "shaders"]
+            if nested:
+                info["errors"].append(f"shaders/ is inside '{nested[0].split('/')[0]}/'; "
+                                      "shader loaders only look at the top level")
+            elif "pack.mcmeta" in names:
+                info["errors"].append("this is a resource pack, not a shaderpack")
+            else:
+                info["errors"].append("no shaders/ folder with shader programs")
+        return
+
+    if "pack.mcmeta" not in names:
+        nested = [n for n in names if n.count("/") == 1 and n.endswith("/pack.mcmeta")]
+        if nested:
+            info["errors"].append(f"pack.mcmeta is inside '{nested[0].split('/')[0]}/'; "
+                                  "Minecraft only looks at the top level")
+        elif "shaders" in top:
+            info["errors"].append("this is a shaderpack, not a resource pack")
+        elif any(n.endswith((".class", "fabric.mod.json")) for n in names):
+            info["errors"].append("this is a mod, not a resource pack")
+        else:
+            info["errors"].append("no pack.mcmeta")
+        return
+    data = read_member("pack.mcmeta")
+    if data is None:
+        info["errors"].append("pack.mcmeta is too large to be real")
+        return
+    _parse_mcmeta(data, info)
+    if "assets" not in top and "data" not in top:
+        info["warnings"].append("no assets/ folder, so the pack changes nothing")
+
+def _inspect_zip(path, info):
+    try:
+        with zipfile.ZipFile(path) as archive:
+            # Only the central directory has been read at this point
+            entries = {i.filename.replace("\\", "/").lstrip("/"): i for i in archive.infolist()}
+            names = set(entries)
+            # Folders are often not stored as entries of their own
+            names.update(posixpath.dirname(n) for n in list(names) if "/" in n)
+            info["entries"] = len(entries)
+
+            def read_member(name):
+                entry = entries.get(name)
+                if entry is None or entry.file_size > MAX_MCMETA_SIZE:
+                    return None
+                return archive.read(entry)
+
+            _check_layout(names, read_member, info)
+    except zipfile.BadZipFile as e:
+        info["errors"].append(f"not a valid zip file ({e})")
+    except (OSError, KeyError, zipfile.LargeZipFile, NotImplementedError) as e:
+        info["errors"].append(f"could not be read: {e}")
+    except (zlib.error, EOFError) as e:
+        # A member whose compressed data is damaged
+        info["errors"].append(f"is damaged ({e})")
+    except RuntimeError as e:
+        # zipfile's way of saying a member is encrypted
+        info["errors"].append(f"could not be read: {e}")
+
+def _inspect_folder(path, info):
+    names = set()
+    for dirpath, dirnames, filenames in os.walk(path):
+        rel_dir = os.path.relpath(dirpath, path).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        if prefix:
+            names.add(prefix.rstrip("/"))
+        # Two levels are enough to find pack.mcmeta, shaders/ or a nested copy of either;
+        # shaders/ itself is walked fully to count its programs
+        if prefix.count("/") >= 2 and not prefix.startswith("shaders/"):
+            dirnames.clear()
+        names.update(prefix + name for name in filenames)
+    info["entries"] = len(names)
+
+    def read_member(name):
+        member = os.path.join(path, *name.split("/"))
+        if os.path.getsize(member) > MAX_MCMETA_SIZE:
+            return None
+        with open(member, "rb") as f:
+            return f.read()
+
+    try:
+        _check_layout(names, read_member, info)
+    except OSError as e:
+        info["errors"].append(f"could not be read: {e}")
+
+def inspect(path, kind):
+    """What a shaderpack or resource pack (zip or folder) is, with anything wrong with it.
+
+    Returns {"name", "kind", "pack_format", "formats", "description", "errors",
+    "warnings", ...}; errors mean the game won't load it at all.
+    """
+    info = {"name": os.path.basename(path), "kind": kind, "pack_format": None, "formats": None,
+            "description": "", "errors": [], "warnings": []}
+    if os.path.isdir(path):
+        _inspect_folder(path, info)
+    elif zipfile.is_zipfile(path):
+        _inspect_zip(path, info)
+    else:
+        info["errors"].append("not a zip file or a folder")
+    return info
+
+def _cache_key(kind, digest):
+    return f"{kind}:{digest}"
+
+def _folder_digest(files, rel_folder):
+    """A stand-in content hash for a folder pack, built from the manifest's hashes of its files."""
+    prefix = rel_folder + os.sep
+    h = hashlib.sha256()
+    for rel_path in sorted(p for p in files if p.startswith(prefix)):
+        h.update(f"{rel_path}\0{files[rel_path]['hash']}\n".encode("utf-8"))
+    return "dir-" + h.hexdigest()
+
+def inspect_folder(kind, folder, files):
+    """Inspect every pack in a profile or game folder, reusing cached results.
+
+    `files` is the folder's manifest ({relative path: {"hash", ...}}), whose hashes key
+    the cache. Returns a list of inspect() results, sorted by name.
+    """
+    items = {}
+    for rel_path, entry in files.items():
+        top, _, rest = rel_path.partition(os.sep)
+        if rest:
+            items.setdefault(top, None)
+        elif not rel_path.lower().endswith(".txt"):
+            # Shader loaders keep each pack's settings in a .txt beside it
+            items[top] = entry["hash"]
+    keys = {name: _cache_key(kind, digest or _folder_digest(files, name)) for name, digest in items.items()}
+
+    with _lock:
+        db = _db()
+        rows = db.execute(
+            f"SELECT key, info FROM packs WHERE inspector = ? AND key IN ({','.join('?' * len(keys))})",
+            [INSPECTOR_VERSION] + list(keys.values())).fetchall() if keys else []
+    cached = {key: json.loads(info) for key, info in rows}
+
+    results = []
+    fresh = []
+    for name, key in keys.items():
+        info = cached.get(key)
+        if info is None:
+            info = inspect(os.path.join(folder, name), kind)
+            fresh.append((key, INSPECTOR_VERSION, json.dumps(info)))
+        # The same content may sit in several profiles under different names
+        results.append(dict(info, name=name))
+    if fresh:
+        with _lock:
+            db = _db()
+            db.executemany("INSERT OR REPLACE INTO packs (key, inspector, info) VALUES (?, ?, ?)", fresh)
+            db.commit()
+    return sorted(results, key=lambda info: info["name"].lower())
+
+
+# --- Checks against a game version ---
+
+def problems(info, game_version=None):
+    """Human readable problems with one inspected pack, including a pack_format mismatch."""
+    found = list(info["errors"]) + list(info["warnings"])
+    if game_version and info["kind"] == "resources" and info["formats"]:
+        expected = pack_format_for(game_version)
+        low, high = info["formats"]
+        if expected is not None and not low <= expected <= high:
+            found.append(f"made for Minecraft {describe_formats(low, high)}, not {game_version} "
+                         f"(pack_format {expected})")
+    return found
+
+def format_info(info, game_version=None):
+    if info["kind"] == "shaders":
+        text = f"{info['name']}: shaderpack"
+        if info.get("programs"):
+            text += f", {info['programs']} programs"
+            if info.get("dimensions"):
+                text += f" ({', '.join(info['dimensions'])})"
+    else:
+        text = f"{info['name']}: resource pack"
+        if info["formats"]:
+            text += f" for Minecraft {describe_formats(*info['formats'])}"
+    found = problems(info, game_version)
+    if found:
+        text += "\n    " + "\n    ".join(f"! {problem}" for problem in found)
+    return text
+
+def format_problems(results, game_version=None):
+    """One line per pack with problems, or "" if all of them look fine."""
+    return "\n".join(f"{info['name']}: {'; '.join(problems(info, game_version))}"
+                     for info in results if problems(info, game_version))
@@ -0,0 +1,258 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import hash_cache
+import mod_index
+import modrinth
+import tracing
+from updates import primary_file
+
+# Walks Modrinth's `dependencies` arrays so a download brings its required libraries along.
+# Each dependency level costs one /versions?ids= and one /projects?ids= request, plus a
+# filtered version listing for dependencies that name only a project.
+
+MAX_PARALLEL_LOOKUPS = 8
+MAX_DEPTH = 16
+
+# Versions never change once published, so they are kept for the life of the process;
+# the best version per project is only remembered for one resolve() call
+_versions = {}
+_projects = {}
+_best_versions = {}
+_memo_lock = threading.Lock()
+
+
+# --- Memoized lookups ---
+
+def _fetch_versions(version_ids):
+    with _memo_lock:
+        missing = [v for v in set(version_ids) if v not in _versions]
+    if missing:
+        fetched = modrinth.get_versions(missing)
+        with _memo_lock:
+            for version in fetched:
+                _versions[version["id"]] = version
+    with _memo_lock:
+        return {v: _versions[v] for v in version_ids if v in _versions}
+
+def _fetch_projects(project_ids):
+    with _memo_lock:
+        missing = [p for p in set(project_ids) if p not in _projects]
+    if missing:
+        fetched = modrinth.get_projects(missing)
+        with _memo_lock:
+            for project in fetched:
+                _projects[project["id"]] = project
+                _projects[project.get("slug") or project["id"]] = project
+    with _memo_lock:
+        return {p: _projects[p] for p in project_ids if p in _projects}
+
+def _choose(versions):
+    """Newest release if there is one, else the newest version of any kind."""
+    for version in versions:
+        if version.get("version_type", "release") == "release":
+            return version
+    return versions[0] if versions else None
+
+def _best_version(project_id, loader, game_version):
+    key = (project_id, loader, game_version)
+    with _memo_lock:
+        if key in _best_versions:
+            return _best_versions[key]
+    version = _choose(modrinth.get_project_versions(project_id, loader, game_version))
+    with _memo_lock:
+        _best_versions[key] = version
+        if version:
+            _versions[version["id"]] = version
+    return version
+
+def _fits(version, loader, game_version):
+    return ((not loader or loader in version.get("loaders", []))
+            and (not game_version or game_version in version.get("game_versions", [])))
+
+
+# --- Resolution ---
+
+def installed_projects(profile_folder):
+    """{project_id: (file name, version)} for the jars in a profile that Modrinth recognises."""
+    if not profile_folder or not os.path.isdir(profile_folder):
+        return {}
+    jars = {}
+    for name in os.listdir(profile_folder):
+        path = os.path.join(profile_folder, name)
+        if name.endswith(".jar") and os.path.isfile(path):
+            jars[hash_cache.get_hashes(path)["sha512"]] = name
+    found = modrinth.get_versions_from_hashes(list(jars))
+    return {version["project_id"]: (jars[digest], version) for digest, version in found.items()}
+
+def installed_mod_ids(profile_folder):
+    """{mod_id: file name} for every jar in a profile, including ones Modrinth doesn't know."""
+    if not profile_folder or not os.path.isdir(profile_folder):
+        return {}
+    mod_index.update_folder(profile_folder)
+    return mod_index.provided_mods(profile_folder)
+
+def _installed_as(project, provided):
+    """The file in the profile providing the mod id a Modrinth project most likely has, if any."""
+    slug = project.get("slug") if project else None
+    for mod_id in dict.fromkeys([slug, slug.replace("-", "_")] if slug else []):
+        if mod_id in provided:
+            return provided[mod_id]
+    return None
+
+def _drop(project_id, chosen, required_by, needed_by, dropped):
+    """Leave a dependency out, together with the dependencies nothing else still needs."""
+    chosen.pop(project_id, None)
+    dropped.add(project_id)
+    for dependency, parents in needed_by.items():
+        if (dependency in chosen and required_by.get(dependency) is not None
+                and project_id in parents and parents <= dropped):
+            _drop(dependency, chosen, required_by, needed_by, dropped)
+
+def resolve(project_ids, loader, game_version, profile_folder=None, progress=None):
+    """Work out everything needed to add project_ids to a profile.
+
+    Returns a dict with:
+      downloads  - [{"project_id", "title", "version", "file", "required_by"}] to fetch
+      satisfied  - [(project_id, file name)] already present in the profile
+      conflicts  - human readable strings (incompatible mods, clashing pinned versions);
+                   of two incompatible mods the dependency is left out, never a project asked for
+      missing    - human readable strings (no version for this loader/game version)
+    """
+    with _memo_lock:
+        _best_versions.clear()
+    with tracing.operation("resolve", projects=len(project_ids)):
+        return _resolve(project_ids, loader, game_version, profile_folder, progress)
+
+def _resolve(project_ids, loader, game_version, profile_folder, progress):
+    installed = installed_projects(profile_folder)
+    chosen = {}       # project_id -> version
+    required_by = {}  # project_id -> project id of what pulled it in (None for what the user picked)
+    needed_by = {}    # project_id -> project ids of everything requiring it
+    incompatible = []  # (project_id, project id of the mod that declared it)
+    missing = []
+    conflicts = []
+
+    # Each level is a list of (project_id, version_id or None, parent project id or None)
+    level = [(project_id, None, None) for project_id in dict.fromkeys(project_ids)]
+    depth = 0
+    while level and depth < MAX_DEPTH:
+        if progress:
+            progress(depth, None, f"Resolving {len(level)} projects (level {depth + 1})")
+        with tracing.span("resolve.level", depth=depth, projects=len(level)):
+            pinned = _fetch_versions([version_id for _, version_id, _ in level if version_id])
+            # Dependencies that only give a version id carry no project id until fetched
+            level = [(project_id or (pinned[version_id]["project_id"] if version_id in pinned else None),
+                      version_id, parent) for project_id, version_id, parent in level]
+            projects = _fetch_projects([project_id for project_id, _, _ in level if project_id])
+
+            todo = {}
+            for project_id, version_id, parent in level:
+                if project_id is None:
+                    missing.append(f"unknown version {version_id} (required by {_title(projects, parent)})")
+                    continue
+                project_id = projects[project_id]["id"] if project_id in projects else project_id
+                if project_id in installed and parent is not None:
+                    continue
+                if parent is not None:
+                    needed_by.setdefault(project_id, set()).add(parent)
+                if project_id in chosen:
+                    if version_id and chosen[project_id]["id"] != version_id and version_id in pinned:
+                        conflicts.append(
+                            f"{_title(projects, project_id)}: {_title(projects, parent)} needs "
+                            f"{pinned[version_id]['version_number']}, using {chosen[project_id]['version_number']}")
+                    continue
+                version = pinned.get(version_id)
+                if version is not None and not _fits(version, loader, game_version):
+                    version = None
+                todo.setdefault(project_id, (version, parent))
+
+            # Whatever wasn't pinned (or was pinned to another loader) needs a filtered listing
+            unpinned = [project_id for project_id, (version, _) in todo.items() if version is None]
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_LOOKUPS) as pool:
+                best = dict(zip(unpinned, pool.map(lambda p: _best_version(p, loader, game_version), unpinned)))
+
+            next_level = []
+            for project_id, (version, parent) in todo.items():
+                version = version or best.get(project_id)
+                title = _title(projects, project_id)
+                if version is None:
+                    missing.append(f"{title}: no version for loader '{loader}' and Minecraft '{game_version}'"
+                                   + (f" (required by {_title(projects, parent)})" if parent else ""))
+                    continue
+                chosen[project_id] = version
+                required_by[project_id] = parent
+                for dependency in version.get("dependencies", []):
+                    if dependency.get("dependency_type") == "required":
+                        next_level.append((dependency.get("project_id"), dependency.get("version_id"), project_id))
+                    elif dependency.get("dependency_type") == "incompatible" and dependency.get("project_id"):
+                        incompatible.append((dependency["project_id"], project_id))
+            level = next_level
+            depth += 1
+
+    if incompatible:
+        with tracing.span("resolve.incompatible", declared=len(incompatible)):
+            # Jars Modrinth doesn't recognise are only known by the mod ids inside them
+            provided = installed_mod_ids(profile_folder)
+            _fetch_projects([project_id for project_id, _ in incompatible])
+    dropped = set()
+    for project_id, declared_by in incompatible:
+        if declared_by not in chosen:
+            continue
+        declarer = _title(_projects, declared_by)
+        project_id = _projects[project_id]["id"] if project_id in _projects else project_id
+        file_name = installed[project_id][0] if project_id in installed else _installed_as(_projects.get(project_id), provided)
+        if file_name:
+            # What is in the profile stays; a dependency that clashes with it is left out
+            left_out = declared_by if required_by[declared_by] is not None else None
+            conflict = f"{declarer} is incompatible with {file_name}, already in the profile"
+        elif project_id in chosen:
+            # Never leave out a project the user asked for; if both were asked for, keep both
+            left_out = next((p for p in (project_id, declared_by) if required_by[p] is not None), None)
+            conflict = f"{declarer} is incompatible with {_title(_projects, project_id)}"
+        else:
+            continue
+        if left_out is not None:
+            conflict += f"; leaving out {_title(_projects, left_out)}"
+            _drop(left_out, chosen, required_by, needed_by, dropped)
+        conflicts.append(conflict)
+
+    downloads = []
+    satisfied = []
+    for project_id, version in chosen.items():
+        if project_id in installed:
+            file_name, current = installed[project_id]
+            if current["id"] != version["id"]:
+                conflicts.append(f"{file_name} is already in the profile ({current['version_number']}); "
+                                 f"not adding {version['version_number']}")
+            satisfied.append((project_id, file_name))
+            continue
+        file_info = primary_file(version)
+        if file_info is None:
+            missing.append(f"{_title(_projects, project_id)} {version['version_number']}: no files")
+            continue
+        parent = required_by.get(project_id)
+        downloads.append({"project_id": project_id, "title": _title(_projects, project_id), "version": version,
+                          "file": file_info, "required_by": _title(_projects, parent) if parent else None})
+    return {"downloads": downloads, "satisfied": satisfied, "conflicts": conflicts, "missing": missing}
+
+def resolve_without_dependencies(project_ids, loader, game_version):
+    """Just the best version of each project, in the same shape as resolve()."""
+    unique = list(dict.fromkeys(project_ids))
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_LOOKUPS) as pool:
+        versions = list(pool.map(lambda p: _best_version(p, loader, game_version), unique))
+    downloads = []
+    missing = []
+    for project_id, version in zip(unique, versions):
+        file_info = primary_file(version) if version else None
+        if file_info is None:
+            missing.append(f"{project_id}: no matching versions for loader '{loader}' and Minecraft '{game_version}'")
+            continue
+        downloads.append({"project_id": project_id, "title": project_id, "version": version,
+                          "file": file_info, "required_by": None})
+    return {"downloads": downloads, "satisfied": [], "conflicts": [], "missing": missing}
+
+def _title(projects, project_id):
+    project = projects.get(project_id) or _projects.get(project_id)
+    return project.get("title", project_id) if project else project_id
@@ -0,0 +1,316 @@
+import json
+import os
+import posixpath
+import re
+import secrets
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import tracing
+from blobstore import blob_path, copy_blob, has_blob, link_blob, store_file, store_stream
+from sync import load_manifest, refresh_manifest, save_manifest
+
+# A snapshot is a small JSON list of a folder's files by content hash; the content itself
+# lives in the blob store, so a snapshot of files the store already holds (anything that
+# came from a profile) costs one JSON write. Exports pack snapshots plus every blob they
+# need, once each, into one compressed zip.
+
+SNAPSHOT_FOLDER = "snapshots"
+SNAPSHOT_SUFFIX = ".json"
+ARCHIVE_FORMAT = 1
+# Automatic pre-apply snapshots kept per kind and target; manual ones are kept until deleted
+AUTO_SNAPSHOT_KEEP = 20
+RESTORE_WORKERS = 8
+# Already compressed; deflating them again only burns time
+STORED_EXTENSIONS = (".jar", ".zip", ".png", ".ogg", ".mrpack", ".gz", ".xz", ".7z")
+SNAPSHOT_ID_PATTERN = re.compile(r"^\d{8}-\d{6}-[a-z]+-[0-9a-f]{4}$")
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _snapshot_path(snapshot_id):
+    if not SNAPSHOT_ID_PATTERN.match(snapshot_id):
+        raise SnapshotError(f"Not a snapshot id: {snapshot_id}")
+    return os.path.join(SNAPSHOT_FOLDER, snapshot_id + SNAPSHOT_SUFFIX)
+
+def _safe_path(rel_path):
+    """Refuse a snapshot path that is absolute or would escape the folder it is restored into."""
+    path = posixpath.normpath(rel_path.replace("\\", "/"))
+    if path != rel_path or path.startswith(("/", "../")) or path in (".", "..") or ":" in path.split("/")[0]:
+        raise SnapshotError(f"Unsafe path in snapshot: {rel_path}")
+    return path
+
+def _validate(snapshot):
+    """Check a snapshot that may come from outside (an imported archive, a hand-edited
+    file) before its paths and hashes are used to write anything."""
+    import core
+
+    try:
+        _snapshot_path(snapshot["id"])
+        if snapshot["kind"] not in core.PROFILE_KINDS:
+            raise SnapshotError(f"Unknown profile kind in snapshot: {snapshot['kind']}")
+        if snapshot.get("target") is not None and not isinstance(snapshot["target"], str):
+            raise SnapshotError("Snapshot target is not a name")
+        for rel_path, entry in snapshot["files"].items():
+            _safe_path(rel_path)
+            if not SHA256_PATTERN.match(entry["hash"]) or not isinstance(entry["size"], int):
+                raise SnapshotError(f"Bad entry for {rel_path} in snapshot")
+        str(snapshot["label"]), float(snapshot["created"])
+    except (KeyError, TypeError, AttributeError, ValueError) as e:
+        raise SnapshotError(f"Snapshot is malformed: {e!r}")
+
+def _new_id(kind):
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{kind}-{secrets.token_hex(2)}"
+
+def _save(snapshot):
+    os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+    path = _snapshot_path(snapshot["id"])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def load(snapshot_id):
+    try:
+        with open(_snapshot_path(snapshot_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise SnapshotError(f"No snapshot called {snapshot_id}")
+    except ValueError as e:
+        raise SnapshotError(f"Snapshot {snapshot_id} is damaged: {e}")
+
+def list_snapshots(kind=None):
+    """Every snapshot (newest first), without its file list."""
+    if not os.path.isdir(SNAPSHOT_FOLDER):
+        return []
+    found = []
+    for name in os.listdir(SNAPSHOT_FOLDER):
+        if not name.endswith(SNAPSHOT_SUFFIX):
+            continue
+        try:
+            snapshot = load(name[:-len(SNAPSHOT_SUFFIX)])
+        except SnapshotError as e:
+            print(e)
+            continue
+        if kind is None or snapshot["kind"] == kind:
+            files = snapshot.pop("files")
+            snapshot["file_count"] = len(files)
+            snapshot["size"] = sum(entry["size"] for entry in files.values())
+            found.append(snapshot)
+    return sorted(found, key=lambda s: s["created"], reverse=True)
+
+def delete(snapshot_id):
+    """Forget a snapshot; blobs nothing else needs go at the next collect_garbage()."""
+    try:
+        os.remove(_snapshot_path(snapshot_id))
+    except FileNotFoundError:
+        raise SnapshotError(f"No snapshot called {snapshot_id}")
+
+def referenced_hashes():
+    """Blob hashes some snapshot still needs, so garbage collection keeps them."""
+    hashes = set()
+    if os.path.isdir(SNAPSHOT_FOLDER):
+        for name in os.listdir(SNAPSHOT_FOLDER):
+            if name.endswith(SNAPSHOT_SUFFIX):
+                try:
+                    hashes.update(entry["hash"] for entry in load(name[:-len(SNAPSHOT_SUFFIX)])["files"].values())
+                except SnapshotError as e:
+                    print(e)
+    return hashes
+
+def describe(snapshot):
+    from sync import format_size
+
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(snapshot["created"]))
+    count = snapshot.get("file_count", len(snapshot.get("files", ())))
+    size = snapshot.get("size", sum(entry["size"] for entry in snapshot.get("files", {}).values()))
+    return f"{snapshot['id']}  {when}  {snapshot['label']}  ({count} files, {format_size(size)})"
+
+
+# --- Taking snapshots ---
+
+def take(folder, kind, label, auto=False, progress=None, target=None):
+    """Record what is in `folder` now. Returns the snapshot.
+
+    Only files the blob store doesn't have yet are copied into it (as a reflink where
+    the filesystem allows). An automatic snapshot identical to the previous automatic
+    one of the same kind and target is not written again. `target` names the game
+    directory a game folder snapshot came from (None for the default one).
+    """
+    with tracing.span("snapshot.take", folder=folder, auto=auto) as s:
+        manifest = refresh_manifest(folder, progress)
+        files = {}
+        for rel_path, entry in manifest.items():
+            if entry["hash"] == "symlink":
+                continue
+            if not has_blob(entry["hash"]):
+                store_file(os.path.join(folder, rel_path), entry["hash"])
+                s.add("files_stored")
+            files[rel_path.replace(os.sep, "/")] = {"hash": entry["hash"], "size": entry["size"]}
+        s.set(files=len(files))
+
+        if auto:
+            previous = next((p for p in list_snapshots(kind) if p.get("auto") and p.get("target") == target), None)
+            if previous is not None and load(previous["id"])["files"] == files:
+                return load(previous["id"])
+        snapshot = {"id": _new_id(kind), "kind": kind, "label": label, "created": time.time(),
+                    "auto": auto, "target": target, "files": files}
+        _save(snapshot)
+        if auto:
+            _prune_auto(kind, target)
+    return snapshot
+
+def _prune_auto(kind, target):
+    automatic = [s for s in list_snapshots(kind) if s.get("auto") and s.get("target") == target]
+    for snapshot in automatic[AUTO_SNAPSHOT_KEEP:]:
+        delete(snapshot["id"])
+
+
+# --- Restore ---
+
+def restore(snapshot_id, dest_folder, paths=None, progress=None, workers=RESTORE_WORKERS, link=True):
+    """Put a snapshot's files back into dest_folder.
+
+    With `paths` (snapshot-relative, "/"-separated) only those files are written and
+    nothing else is touched; without, dest_folder is made to match the snapshot exactly.
+    Files already identical are skipped, the rest are linked from the blob store on a
+    pool of workers (copied instead with link=False, as game folders need).
+    Returns {"restored", "removed", "unchanged", "errors"}.
+    """
+    snapshot = load(snapshot_id)
+    _validate(snapshot)
+    files = snapshot["files"]
+    if paths is not None:
+        unknown = [p for p in paths if p not in files]
+        if unknown:
+            raise SnapshotError(f"Not in snapshot {snapshot_id}: {', '.join(unknown[:5])}")
+        files = {p: files[p] for p in paths}
+    missing = sorted({entry["hash"] for entry in files.values() if not has_blob(entry["hash"])})
+    if missing:
+        raise SnapshotError(f"{len(missing)} files of snapshot {snapshot_id} are no longer in the blob store")
+
+    os.makedirs(dest_folder, exist_ok=True)
+    current = refresh_manifest(dest_folder)
+    wanted = {p.replace("/", os.sep): entry for p, entry in files.items()}
+    to_link = [p for p, entry in wanted.items() if current.get(p, {}).get("hash") != entry["hash"]]
+    to_remove = [p for p in current if p not in wanted] if paths is None else []
+    result = {"restored": 0, "removed": 0, "unchanged": len(wanted) - len(to_link), "errors": []}
+
+    with tracing.span("snapshot.restore", snapshot=snapshot_id, files=len(to_link)):
+        for rel_path in to_remove:
+            try:
+                os.remove(os.path.join(dest_folder, rel_path))
+                result["removed"] += 1
+            except OSError as e:
+                result["errors"].append(f"Failed to delete {rel_path}: {e}")
+
+        lock = threading.Lock()
+        restored = {}
+
+        def run(rel_path):
+            dest_path = os.path.join(dest_folder, rel_path)
+            (link_blob if link else copy_blob)(wanted[rel_path]["hash"], dest_path)
+            st = os.lstat(dest_path)
+            with lock:
+                restored[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "hash": wanted[rel_path]["hash"]}
+
+        done = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = {pool.submit(run, rel_path): rel_path for rel_path in to_link}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        result["restored"] += 1
+                    except OSError as e:
+                        result["errors"].append(f"Failed to restore {futures[future]}: {e}")
+                    done += 1
+                    if progress:
+                        progress(done, len(to_link), f"Restoring {futures[future]}")
+        finally:
+            manifest = load_manifest(dest_folder)
+            for rel_path in to_remove:
+                manifest.pop(rel_path, None)
+            manifest.update(restored)
+            save_manifest(dest_folder, manifest)
+    return result
+
+
+# --- Export and import ---
+
+def export(snapshot_ids, out_path, progress=None):
+    """Write snapshots and the blobs they need (each once, however many snapshots share
+    it) to a zip. Returns {"snapshots", "blobs", "bytes"}."""
+    snapshots = [load(snapshot_id) for snapshot_id in snapshot_ids]
+    blobs = {}
+    for snapshot in snapshots:
+        for rel_path, entry in snapshot["files"].items():
+            blobs.setdefault(entry["hash"], rel_path)
+    missing = [digest for digest in blobs if not has_blob(digest)]
+    if missing:
+        raise SnapshotError(f"{len(missing)} files are no longer in the blob store")
+
+    part_path = out_path + ".part"
+    written = 0
+    with tracing.span("snapshot.export", snapshots=len(snapshots), blobs=len(blobs)):
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            archive.writestr("format.json", json.dumps({"format": ARCHIVE_FORMAT}))
+            for snapshot in snapshots:
+                archive.writestr(f"snapshots/{snapshot['id']}.json", json.dumps(snapshot))
+            for i, (digest, rel_path) in enumerate(sorted(blobs.items())):
+                if progress:
+                    progress(i, len(blobs), f"Packing {rel_path}")
+                compression = zipfile.ZIP_STORED if rel_path.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                archive.write(blob_path(digest), f"blobs/{digest}", compress_type=compression)
+                written += os.path.getsize(blob_path(digest))
+        os.replace(part_path, out_path)
+    return {"snapshots": len(snapshots), "blobs": len(blobs), "bytes": written}
+
+def import_archive(path, progress=None):
+    """Add the snapshots in an exported zip, streaming in only the blobs not already stored.
+    Returns the imported snapshot ids."""
+    imported = []
+    with tracing.span("snapshot.import", path=path), zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        if "format.json" not in names or json.loads(archive.read("format.json")).get("format") != ARCHIVE_FORMAT:
+            raise SnapshotError(f"{path} is not a snapshot export")
+        # Every name and snapshot is checked before anything is stored, so a bad archive changes nothing
+        snapshot_names = []
+        blob_names = []
+        for name in names:
+            if name.startswith("snapshots/") and name.endswith(SNAPSHOT_SUFFIX):
+                snapshot_names.append(name)
+            elif name.startswith("blobs/") and SHA256_PATTERN.match(name[len("blobs/"):]):
+                blob_names.append(name)
+            elif name != "format.json":
+                raise SnapshotError(f"Unexpected member {name} in {path}")
+        snapshots = [json.loads(archive.read(name)) for name in snapshot_names]
+        for snapshot in snapshots:
+            _validate(snapshot)
+        in_archive = {name[len("blobs/"):] for name in blob_names}
+        for snapshot in snapshots:
+            for rel_path, entry in snapshot["files"].items():
+                if entry["hash"] not in in_archive and not has_blob(entry["hash"]):
+                    raise SnapshotError(f"{path} is missing the content of {rel_path}")
+        for i, name in enumerate(blob_names):
+            if progress:
+                progress(i, len(blob_names), f"Unpacking {name}")
+            expected = name[len("blobs/"):]
+            if has_blob(expected):
+                continue
+            # Hashed on the way in; content that doesn't match its name never reaches the store
+            with archive.open(name) as stream:
+                digest, _ = store_stream(stream, expected=expected)
+            if digest != expected:
+                raise SnapshotError(f"{name} in {path} is damaged")
+        for snapshot in snapshots:
+            if os.path.exists(_snapshot_path(snapshot["id"])):
+                snapshot["id"] = _new_id(snapshot["kind"])
+            _save(snapshot)
+            imported.append(snapshot["id"])
+    return imported
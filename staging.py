@@ -0,0 +1,227 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from blobstore import blob_path, has_blob
+from fileops import clone_or_copy, link_or_copy
+from sync import load_manifest, save_manifest, sync_folder
+
+STAGING_SUFFIX = ".scmm-staging"
+PREVIOUS_SUFFIX = ".scmm-previous"
+
+
+class ApplyError(Exception):
+    pass
+
+
+def _remove_tree(path):
+    if os.path.islink(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+def _seed_copy(current_folder, files, copied):
+    """copy_function for seeding staging: live files are linked, so only the live and previous
+    contents share them, except files an older version applied as links to a store blob,
+    which get a copy of their own (listed in copied) so the game can't write through to the store."""
+    def copy(src, dst):
+        entry = files.get(os.path.relpath(src, current_folder))
+        if entry and has_blob(entry["hash"]) and os.path.samefile(src, blob_path(entry["hash"])):
+            copied.append(src)
+            return clone_or_copy(src, dst)
+        return link_or_copy(src, dst)
+    return copy
+
+def _stage(src_folder, current_folder, staging_folder, progress, src_files=None):
+    """Seed the staging folder with links to what is live now, then sync only the differences.
+    Returns the sync stats and whether the staged contents differ from the live ones."""
+    with tracing.span("apply.clear_staging", folder=staging_folder):
+        _remove_tree(staging_folder)
+    copied = []
+    if os.path.isdir(current_folder):
+        with tracing.span("apply.seed_staging", folder=current_folder):
+            files = load_manifest(current_folder)
+            shutil.copytree(current_folder, staging_folder, symlinks=True,
+                            copy_function=_seed_copy(current_folder, files, copied))
+            # Links and copies keep size and mtime, so the live folder's hashes still hold
+            save_manifest(staging_folder, files)
+    stats = sync_folder(src_folder, staging_folder, progress=progress, src_files=src_files)
+    if stats["errors"]:
+        _remove_tree(staging_folder)
+        raise ApplyError("\n".join(stats["errors"]))
+    changed = bool(stats["copied"] or stats["removed"] or copied) or not os.path.isdir(current_folder)
+    return stats, changed
+
+def _move_manifest(from_folder, to_folder):
+    save_manifest(to_folder, load_manifest(from_folder))
+
+def staged_apply(src_folder, dst_folder, progress=None, src_files=None):
+    """Apply src_folder to dst_folder without ever leaving dst_folder half written.
+
+    The new contents are built in a sibling folder and swapped in with two renames. The
+    old contents stay beside it until the next apply that changes something, so rollback()
+    is instant. Any failure before the swap leaves dst_folder untouched.
+    """
+    with tracing.span("apply.staged", dst=dst_folder):
+        pending = prepare_apply(src_folder, dst_folder, progress, src_files)
+        return commit_apply(pending)
+
+def prepare_apply(src_folder, dst_folder, progress=None, src_files=None):
+    """First half of staged_apply(): build the new contents beside dst_folder.
+
+    Returns a pending apply to hand to commit_apply() or discard_apply(); dst_folder
+    itself is not changed.
+    """
+    dst_folder = os.path.abspath(dst_folder.rstrip("/\\"))
+    staging = dst_folder + STAGING_SUFFIX
+    with tracing.span("apply.stage", dst=dst_folder):
+        try:
+            stats, changed = _stage(src_folder, dst_folder, staging, progress, src_files)
+        except BaseException:
+            # Cancelled or failed partway: don't leave a half-built folder beside the game's
+            _remove_tree(staging)
+            raise
+    return {"dst": dst_folder, "staging": staging, "stats": stats, "changed": changed, "had_current": None}
+
+def commit_apply(pending):
+    """Swap a prepared apply in. Returns its sync stats, with "swapped" saying whether it was.
+
+    An apply that changed nothing is discarded instead, so the previous contents (and
+    with them rollback()) still hold what was live before the last real change.
+    """
+    dst_folder = pending["dst"]
+    staging = pending["staging"]
+    pending["stats"]["swapped"] = pending["changed"]
+    if not pending["changed"]:
+        with tracing.span("apply.unchanged", folder=dst_folder):
+            discard_apply(pending)
+        return pending["stats"]
+
+    previous = dst_folder + PREVIOUS_SUFFIX
+    with tracing.span("apply.remove_previous", folder=previous):
+        _remove_tree(previous)
+    with tracing.span("apply.swap"):
+        had_current = os.path.exists(dst_folder)
+        if had_current:
+            _move_manifest(dst_folder, previous)
+            os.rename(dst_folder, previous)
+        try:
+            os.rename(staging, dst_folder)
+        except OSError:
+            if had_current:
+                os.rename(previous, dst_folder)
+            raise
+        _move_manifest(staging, dst_folder)
+    pending["had_current"] = had_current
+    return pending["stats"]
+
+def discard_apply(pending):
+    """Throw away a prepared apply that will not be committed."""
+    _remove_tree(pending["staging"])
+
+def _undo_commit(pending):
+    if not pending["changed"]:
+        return
+    if pending["had_current"]:
+        rollback(pending["dst"])
+    else:
+        # There was nothing live before, so going back means removing what was swapped in
+        _remove_tree(pending["dst"])
+        save_manifest(pending["dst"], {})
+
+def _part_progress(progress, parts, failed):
+    """Per-folder progress callbacks that report one combined figure and stop early once another folder failed."""
+    done = [0] * parts
+    totals = [0] * parts
+    lock = threading.Lock()
+
+    def for_part(i):
+        def report(part_done, total=None, message=None):
+            if failed.is_set():
+                raise ApplyError("Stopped because another folder failed")
+            if progress is None:
+                return
+            with lock:
+                done[i] = part_done
+                if total is not None:
+                    totals[i] = total
+                progress(sum(done), sum(totals) or None, message)
+        return report
+    return for_part
+
+def staged_apply_many(pairs, progress=None, src_files=None):
+    """Apply several (src_folder, dst_folder) pairs as one all-or-nothing change.
+
+    Every pair is staged at once, one thread each, so the whole takes about as long as
+    the largest. Only when all of them staged cleanly are they swapped in; a failure
+    while staging leaves every destination untouched, and a failed swap rolls back the
+    ones already swapped. src_files optionally gives a known-current manifest (or None)
+    for each source. Returns the sync stats of each pair, in order.
+    """
+    pairs = list(pairs)
+    src_files = src_files or [None] * len(pairs)
+    failed = threading.Event()
+    part_progress = _part_progress(progress, len(pairs), failed)
+
+    pending = [None] * len(pairs)
+    errors = []  # in the order they happened, so the first is the cause and the rest are the early stops
+
+    def prepare(i, src_folder, dst_folder):
+        try:
+            pending[i] = prepare_apply(src_folder, dst_folder, part_progress(i), src_files=src_files[i])
+        except BaseException as e:
+            errors.append(e)
+            failed.set()
+
+    with tracing.span("apply.stage_all", folders=len(pairs)):
+        with ThreadPoolExecutor(max_workers=max(1, len(pairs))) as pool:
+            list(pool.map(lambda args: prepare(*args), [(i, src, dst) for i, (src, dst) in enumerate(pairs)]))
+    if errors:
+        for p in pending:
+            if p is not None:
+                discard_apply(p)
+        raise errors[0]
+
+    committed = []
+    with tracing.span("apply.swap_all", folders=len(pairs)):
+        try:
+            for p in pending:
+                commit_apply(p)
+                committed.append(p)
+        except BaseException:
+            for p in reversed(committed):
+                _undo_commit(p)
+            for p in pending[len(committed):]:
+                discard_apply(p)
+            raise
+    return [p["stats"] for p in pending]
+
+def forget_previous(dst_folder):
+    """Drop the previous contents kept for rollback(), for a folder about to be changed in place."""
+    dst_folder = os.path.abspath(dst_folder.rstrip("/\\"))
+    _remove_tree(dst_folder + PREVIOUS_SUFFIX)
+
+def can_rollback(dst_folder):
+    dst_folder = os.path.abspath(dst_folder.rstrip("/\\"))
+    return os.path.isdir(dst_folder + PREVIOUS_SUFFIX)
+
+def rollback(dst_folder):
+    """Swap the previous contents back in. Calling it again redoes the apply."""
+    dst_folder = os.path.abspath(dst_folder.rstrip("/\\"))
+    if not can_rollback(dst_folder):
+        raise ApplyError(f"Nothing to roll back for {dst_folder}")
+    previous = dst_folder + PREVIOUS_SUFFIX
+    swap = dst_folder + STAGING_SUFFIX
+    _remove_tree(swap)
+    os.rename(dst_folder, swap)
+    try:
+        os.rename(previous, dst_folder)
+    except OSError:
+        os.rename(swap, dst_folder)
+        raise
+    os.rename(swap, previous)
+    current_manifest = load_manifest(dst_folder)
+    _move_manifest(previous, dst_folder)
+    save_manifest(previous, current_manifest)
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import threading
+
+import tracing
+from fileops import clone_or_copy, file_hash
+
+# Manifests live next to the app, not inside the game folders, so Minecraft never sees them
+MANIFEST_FOLDER = os.path.join("cache", "manifests")
+
+
+# --- Manifests ---
+
+def manifest_path_for(folder):
+    key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MANIFEST_FOLDER, key + ".json")
+
+def load_manifest(folder):
+    try:
+        with open(manifest_path_for(folder), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(folder, files):
+    os.makedirs(MANIFEST_FOLDER, exist_ok=True)
+    path = manifest_path_for(folder)
+    # Per thread, since a background rescan may save the same folder's manifest as an apply
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"folder": os.path.abspath(folder), "files": files}, f)
+    os.replace(tmp_path, path)
+
+def build_manifest(folder, previous=None, progress=None):
+    """Map every file under folder (relative path) to its size, mtime and sha256.
+
+    Hashes from `previous` are reused when size and mtime are unchanged, so only
+    new or modified files are read. `progress(done, total, message)` is called
+    before each file that has to be hashed.
+    """
+    previous = previous or {}
+    files = {}
+    if not os.path.isdir(folder):
+        return files
+    with tracing.span("sync.manifest", folder=folder) as s:
+        _scan_folder(folder, previous, files, progress)
+        s.set(files=len(files))
+    return files
+
+def _scan_folder(folder, previous, files, progress):
+    for dirpath, dirnames, filenames in os.walk(folder):
+        # Symlinked folders are treated as plain entries and never followed
+        for name in list(dirnames):
+            if os.path.islink(os.path.join(dirpath, name)):
+                dirnames.remove(name)
+                filenames.append(name)
+        for name in filenames:
+            full_path = os.path.join(dirpath, name)
+            rel_path = os.path.relpath(full_path, folder)
+            st = os.lstat(full_path)
+            entry = {"size": st.st_size, "mtime": st.st_mtime_ns}
+            old = previous.get(rel_path)
+            if os.path.islink(full_path):
+                entry["hash"] = "symlink"
+            elif old and old["size"] == entry["size"] and old["mtime"] == entry["mtime"]:
+                entry["hash"] = old["hash"]
+            else:
+                if progress:
+                    progress(0, None, f"Hashing {rel_path}")
+                entry["hash"] = file_hash(full_path)
+            files[rel_path] = entry
+
+def refresh_manifest(folder, progress=None):
+    files = build_manifest(folder, load_manifest(folder), progress)
+    save_manifest(folder, files)
+    return files
+
+
+# --- Sync ---
+
+def plan_sync(src_files, dst_files):
+    """Work out which relative paths must be removed from and copied into the destination."""
+    to_remove = []
+    to_copy = []
+    unchanged = []
+    for rel_path, entry in dst_files.items():
+        if rel_path not in src_files:
+            to_remove.append(rel_path)
+    for rel_path, entry in src_files.items():
+        current = dst_files.get(rel_path)
+        if current is None:
+            to_copy.append(rel_path)
+        elif current["hash"] != entry["hash"] or entry["hash"] == "symlink":
+            to_remove.append(rel_path)
+            to_copy.append(rel_path)
+        else:
+            unchanged.append(rel_path)
+    return to_remove, to_copy, unchanged
+
+def _prune_empty_dirs(folder):
+    for dirpath, dirnames, filenames in os.walk(folder, topdown=False):
+        if dirpath == folder:
+            continue
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
+
+def sync_folder(src_folder, dst_folder, progress=None, src_files=None):
+    """Make dst_folder match src_folder, touching only the files that differ.
+
+    Returns a dict of counters, including the bytes that did not need copying.
+    `progress(done, total, message)` is called per file and may raise to cancel.
+    src_files, if given, is a manifest of src_folder known to be current (from the
+    profile inventory), which saves walking it again.
+    """
+    with tracing.span("sync.folder", src=src_folder, dst=dst_folder, cached_source=src_files is not None) as s:
+        os.makedirs(dst_folder, exist_ok=True)
+        if src_files is None:
+            src_files = refresh_manifest(src_folder, progress)
+        dst_files = build_manifest(dst_folder, load_manifest(dst_folder), progress)
+
+        to_remove, to_copy, unchanged = plan_sync(src_files, dst_files)
+        stats = {
+            "removed": 0,
+            "copied": 0,
+            "copied_bytes": 0,
+            "skipped": len(unchanged),
+            "skipped_bytes": sum(src_files[p]["size"] for p in unchanged),
+            "errors": [],
+        }
+
+        try:
+            _apply_plan(src_folder, dst_folder, src_files, dst_files, to_remove, to_copy, stats, progress)
+        finally:
+            # Keep the manifest truthful even if we were cancelled halfway
+            with tracing.span("sync.save_manifest", files=len(dst_files)):
+                save_manifest(dst_folder, dst_files)
+        s.set(**{key: value for key, value in stats.items() if key != "errors"})
+        tracing.count("bytes_copied", stats["copied_bytes"])
+        tracing.count("files_unchanged", stats["skipped"])
+    for error in stats["errors"]:
+        print(error)
+    return stats
+
+def _apply_plan(src_folder, dst_folder, src_files, dst_files, to_remove, to_copy, stats, progress):
+    total = len(to_remove) + len(to_copy)
+    done = 0
+    with tracing.span("sync.remove", files=len(to_remove)):
+        done = _remove_files(dst_folder, dst_files, to_remove, stats, progress, done, total)
+    with tracing.span("sync.copy", files=len(to_copy)):
+        _copy_files(src_folder, dst_folder, src_files, dst_files, to_copy, stats, progress, done, total)
+    if progress:
+        progress(total, total, "Done")
+
+def _remove_files(dst_folder, dst_files, to_remove, stats, progress, done, total):
+    for rel_path in to_remove:
+        if progress:
+            progress(done, total, f"Removing {rel_path}")
+        done += 1
+        path = os.path.join(dst_folder, rel_path)
+        try:
+            os.remove(path)
+            stats["removed"] += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            stats["errors"].append(f"Failed to delete {path}: {e}")
+            continue
+        dst_files.pop(rel_path, None)
+    _prune_empty_dirs(dst_folder)
+    return done
+
+def _copy_files(src_folder, dst_folder, src_files, dst_files, to_copy, stats, progress, done, total):
+    for rel_path in to_copy:
+        if progress:
+            progress(done, total, f"Copying {rel_path}")
+        done += 1
+        source_path = os.path.join(src_folder, rel_path)
+        dest_path = os.path.join(dst_folder, rel_path)
+        try:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            if os.path.islink(source_path):
+                os.symlink(os.readlink(source_path), dest_path)
+            else:
+                # Never a hardlink: the game rewrites some files in place (shader settings),
+                # which would change the profile and the blob behind it too
+                clone_or_copy(source_path, dest_path)
+        except OSError as e:
+            stats["errors"].append(f"Failed to copy {source_path} to {dest_path}: {e}")
+            continue
+        st = os.lstat(dest_path)
+        digest = src_files[rel_path]["hash"]
+        if digest != "symlink" and (st.st_size, st.st_mtime_ns) != (src_files[rel_path]["size"], src_files[rel_path]["mtime"]):
+            # The source changed after its manifest entry was made
+            digest = file_hash(dest_path)
+        dst_files[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "hash": digest}
+        stats["copied"] += 1
+        stats["copied_bytes"] += st.st_size
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+def format_sync_stats(stats):
+    text = (f"{stats['copied']} copied ({format_size(stats['copied_bytes'])}), "
+            f"{stats['removed']} removed, {stats['skipped']} unchanged "
+            f"({format_size(stats['skipped_bytes'])} not copied)")
+    if stats["errors"]:
+        text += f"\n{len(stats['errors'])} errors, see console output"
+    return text
@@ -0,0 +1,80 @@
+import json
+import os
+
+import core
+
+# A target is a named game directory profiles can be applied to besides the default
+# .minecraft: a MultiMC/Prism instance, another launcher's folder, or a server.
+
+TARGETS_FILE = "targets.json"
+# Always there and always the folder core.minecraft_folder() finds
+DEFAULT_TARGET = "default"
+# Subfolders MultiMC and Prism keep an instance's game directory in
+INSTANCE_GAME_DIRS = (".minecraft", "minecraft")
+
+
+class TargetError(Exception):
+    pass
+
+
+def load_targets():
+    """{target name: game directory}, without the default target."""
+    try:
+        with open(TARGETS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise TargetError(f"Could not read {TARGETS_FILE}: {e}")
+
+def _save_targets(targets):
+    tmp_path = TARGETS_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(targets, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, TARGETS_FILE)
+
+def list_targets():
+    return [DEFAULT_TARGET] + sorted(load_targets())
+
+def target_folder(name):
+    if name is None or name == DEFAULT_TARGET:
+        return core.minecraft_folder()
+    targets = load_targets()
+    if name not in targets:
+        raise TargetError(f"No target called '{name}'")
+    return targets[name]
+
+def game_dir_of(path):
+    """The game directory inside an instance folder, or path itself if it is one already."""
+    if os.path.isfile(os.path.join(path, "instance.cfg")):
+        for sub in INSTANCE_GAME_DIRS:
+            if os.path.isdir(os.path.join(path, sub)):
+                return os.path.join(path, sub)
+    return path
+
+def add_target(name, path):
+    """Create or replace a target; instance folders are resolved to their game directory."""
+    if not name:
+        raise TargetError("A target needs a name")
+    if name == DEFAULT_TARGET:
+        raise TargetError(f"'{DEFAULT_TARGET}' always means {core.minecraft_folder()}")
+    if not os.path.isdir(path):
+        raise TargetError(f"Folder does not exist: {path}")
+    targets = load_targets()
+    folder = os.path.abspath(game_dir_of(path))
+    for other in [DEFAULT_TARGET] + sorted(targets):
+        if other != name and os.path.realpath(target_folder(other)) == os.path.realpath(folder):
+            raise TargetError(f"{folder} is already the target '{other}'")
+    targets[name] = folder
+    _save_targets(targets)
+    return targets[name]
+
+def remove_target(name):
+    """Forget a target; its folder is left as it is."""
+    targets = load_targets()
+    if targets.pop(name, None) is None:
+        raise TargetError(f"No target called '{name}'")
+    _save_targets(targets)
+
+def describe(name):
+    return f"{name}: {target_folder(name)}"
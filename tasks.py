@@ -0,0 +1,156 @@
+import itertools
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    """A unit of background work. The worker function receives the task as its first argument
+    and reports through set_progress, which is also where cancellation takes effect."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name, func, args, kwargs, on_done=None, on_error=None):
+        self.id = next(self._ids)
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.status = "queued"
+        self.done = 0
+        self.total = None
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled(self.name)
+
+    def set_progress(self, done, total=None, message=None):
+        self.check_cancelled()
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+    @property
+    def fraction(self):
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def describe(self):
+        text = f"{self.name} - {self.status}"
+        if self.status == "running" and self.fraction is not None:
+            text += f" {self.fraction * 100:.0f}%"
+        if self.message and not self.finished:
+            text += f" ({self.message})"
+        return text
+
+
+class TaskManager:
+    """Runs slow jobs on a thread pool and hands results back to the Tk main loop.
+
+    Callbacks (on_done/on_error) only ever run inside poll(), which start_polling
+    schedules with root.after, so they may touch widgets freely.
+    """
+
+    def __init__(self, max_workers=4, keep_finished=20):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scmm-task")
+        self._finished = queue.Queue()
+        self._lock = threading.Lock()
+        self.keep_finished = keep_finished
+        self.tasks = []
+
+    def submit(self, name, func, *args, on_done=None, on_error=None, **kwargs):
+        task = Task(name, func, args, kwargs, on_done, on_error)
+        with self._lock:
+            self.tasks.append(task)
+        self._executor.submit(self._run, task)
+        return task
+
+    def _run(self, task):
+        if task.cancelled:
+            task.status = "cancelled"
+            self._finished.put(task)
+            return
+        task.status = "running"
+        task.started_at = time.perf_counter()
+        try:
+            task.result = task.func(task, *task.args, **task.kwargs)
+            task.status = "done"
+        except TaskCancelled:
+            task.status = "cancelled"
+        except Exception as e:
+            task.error = e
+            task.status = "failed"
+            traceback.print_exc()
+        task.finished_at = time.perf_counter()
+        self._finished.put(task)
+
+    def active(self):
+        with self._lock:
+            return [t for t in self.tasks if not t.finished]
+
+    def cancel_all(self):
+        for task in self.active():
+            task.cancel()
+
+    def poll(self):
+        """Run callbacks for tasks that finished since the last poll. Main thread only."""
+        while True:
+            try:
+                task = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            callback = None
+            if task.status == "done" and task.on_done:
+                callback = lambda: task.on_done(task.result)
+            elif task.status == "failed" and task.on_error:
+                callback = lambda: task.on_error(task.error)
+            if callback:
+                try:
+                    callback()
+                except Exception:
+                    # The window the callback updates may have been closed meanwhile
+                    traceback.print_exc()
+        with self._lock:
+            finished = [t for t in self.tasks if t.finished]
+            for task in finished[:-self.keep_finished or None]:
+                self.tasks.remove(task)
+
+    def start_polling(self, root, interval_ms=100, on_update=None):
+        def tick():
+            self.poll()
+            if on_update:
+                on_update(self)
+            root.after(interval_ms, tick)
+        root.after(interval_ms, tick)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Nested timing spans and counters around the filesystem and HTTP hot paths.
+# Tracing is off by default; span() then hands back one shared no-op object, so an
+# instrumented call costs a global lookup and a function call.
+
+MAX_SPANS = 100_000
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_epoch = time.perf_counter()
+_spans = deque(maxlen=MAX_SPANS)
+_counters = {}
+_last_operation = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, name, amount=1):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "duration", "depth", "thread", "operation")
+
+    def __init__(self, name, attrs, operation=False):
+        self.name = name
+        self.attrs = attrs
+        self.operation = operation
+        self.duration = None
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.depth = len(stack)
+        self.thread = threading.get_ident()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _last_operation
+        self.duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        with _lock:
+            _spans.append(self)
+            if self.operation:
+                _last_operation = self
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, name, amount=1):
+        """Bump a counter on this span and the matching global counter."""
+        self.attrs[name] = self.attrs.get(name, 0) + amount
+        count(name, amount)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - _epoch) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "depth": self.depth,
+            "thread": self.thread,
+            "attrs": self.attrs,
+        }
+
+
+def span(name, **attrs):
+    """Time a block: `with tracing.span("sync.copy", path=p) as s: ... s.add("bytes", n)`."""
+    if not _enabled:
+        return NULL_SPAN
+    return Span(name, attrs)
+
+def operation(name, **attrs):
+    """A top-level span for one user action; the debug views report on the latest one."""
+    if not _enabled:
+        return NULL_SPAN
+    return Span(name, attrs, operation=True)
+
+def count(name, amount=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+# --- Control ---
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    global _last_operation
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _last_operation = None
+
+
+# --- Reports ---
+
+def spans():
+    with _lock:
+        return list(_spans)
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+def last_operation():
+    return _last_operation
+
+def last_operation_spans():
+    """Spans that ran during the latest operation, on any thread (worker pools included)."""
+    op = _last_operation
+    if op is None:
+        return spans()
+    end = op.start + op.duration
+    return [s for s in spans() if s.start >= op.start and s.start + s.duration <= end]
+
+def slowest(n=10, only_last_operation=True):
+    found = last_operation_spans() if only_last_operation else spans()
+    return sorted(found, key=lambda s: s.duration, reverse=True)[:n]
+
+def format_span(s):
+    attrs = ", ".join(f"{key}={value}" for key, value in s.attrs.items())
+    return f"{s.duration * 1000:9.1f} ms  {'  ' * s.depth}{s.name}" + (f"  ({attrs})" if attrs else "")
+
+def format_slowest(n=10):
+    lines = [format_span(s) for s in slowest(n)]
+    totals = counters()
+    if totals:
+        lines.append("counters: " + ", ".join(f"{key}={value}" for key, value in sorted(totals.items())))
+    return "\n".join(lines)
+
+
+# --- Export ---
+
+def export_jsonl(path):
+    with open(path, "w", encoding="utf-8") as f:
+        for s in sorted(spans(), key=lambda s: s.start):
+            f.write(json.dumps(s.to_dict(), default=str) + "\n")
+        f.write(json.dumps({"counters": counters()}) + "\n")
+
+def export_chrome(path):
+    """Write the Trace Event format that chrome://tracing and Perfetto open."""
+    pid = os.getpid()
+    events = [{
+        "name": s.name,
+        "ph": "X",
+        "ts": round((s.start - _epoch) * 1_000_000, 1),
+        "dur": round(s.duration * 1_000_000, 1),
+        "pid": pid,
+        "tid": s.thread,
+        "args": s.attrs,
+    } for s in spans()]
+    for name, value in counters().items():
+        events.append({"name": name, "ph": "C", "ts": 0, "pid": pid, "args": {name: value}})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+def export(path):
+    """Chrome trace for .json files, JSON lines for anything else."""
+    if path.lower().endswith(".json"):
+        export_chrome(path)
+    else:
+        export_jsonl(path)
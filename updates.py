@@ -0,0 +1,81 @@
+import os
+
+import hash_cache
+import modrinth
+from blobstore import ingest_file
+from downloads import DownloadManager, DEFAULT_MAX_CONCURRENT
+
+
+def primary_file(version):
+    files = version.get("files", [])
+    return next((f for f in files if f.get("primary")), files[0] if files else None)
+
+def check_profile_updates(profile_folder, loader, game_version, progress=None):
+    """Find outdated jars in a profile with two bulk requests, whatever its size.
+
+    Returns a dict with "updates" (list of dicts with path, current and latest version
+    and the file to download), "up_to_date" and "unknown" (lists of paths).
+    """
+    jar_paths = sorted(
+        os.path.join(profile_folder, name) for name in os.listdir(profile_folder)
+        if name.endswith(".jar") and os.path.isfile(os.path.join(profile_folder, name))
+    )
+    hashes = {}
+    for i, path in enumerate(jar_paths):
+        if progress:
+            progress(i, len(jar_paths), f"Hashing {os.path.basename(path)}")
+        hashes[path] = hash_cache.get_hashes(path)["sha512"]
+
+    if progress:
+        progress(len(jar_paths), len(jar_paths), "Looking up versions")
+    known = modrinth.get_versions_from_hashes(hashes.values())
+    latest = modrinth.get_latest_versions_from_hashes(hashes.values(), loader, game_version)
+
+    result = {"updates": [], "up_to_date": [], "unknown": []}
+    for path, digest in hashes.items():
+        new_version = latest.get(digest)
+        if digest not in known or new_version is None:
+            # Not on Modrinth, or no release for this loader/game version
+            result["unknown"].append(path)
+        elif any(f.get("hashes", {}).get("sha512") == digest for f in new_version.get("files", [])):
+            result["up_to_date"].append(path)
+        else:
+            result["updates"].append({
+                "path": path,
+                "current": known[digest],
+                "latest": new_version,
+                "file": primary_file(new_version),
+            })
+    return result
+
+def apply_updates(profile_folder, updates, max_concurrent=DEFAULT_MAX_CONCURRENT, progress=None):
+    """Download the new files in parallel and swap them in for the old jars.
+
+    Returns (updated file names, error strings).
+    """
+    jobs = []
+    old_paths = {}
+    for update in updates:
+        file_info = update["file"]
+        dest_path = os.path.join(profile_folder, file_info["filename"])
+        if os.path.abspath(dest_path) == os.path.abspath(update["path"]):
+            # Same name, different content; download beside it and rename over it afterwards
+            dest_path += ".update"
+        jobs.append((file_info["url"], dest_path, file_info.get("hashes")))
+        old_paths[dest_path] = update["path"]
+
+    updated = []
+    errors = []
+    for dest_path, error in DownloadManager(max_concurrent).download_all(jobs, progress=progress):
+        if error:
+            errors.append(f"{os.path.basename(dest_path)}: {error}")
+            continue
+        old_path = old_paths[dest_path]
+        if dest_path.endswith(".update"):
+            os.replace(dest_path, old_path)
+            dest_path = old_path
+        else:
+            os.remove(old_path)
+        ingest_file(dest_path)
+        updated.append(os.path.basename(dest_path))
+    return updated, errors
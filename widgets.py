@@ -0,0 +1,121 @@
+import tkinter as tk
+from tkinter import Scrollbar
+
+
+class VirtualList(tk.Frame):
+    """A Listbox look-alike for very long lists that only draws the rows in view.
+
+    Rows are set by index as they arrive (set_count for the length, set_rows for the
+    text); rows without text show a placeholder. on_need_rows(first, last) is called
+    with the visible range whenever it changes, so the owner can fetch what's missing.
+    """
+
+    PLACEHOLDER = "Loading..."
+
+    def __init__(self, master, row_height=20, on_need_rows=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_height = row_height
+        self.on_need_rows = on_need_rows
+        self.count = 0
+        self.rows = {}
+        self.top = 0  # first visible row
+        self.selected = set()
+        self._anchor = None
+        self._last_range = None
+
+        self.canvas = tk.Canvas(self, background="white", highlightthickness=1, highlightbackground="#a0a0a0")
+        self.scrollbar = Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<Button-1>", self._click)
+        self.canvas.bind("<Shift-Button-1>", lambda e: self._click(e, extend=True))
+        self.canvas.bind("<Control-Button-1>", lambda e: self._click(e, toggle=True))
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+
+    # --- Contents ---
+
+    def clear(self):
+        self.count = 0
+        self.rows.clear()
+        self.selected.clear()
+        self.top = 0
+        self._last_range = None
+        self.redraw()
+
+    def set_count(self, count):
+        self.count = count
+        self.top = max(0, min(self.top, self.count - self.visible_rows()))
+        self.redraw()
+
+    def set_rows(self, first, texts):
+        for i, text in enumerate(texts):
+            self.rows[first + i] = text
+        self.redraw()
+
+    def curselection(self):
+        return tuple(sorted(self.selected))
+
+    # --- Scrolling ---
+
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def yview(self, action, value, unit=None):
+        if action == "moveto":
+            self.top = int(float(value) * self.count)
+        elif action == "scroll":
+            self.scroll(int(value), unit)
+            return
+        self._clamp()
+        self.redraw()
+
+    def scroll(self, amount, unit):
+        self.top += amount * (self.visible_rows() if unit == "pages" else 3)
+        self._clamp()
+        self.redraw()
+
+    def _clamp(self):
+        self.top = max(0, min(self.top, self.count - self.visible_rows()))
+
+    # --- Drawing ---
+
+    def redraw(self):
+        self.canvas.delete("all")
+        width = self.canvas.winfo_width()
+        visible = self.visible_rows()
+        last = min(self.count, self.top + visible + 1)
+        for index in range(self.top, last):
+            y = (index - self.top) * self.row_height
+            if index in self.selected:
+                self.canvas.create_rectangle(0, y, width, y + self.row_height, fill="#3874d8", width=0)
+            self.canvas.create_text(
+                4, y + self.row_height // 2, anchor=tk.W, text=self.rows.get(index, self.PLACEHOLDER),
+                fill="white" if index in self.selected else ("black" if index in self.rows else "gray"),
+            )
+        if self.count:
+            self.scrollbar.set(self.top / self.count, min(1.0, (self.top + visible) / self.count))
+        else:
+            self.scrollbar.set(0, 1)
+        visible_range = (self.top, last - 1)
+        if self.on_need_rows and self.count and visible_range != self._last_range:
+            self._last_range = visible_range
+            self.on_need_rows(*visible_range)
+
+    def _click(self, event, extend=False, toggle=False):
+        index = self.top + event.y // self.row_height
+        if index >= self.count:
+            return
+        if extend and self._anchor is not None:
+            low, high = sorted((self._anchor, index))
+            self.selected = set(range(low, high + 1))
+        elif toggle:
+            self.selected.symmetric_difference_update({index})
+            self._anchor = index
+        else:
+            self.selected = {index}
+            self._anchor = index
+        self.redraw()